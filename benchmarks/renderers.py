@@ -0,0 +1,65 @@
+"""Benchmark of the hvplot/holoviews render path against the direct bokeh renderers
+
+Run from the repository root: python -m benchmarks.renderers
+"""
+
+# Required libraries and dependencies
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+
+def time_import(statement, repeat=3):
+
+    # Fresh interpreter per run so nothing is already imported
+    timings = []
+    for _ in range(repeat):
+        timer = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True)
+        timings.append(time.perf_counter() - timer)
+
+    return min(timings)
+
+
+def time_call(function, repeat=20):
+
+    timings = []
+    for _ in range(repeat):
+        timer = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - timer)
+
+    return np.median(timings)
+
+
+if __name__ == "__main__":
+    import hvplot.pandas
+    import holoviews as hv
+    from bokeh.embed import json_item
+    from formulas.renderers import bar_chart, heatmap
+
+    hv.extension("bokeh")
+    rng = np.random.default_rng(0)
+
+    # Same shapes as the app's panels: one row of seven ratios and one asset's r^2 against the other twelve
+    statistics = pd.DataFrame([rng.normal(size=7)], index=["Bitcoin"],
+                              columns=["Calmar Ratio", "Sortino Ratio", "Sharpe Ratio", "Max Drawdown", "Peak", "Volatity", "Return"])
+    correlations = pd.Series(rng.random(12), index=[f"Asset {i}" for i in range(12)]).sort_values()
+
+    results = pd.DataFrame({
+        "hvplot + hv.render": [
+            time_import("import hvplot.pandas, holoviews as hv; hv.extension('bokeh')"),
+            time_call(lambda: json_item(hv.render(statistics.hvplot.bar(color="black", hover_color="green", rot=45), backend="bokeh"))),
+            time_call(lambda: json_item(hv.render(correlations.hvplot.heatmap(cmap="Greys", rot=45, xaxis=None), backend="bokeh"))),
+        ],
+        "formulas.renderers": [
+            time_import("import formulas.renderers"),
+            time_call(lambda: json_item(bar_chart(statistics, color="black", hover_color="green", rot=45))),
+            time_call(lambda: json_item(heatmap(correlations, rot=45, xaxis=False))),
+        ],
+    }, index=["Import (s)", "Bar panel (s)", "Heatmap panel (s)"])
+    results["Speedup"] = results["hvplot + hv.render"] / results["formulas.renderers"]
+
+    print(results.round(4).to_string())
@@ -6,16 +6,31 @@ import pandas as pd
 import numpy as np
 import datetime as dt
 import os
-import financialanalysis as fa
+from contextlib import contextmanager
 import streamlit as st
 from messari.messari import Messari
 import alpaca_trade_api as tradeapi
 import matplotlib.pyplot as plt
-import hvplot.pandas
-import holoviews as hv
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-hv.extension('bokeh')
+from formulas.alignment import align_timeseries, trailing_window, pairwise_correlations
+from formulas.dates import linear_trend, normalize_dates
+from formulas.sessions import benchmark_correlations
+from formulas.screener import Screener, screener_metrics, load_screener, percent_metrics
+from formulas.drawdowns import drawdown_analytics
+from formulas.risk import risk_metrics, load_risk_free_rate
+from formulas.rolling import rolling_risk_metrics
+from formulas.downsampling import downsample_frame, default_point_budget
+from formulas.templates import regression_channel_figure, add_projection_fan
+from formulas.projections import projection_methods, project_prices
+from formulas.serialization import render_plotly, render_bokeh, payload_sizes, reset_payload_sizes
+from formulas.renderers import bar_chart, heatmap
+from formulas.render_cache import load_report
+from formulas.formatting import format_number, format_percent, format_table
+from formulas.optimizer import covariance_matrix, minimum_variance_weights, maximum_sharpe_weights, risk_parity_weights, efficient_frontier
+from formulas.clustering import ordered_correlations, cluster_membership
+from formulas.fetch import fetch_metric_timeseries, fetch_bars, fetch_metrics, rate_limit_stats, gather, mark_missing, missing_assets, FetchUnavailableError
+from formulas.journal import install_journal, journal_position, journal_summary
 
 # API keys & Streamlit secrerts
 messari_api_key = messari_api_key = st.secrets["MESSARI_API_KEY"]# Insert your Messari API private key into a Streamlit secrets file 
@@ -24,6 +39,11 @@ messari = Messari(messari_api_key) # A paid subscription to Messari API is requi
 alpaca_api_key = st.secrets["ALPACA_API_KEY"]
 alpaca_secret_key = st.secrets["ALPACA_SECRET_KEY"]
 
+# Every upstream HTTP request is journaled; FETCH_JOURNAL=record also archives the responses and =replay serves them offline
+install_journal(os.getenv("FETCH_JOURNAL", "observe"), os.getenv("FETCH_ARCHIVE"))
+page_view = journal_position()
+reset_payload_sizes()
+
 # Application Page Configuration: Headers & Sidebar #
 
 st.set_option('deprecation.showPyplotGlobalUse', False)
@@ -32,7 +52,7 @@ st.title('Crypto Analytics App')
 st.markdown("""
 This app connects to crypto APIs and runs a series of models 
 to assess past performance and predict future price trends!
-* **Python libraries:** pandas, numpy, os, streamlit, messari.messari, financialanalysis, scikit-learn
+* **Python libraries:** pandas, numpy, os, streamlit, messari.messari, scikit-learn
 * **Data source:** [Messari.io](https://messari.io/api)
 * **Models:** linear regression, risk/return analysis, and statistical correlations
 * **Charts:** all charts are interactive and can be saved as images
@@ -58,6 +78,20 @@ start_date = pd.to_datetime("today") - pd.DateOffset(months=number_of_months)
 end_date = pd.to_datetime("today")
 
 
+# Each panel renders on its own: if its data failed to load it shows a warning and the rest of the page still renders
+@contextmanager
+def degraded_panel(panel):
+    try:
+        yield
+    except Exception as error:
+        st.warning(f"{panel} is unavailable right now ({type(error).__name__}: {error})")
+
+def loaded(data, description):
+    if data is None:
+        raise FetchUnavailableError(f"{description} did not load")
+    return data
+
+
 # Analytics Section 1: Function for Linear Regressions #
 
 st.markdown("""**Linear Regression Channel**""")
@@ -67,7 +101,7 @@ st.markdown("""Regression line of time and price with standard deviation channel
 def get_timeseries_data(asset, start, end):
 
     # API pull from Messari for timeseries price data
-    price_data = messari.get_metric_timeseries(asset_slugs=asset, asset_metric = "price", start=start, end=end)
+    price_data = fetch_metric_timeseries(messari, asset, "price", start, end)
     
     # Filters the data to capture the closing price only
     price_data = pd.DataFrame(price_data[asset]['close'])
@@ -81,30 +115,19 @@ def get_timeseries_data(asset, start, end):
     price_data.dropna(inplace=True)
     return price_data
 
-price_data = get_timeseries_data(selected_asset, start_date, end_date)
+price_data = None
+with degraded_panel(f"{selected_asset} price data"):
+    price_data = get_timeseries_data(selected_asset, start_date, end_date)
 
-def timeseries_linear_regression(price_data, start, end):
+def timeseries_linear_regression(price_data, start, end, projection=None, horizon=180):
     
-    price_data = price_data.round(2)
-
     sma200 = price_data["Price"].rolling(window=200).mean()
     sma50 = price_data["Price"].rolling(window=50).mean()
     
     std = price_data["Cumulative Returns"].std()
     
-    linear_regression_df = price_data
-    linear_regression_df.reset_index(inplace=True)
-    
-    # Utilizes financialanalysis (fa) module to build linear regression channels
-    X = linear_regression_df["Date"].to_list() # converts Series to list
-    X = fa.datetimeToFloatyear(X) # for example, 2020-07-01 becomes 2020.49589041
-    X = np.array(X) # converts list to a numpy array
-    X = X[::,None] # converts row vector to column vector (just column vector is acceptable)
-    y = linear_regression_df["Cumulative Returns"] # get y data (relative price)
-    y = y.values # converts Series to numpy
-    y = y[::,None] # row vector to column vector (just column vector is acceptable)
-    
-    slope, intercept, x, fittedline = fa.timeseriesLinearRegression(linear_regression_df["Date"], linear_regression_df["Cumulative Returns"])
+    # Linear regression of cumulative returns on time, measured in epoch days straight from the Date index
+    slope, intercept, fittedline = linear_trend(price_data.index, price_data["Cumulative Returns"].values)
 
     # Trendlines for standard deviation parallel channels
     fittedline_upper_1 = fittedline + std
@@ -112,43 +135,45 @@ def timeseries_linear_regression(price_data, start, end):
     fittedline_upper_2 = fittedline + (std*2)
     fittedline_lower_2 = fittedline - (std*2)
     
-    chart = make_subplots(specs=[[{"secondary_y" : True}]])
-    chart.add_trace(go.Scatter(x=linear_regression_df["Date"], y=linear_regression_df["Price"], name="Price", line_color="black"), secondary_y=True,)
-    #chart.add_trace(go.Scatter(x=linear_regression_df["Date"], y=linear_regression_df["Cumulative Returns"], line_color="white", showlegend=False, hoverinfo='none'), secondary_y=True,)
-    chart.add_trace(go.Scatter(x=linear_regression_df["Date"], y=fittedline, name="Prediction", line_color="lightslategray", hoverinfo='none'), secondary_y=False,)
-    chart.add_trace(go.Scatter(x=linear_regression_df["Date"], y=fittedline_lower_1, name="Standard Deviation", line_color="forestgreen", hoverinfo='none'), secondary_y=False,)
-    chart.add_trace(go.Scatter(x=linear_regression_df["Date"], y=fittedline_upper_1, line_color="forestgreen", showlegend=False, hoverinfo='none'), secondary_y=False,)
-    chart.add_trace(go.Scatter(x=linear_regression_df["Date"], y=fittedline_lower_2, name="2 Standard Deviations", line_color="rosybrown", hoverinfo='none'), secondary_y=False,)
-    chart.add_trace(go.Scatter(x=linear_regression_df["Date"], y=fittedline_upper_2, name="2 Standard Deviations", line_color="rosybrown", showlegend=False, hoverinfo='none'), secondary_y=False,)
-    chart.add_trace(go.Scatter(x=linear_regression_df["Date"], y=sma200, name="200-Day SMA", line_color="gray"), secondary_y=True,)
-    chart.add_trace(go.Scatter(x=linear_regression_df["Date"], y=sma50, name="50-Day SMA", line_color="lightgray"), secondary_y=True,)
-
-    chart.update_xaxes(title_text = "Date", showline=False)
-    chart.update_yaxes(title_text="Actual Price", range=[price_data["Price"].min() * .6, price_data["Price"].max() * 1.2], zeroline = True, tickformat = '$', showgrid=True, tick0 = 0, secondary_y=True)
-    chart.update_yaxes(showticklabels = False, range=[price_data["Cumulative Returns"].min() * .6, price_data["Cumulative Returns"].max()* 1.2], tick0 = 0, secondary_y=False)
-    chart.update_layout(template="simple_white")
-    chart.update_traces(marker_colorscale="Earth", selector=dict(type='scatter'))
-    chart.update_traces(fill="none")
-    chart.update_layout(legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="left", x=.01, font = dict(size = 10, color = "black")))
-    chart.update_layout(plot_bgcolor='white')
-    chart.update_layout(margin=dict(l=0, r=0, t=55))
-    chart.update_yaxes(nticks = 10, secondary_y=True)
-
-    return st.plotly_chart(chart)
-
-chart = timeseries_linear_regression(price_data, start_date, end_date)
+    # Full-resolution channel, sliced to the zoom window and decimated to the point budget before plotting
+    channel = pd.DataFrame({"Price": price_data["Price"].values, "Cumulative Returns": price_data["Cumulative Returns"].values,
+                            "Prediction": np.asarray(fittedline),
+                            "Lower 1": np.asarray(fittedline_lower_1), "Upper 1": np.asarray(fittedline_upper_1),
+                            "Lower 2": np.asarray(fittedline_lower_2), "Upper 2": np.asarray(fittedline_upper_2),
+                            "SMA 200": sma200.values, "SMA 50": sma50.values}, index=price_data.index)
+    channel = downsample_frame(channel, max_points=default_point_budget, column="Price", start=start, end=end)
+
+    # Layout and trace styling come from a template built once per process; only the arrays change per rerun
+    chart = regression_channel_figure(channel)
+
+    # Optional Monte Carlo percentile fan of future prices from the full-resolution history
+    if projection is not None:
+        chart = add_projection_fan(chart, project_prices(price_data["Price"], horizon=horizon, method=projection))
+
+    return render_plotly("Linear Regression Channel", chart)
+
+with degraded_panel("Linear Regression Channel"):
+    loaded(price_data, f"{selected_asset} price data")
+
+    # Zoom window over the selected period; the chart re-decimates the window so narrow ranges show every point
+    zoom_start, zoom_end = st.slider("Zoom", min_value=price_data.index[0].to_pydatetime(), max_value=price_data.index[-1].to_pydatetime(),
+                                     value=(price_data.index[0].to_pydatetime(), price_data.index[-1].to_pydatetime()), format="MM/DD/YY")
+    projection = st.selectbox("Projection", ["None"] + list(projection_methods))
+    horizon = st.slider("Projection Horizon (Days)", value=180, min_value=30, max_value=365) if projection != "None" else 180
+    chart = timeseries_linear_regression(price_data, zoom_start, zoom_end, projection_methods.get(projection), horizon)
 
 # Function to pull timeseries price data for assets
 # Feeds into functions that follow afterwards
 
-today = pd.to_datetime("today")
-one_year_ago = pd.to_datetime("today") - pd.DateOffset(years=1)
+# Calendar dates, not the current instant, so the cached per-asset pulls below are hit again on every rerun of the day
+today = pd.to_datetime("today").normalize()
+one_year_ago = today - pd.DateOffset(years=1)
 
 @st.cache
 def get_timeseries_data(asset, start, end):
 
     # API pull from Messari for timeseries price data
-    price_data = messari.get_metric_timeseries(asset_slugs=asset, asset_metric = "price", start=start, end=end)
+    price_data = fetch_metric_timeseries(messari, asset, "price", start, end)
     
     # Filters the data to capture the closing price only
     price_data = pd.DataFrame(price_data[asset]['close'])
@@ -165,50 +190,24 @@ def get_timeseries_data(asset, start, end):
 # Builds two DataFrames that combine data for all the assets
 # First DataFrame shows the close price data
 # Second DataFrame shows the cumulative returns data
-@st.cache
+# Not cached itself: each asset's pull is, and a partial matrix must not outlive the outage that caused it
 def load_crypto_prices(start_date, end_date):
-    
-    bitcoin_df = get_timeseries_data('Bitcoin', start_date, end_date)
-    ethereum_df = get_timeseries_data('Ethereum', start_date, end_date)
-    cardano_df = get_timeseries_data('Cardano', start_date, end_date)
-    solana_df = get_timeseries_data("Solana", start_date, end_date)
-    avalanche_df = get_timeseries_data('Avalanche', start_date, end_date)
-    polkadot_df = get_timeseries_data('Polkadot', start_date, end_date)
-    polygon_df = get_timeseries_data('Polygon', start_date, end_date)
-    cosmos_df = get_timeseries_data('Cosmos', start_date, end_date)
-    algorand_df = get_timeseries_data('Algorand', start_date, end_date)
-    near_df = get_timeseries_data('NEAR', start_date, end_date)
-    fantom_df = get_timeseries_data('Fantom', start_date, end_date)
-    mina_df = get_timeseries_data('Mina', start_date, end_date)
-    celo_df = get_timeseries_data('Celo', start_date, end_date)
-
-    crypto_returns = pd.concat([bitcoin_df["Bitcoin Cumulative Returns"], ethereum_df["Ethereum Cumulative Returns"],
-        cardano_df["Cardano Cumulative Returns"], solana_df["Solana Cumulative Returns"], 
-        avalanche_df["Avalanche Cumulative Returns"], polkadot_df["Polkadot Cumulative Returns"], polygon_df["Polygon Cumulative Returns"], 
-        cosmos_df["Cosmos Cumulative Returns"], algorand_df["Algorand Cumulative Returns"], near_df["NEAR Cumulative Returns"], 
-        fantom_df["Fantom Cumulative Returns"], mina_df["Mina Cumulative Returns"], celo_df["Celo Cumulative Returns"]], axis= "columns", join="inner")
-
-    crypto_prices = pd.concat([bitcoin_df["Bitcoin Price"], ethereum_df["Ethereum Price"],
-    cardano_df["Cardano Price"], solana_df["Solana Price"], 
-    avalanche_df["Avalanche Price"], polkadot_df["Polkadot Price"], polygon_df["Polygon Price"], 
-    cosmos_df["Cosmos Price"], algorand_df["Algorand Price"], near_df["NEAR Price"],
-    fantom_df["Fantom Price"], mina_df["Mina Price"], celo_df["Celo Price"]], axis= "columns", join="inner")
-
-    column_names = ["Bitcoin", "Ethereum", 
-                    "Celo", "Cardano",
-                    "Solana", "Avalanche", "Polkadot",
-                    "Polygon", "Cosmos",
-                    "Algorand", "NEAR", 
-                    "Fantom", "Mina"]
-
-    crypto_returns.columns = column_names
-    crypto_prices.columns = column_names
-    crypto_returns = crypto_returns.round(2)
-    crypto_prices = crypto_prices.round(2)
-
-    return crypto_returns, crypto_prices
-
-crypto_returns, crypto_prices = load_crypto_prices(one_year_ago, today)
+
+    start_date, end_date = pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize()
+    timeseries, missing = gather(cryptocurrencies, lambda asset: get_timeseries_data(asset, start_date, end_date))
+
+    # Outer join keeps each asset's full history; recently listed tokens hold NaN before their listing date
+    crypto_returns = align_timeseries([df[f"{asset} Cumulative Returns"] for asset, df in timeseries.items()], list(timeseries))
+    crypto_prices = align_timeseries([df[f"{asset} Price"] for asset, df in timeseries.items()], list(timeseries))
+
+    return mark_missing(crypto_returns, missing), mark_missing(crypto_prices, missing)
+
+crypto_returns = crypto_prices = None
+with degraded_panel("Crypto price matrix"):
+    crypto_returns, crypto_prices = load_crypto_prices(one_year_ago, today)
+    if missing_assets(crypto_prices):
+        st.warning("Left out of the multi-asset panels until their data loads: " +
+                   ", ".join(f"{asset} ({reason})" for asset, reason in missing_assets(crypto_prices).items()))
 
 # Function to transform the number_of_months input into number_of_days
 # "number_of_days" is used as the window to calculate the rolling correlations
@@ -225,67 +224,100 @@ number_of_days = number_of_days(number_of_months)
 
 # Analytics Section 2: Function for Token Statistics & Performance #
 
-risk_free_rate = .025 # necessary for Sortino/Sharpe Ratio calculations
-
 # Function to display summary statistics and financial ratios
-def get_token_statistics(asset, start, end, days):
-    
-    # API pull from Messari for timeseries price data
-    price_data = messari.get_metric_timeseries(asset_slugs=asset, asset_metric = "price", start=start, end=end)
+# Reuses the selected asset's price history and annualizes from the observation frequency
+def get_token_statistics(asset, price_data):
 
-    # Filters the data to capture the closing price only
-    price_data = pd.DataFrame(price_data[asset]['close'])
-    price_data = price_data.rename(columns={"close" : asset})
-    price_data.index.names = ['Date']
-    price_data = price_data
-    
-    # Calculates average daily returns and cumulative returns of the asset
-    daily_returns = pd.DataFrame(price_data.pct_change().dropna())
-    cumulative_returns = pd.DataFrame((1 + daily_returns).cumprod())
-    total_return = cumulative_returns.iloc[-1]
-    peak = cumulative_returns.expanding(min_periods=1).max()
-    ath = peak.max()
-
-    # Calculates annualized returns / standard deviation, the variance, and max drawdown
-    standard_deviation = daily_returns.std() * np.sqrt(days)
-    max_drawdown = (cumulative_returns/peak-1).min()
-    negative_standard_deviation = daily_returns[daily_returns<0].std() * np.sqrt(days)
-
-    # Calculates the Sharpe, Sortino, & Calmar Ratios. Negative Annualized Standard Deviation is used for Sortino Ratio
-    sharpe_ratio = (total_return - risk_free_rate) / standard_deviation
-    sortino_ratio = (total_return - risk_free_rate) / negative_standard_deviation
-    calmar_ratio = (total_return - risk_free_rate) / (abs(max_drawdown))
-
-    # Combines three metrics into a single DataFrame
-    alist = []
-    alist.append(calmar_ratio)
-    alist.append(sortino_ratio)
-    alist.append(sharpe_ratio)
-    alist.append(max_drawdown)
-    alist.append(ath)
-    alist.append(standard_deviation)
-    alist.append(total_return)
-    token_statistics = pd.DataFrame(alist).T
-    token_statistics.columns = ["Calmar Ratio", "Sortino Ratio", "Sharpe Ratio", "Max Drawdown", "Peak", "Volatity", "Return"]
-    token_statistics = token_statistics.round(2)
+    metrics = risk_metrics(price_data[["Price"]].rename(columns={"Price": asset})).iloc[0]
+    metrics["Return"] = 1 + metrics["Total Return"]
+    metrics = metrics.rename({"Annual Volatility": "Volatity"})
 
+    token_statistics = pd.DataFrame([metrics[["Calmar Ratio", "Sortino Ratio", "Sharpe Ratio", "Max Drawdown", "Peak", "Volatity", "Return"]]])
     return token_statistics
 
-bar_chart = get_token_statistics(selected_asset, start_date, end_date, number_of_days).hvplot.bar(color="black", hover_color="green", rot=45)
+with degraded_panel("Financial Ratios & Statistics"):
+    statistics_chart = bar_chart(get_token_statistics(selected_asset, loaded(price_data, f"{selected_asset} price data")), color="black", hover_color="green", rot=45)
+
+    st.markdown("""**Financial Ratios & Statistics**""")
+    st.markdown("""Risk/return metrics and performance ratios over selected time period.""")
+
+    render_bokeh("Financial Ratios & Statistics", statistics_chart)
+
+
+# Drawdown analytics for every asset in one pass, cached until the price matrix is refreshed
+@st.cache
+def load_drawdown_analytics(crypto_prices):
+    return drawdown_analytics(crypto_prices, top_n=5)
+
+with degraded_panel("Peak-to-Trough Drawdowns"):
+    drawdowns, drawdown_summary, drawdown_episodes = load_drawdown_analytics(loaded(crypto_prices, "The crypto price matrix"))
+
+    drawdown_chart = go.Figure(go.Scatter(x=drawdowns.index, y=drawdowns[selected_asset], fill="tozeroy", line_color="firebrick", name="Drawdown"))
+    drawdown_chart.update_yaxes(title_text="Drawdown from Peak", tickformat=".0%")
+    drawdown_chart.update_layout(template="simple_white", margin=dict(l=0, r=0, t=25))
+
+    st.markdown("""**Peak-to-Trough Drawdowns**""")
+    st.markdown("""Drawdown from the running peak over the last 12 months and the largest drawdown episodes.""")
+    render_plotly("Peak-to-Trough Drawdowns", drawdown_chart)
+    st.dataframe(format_table(drawdown_episodes[drawdown_episodes.index.get_level_values("Asset") == selected_asset], percent_columns=["Drawdown"]))
+
+# Rolling volatility, Sharpe, Sortino and beta to Bitcoin for every asset, cached until the price matrix is refreshed
+@st.cache
+def load_rolling_metrics(crypto_prices):
+    return rolling_risk_metrics(crypto_prices, windows=(30, 90, 180), benchmark="Bitcoin")
+
+with degraded_panel("Rolling Risk Metrics"):
+    rolling_metrics = load_rolling_metrics(loaded(crypto_prices, "The crypto price matrix"))
+    selected_metric = st.selectbox("Rolling Metric", ["Sharpe Ratio", "Sortino Ratio", "Annual Volatility", "Beta"])
 
-st.markdown("""**Financial Ratios & Statistics**""")
-st.markdown("""Risk/return metrics and performance ratios over selected time period.""")
+    rolling_chart = go.Figure()
+    for window, line_color in zip(rolling_metrics, ["lightgray", "gray", "black"]):
+        rolling_chart.add_trace(go.Scatter(x=rolling_metrics[window][selected_metric].index, y=rolling_metrics[window][selected_metric][selected_asset], name=f"{window}-Day", line_color=line_color))
+    rolling_chart.update_layout(template="simple_white", margin=dict(l=0, r=0, t=25), legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="left", x=.01))
+
+    st.markdown("""**Rolling Risk Metrics**""")
+    st.markdown("""Rolling ratios over 30, 90 and 180-day windows for the last 12 months (beta is measured against Bitcoin).""")
+    render_plotly("Rolling Risk Metrics", rolling_chart)
+
+
+# Annualized Ledoit-Wolf covariance and expected returns over the last 12 months, estimated once per price refresh
+@st.cache
+def load_covariance(crypto_prices):
+    return covariance_matrix(crypto_prices, days=365)
+
+with degraded_panel("Portfolio Optimizer"):
+    covariance, expected_returns, shrinkage = load_covariance(loaded(crypto_prices, "The crypto price matrix"))
+
+    st.markdown("""**Portfolio Optimizer**""")
+    st.markdown("""Long-only minimum-variance, maximum-Sharpe and risk-parity weights on the efficient frontier of the last 12 months.""")
+
+    max_weight = st.slider("Maximum Weight per Asset", value=.35, min_value=.2, max_value=1., step=.05)
+    optimal_weights = pd.concat([minimum_variance_weights(covariance, max_weight),
+                                 maximum_sharpe_weights(covariance, expected_returns, load_risk_free_rate(crypto_prices.index).iloc[-1], max_weight),
+                                 risk_parity_weights(covariance)], axis="columns")
+    frontier, _ = efficient_frontier(covariance, expected_returns, n_points=25, max_weight=max_weight)
+
+    frontier_chart = go.Figure(go.Scatter(x=frontier["Volatility"], y=frontier["Expected Return"], name="Efficient Frontier", line_color="black"))
+    for portfolio, marker_color in zip(optimal_weights.columns, ["forestgreen", "firebrick", "steelblue"]):
+        weights = optimal_weights[portfolio].values
+        frontier_chart.add_trace(go.Scatter(x=[np.sqrt(weights @ covariance.values @ weights)], y=[weights @ expected_returns.values],
+                                            mode="markers", marker=dict(size=12, color=marker_color), name=portfolio))
+    frontier_chart.update_xaxes(title_text="Annual Volatility", tickformat=".0%")
+    frontier_chart.update_yaxes(title_text="Expected Return", tickformat=".0%")
+    frontier_chart.update_layout(template="simple_white", margin=dict(l=0, r=0, t=25), legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="left", x=.01))
+
+    render_plotly("Portfolio Optimizer", frontier_chart)
+    st.dataframe(format_table(optimal_weights, percent_columns=list(optimal_weights.columns)))
+    st.caption(f"Covariance shrinkage intensity: {format_percent(shrinkage)}")
 
-st.bokeh_chart(hv.render(bar_chart, backend="bokeh"))
 
 # Function to calculate the asset correlations
 def crypto_correlations(asset, days):
     
-    correlations = crypto_returns.tail(int(days)).corr() * crypto_returns.tail(int(days)).corr()
+    # Pairwise-complete correlations over the last N calendar days
+    correlations = pairwise_correlations(trailing_window(loaded(crypto_returns, "The crypto return matrix"), days)) ** 2
     correlation_asset = correlations[f"{asset}"]
     correlation_asset = correlation_asset.drop(columns={asset})
-    
-    correlation_asset = correlation_asset.round(2)
 
     correlation_asset = correlation_asset.sort_values(ascending=True)
     
@@ -293,57 +325,115 @@ def crypto_correlations(asset, days):
 
 
 # Correlations heatmap
-correlations = crypto_correlations(selected_asset, number_of_days)
-correlations_plot = correlations.hvplot.heatmap(cmap="Greys", rot=45, xaxis=None)
+with degraded_panel("Asset Correlations"):
+    correlations = crypto_correlations(selected_asset, number_of_days)
+    correlations_plot = heatmap(correlations, rot=45, xaxis=False)
+
+    st.markdown("""**Asset Correlations**""")
+    st.markdown("""Price correlation with other assets over the last 12 months.""")
+    st.latex("(r^2)")
+    render_bokeh("Asset Correlations", correlations_plot)
+
+
+# Full correlation matrix in dendrogram order; the linkage is cached per window and price refresh, so views only reorder and cut it
+with degraded_panel("Correlation Clusters"):
+    clustered_correlations = ordered_correlations(loaded(crypto_prices, "The crypto price matrix"), number_of_days)
+    # The slider needs at least two cluster counts to choose from; smaller universes use every asset as its own cluster
+    n_assets = len(clustered_correlations)
+    if n_assets > 2:
+        n_clusters = st.slider("Correlation Clusters", value=min(4, n_assets), min_value=2, max_value=n_assets)
+    else:
+        n_clusters = max(n_assets, 1)
+    membership = cluster_membership(crypto_prices, number_of_days, n_clusters)
 
-st.markdown("""**Asset Correlations**""")
-st.markdown("""Price correlation with other assets over the last 12 months.""")
-st.latex("(r^2)")
-st.bokeh_chart(hv.render(correlations_plot, backend="bokeh"))
+    st.markdown("""**Correlation Clusters**""")
+    st.markdown("""Correlations of daily returns over the selected period, ordered by hierarchical clustering so correlated groups form blocks.""")
+    st.latex("(r^2)")
+    render_bokeh("Correlation Clusters", heatmap(clustered_correlations, rot=45, height=600, low=0, high=1))
+    st.dataframe(membership.groupby(membership).apply(lambda cluster: ", ".join(cluster.index)).rename("Assets"))
 
 
 # Calculating correlations with SPY, QQQ, ARKK over time period selected by user
 alpaca = tradeapi.REST(alpaca_api_key, alpaca_secret_key, api_version="v3")
 
-start = start_date.strftime("%Y-%m-%d")
-today = end_date.strftime("%Y-%m-%d")
 tickers = ["SPY", "QQQ", "ARKK"]
 timeframe = "1D"
 
-indices_df = alpaca.get_bars(tickers, timeframe, start = start, end = today ).df
-
-spy_df = indices_df[indices_df['symbol']=='SPY'].drop('symbol', axis=1)
-spy_df = pd.DataFrame(spy_df["close"])
-spy_df = spy_df.rename(columns={"close": "SPY"})
-
-qqq_df = indices_df[indices_df['symbol']=='QQQ'].drop('symbol', axis=1)
-qqq_df = pd.DataFrame(qqq_df["close"])
-qqq_df = qqq_df.rename(columns={"close": "QQQ"})
-
-arkk_df = indices_df[indices_df['symbol']=='ARKK'].drop('symbol', axis=1)
-arkk_df = pd.DataFrame(arkk_df["close"])
-arkk_df = arkk_df.rename(columns={"close": "ARKK"})
-
-stock_prices = pd.concat([spy_df, qqq_df , arkk_df],axis="columns", join="inner")
-stock_prices.reset_index(inplace=True)
-stock_prices = stock_prices.rename(columns={"timestamp": "Date"})
-stock_prices["Date"] = stock_prices["Date"].dt.strftime('%Y-%m-%d')
-stock_prices["Date"] = pd.to_datetime(stock_prices["Date"], infer_datetime_format=True)
-stock_prices = stock_prices.set_index("Date")
-
-daily_returns = stock_prices.pct_change().dropna()
-cumulative_returns = (1 + daily_returns).cumprod()
-
-spy_correlation = price_data["Cumulative Returns"].corr(cumulative_returns["SPY"]) * price_data["Cumulative Returns"].corr(cumulative_returns["SPY"]).round(2)
-spy_correlation = spy_correlation.round(2)
-qqq_correlation = price_data["Cumulative Returns"].corr(cumulative_returns["QQQ"]) * price_data["Cumulative Returns"].corr(cumulative_returns["QQQ"]).round(2)
-qqq_correlation = qqq_correlation.round(2)
-arkk_correlation = price_data["Cumulative Returns"].corr(cumulative_returns["ARKK"]) * price_data["Cumulative Returns"].corr(cumulative_returns["ARKK"]).round(2)
-arkk_correlation = arkk_correlation.round(2)
-
-st.sidebar.header('Stock Market Correlation')
-st.sidebar.caption("Correlation with market indices over time period.")
-#col1, col2, col3 = st.columns(3) # code to move indice correlation into main body of application
-st.sidebar.metric("S&P 500 (SPY)", spy_correlation, delta_color="off")
-st.sidebar.metric("NASDAQ (QQQ)", qqq_correlation, delta_color="off")
-st.sidebar.metric("Ark Innovation Fund (ARKK)", arkk_correlation, delta_color="off")
+stock_prices = None
+with degraded_panel("Stock Market Correlation"):
+    indices_df = fetch_bars(alpaca, tickers, timeframe, start_date, end_date)
+
+    spy_df = indices_df[indices_df['symbol']=='SPY'].drop('symbol', axis=1)
+    spy_df = pd.DataFrame(spy_df["close"])
+    spy_df = spy_df.rename(columns={"close": "SPY"})
+
+    qqq_df = indices_df[indices_df['symbol']=='QQQ'].drop('symbol', axis=1)
+    qqq_df = pd.DataFrame(qqq_df["close"])
+    qqq_df = qqq_df.rename(columns={"close": "QQQ"})
+
+    arkk_df = indices_df[indices_df['symbol']=='ARKK'].drop('symbol', axis=1)
+    arkk_df = pd.DataFrame(arkk_df["close"])
+    arkk_df = arkk_df.rename(columns={"close": "ARKK"})
+
+    stock_prices = pd.concat([spy_df, qqq_df , arkk_df],axis="columns", join="inner")
+    # Bar timestamps become calendar dates directly, matching the crypto Date index
+    stock_prices.index = normalize_dates(stock_prices.index, name="Date")
+
+    # r^2 of returns on exchange sessions, weekend crypto moves compounded into Monday; rounding happens only when displayed
+    loaded(price_data, f"{selected_asset} price data")
+    correlations = benchmark_correlations(price_data["Price"], stock_prices).iloc[0] ** 2
+    spy_correlation = correlations["SPY"]
+    qqq_correlation = correlations["QQQ"]
+    arkk_correlation = correlations["ARKK"]
+
+    st.sidebar.header('Stock Market Correlation')
+    st.sidebar.caption("Correlation (r²) of daily returns with market indices over time period, weekends compounded into the next session.")
+    #col1, col2, col3 = st.columns(3) # code to move indice correlation into main body of application
+    st.sidebar.metric("S&P 500 (SPY)", format_number(spy_correlation), delta_color="off")
+    st.sidebar.metric("NASDAQ (QQQ)", format_number(qqq_correlation), delta_color="off")
+    st.sidebar.metric("Ark Innovation Fund (ARKK)", format_number(arkk_correlation), delta_color="off")
+
+# Screener over the whole universe: the pipeline's precomputed table when there is one, else this page's price matrix
+@st.cache(allow_output_mutation=True)
+def build_screener(crypto_prices, stock_prices):
+    benchmark = stock_prices[["SPY"]] if stock_prices is not None else None
+    return Screener(screener_metrics(crypto_prices, benchmark, reference="Bitcoin"))
+
+with degraded_panel("Screener"):
+    screener = load_screener()
+    if screener is None:
+        screener = build_screener(loaded(crypto_prices, "The crypto price matrix"), stock_prices)
+
+    st.sidebar.header('Screener')
+    st.sidebar.caption("Filter and rank every asset by its precomputed return, risk and correlation metrics.")
+    sort_by = st.sidebar.selectbox("Sort by", screener.metrics, index=screener.metrics.index("Return 30D"))
+    ascending = st.sidebar.radio("Order", ["Highest first", "Lowest first"]) == "Lowest first"
+    filter_column = st.sidebar.selectbox("Filter on", ["None"] + screener.metrics)
+    filters = {}
+    low, high = screener.value_range(filter_column) if filter_column != "None" else (np.nan, np.nan)
+    if not np.isnan(low) and low < high:
+        filters[filter_column] = st.sidebar.slider(f"{filter_column} range", float(low), float(high), (float(low), float(high)))
+    top_n = st.sidebar.number_input("Top N", value=10, min_value=1, max_value=max(len(screener), 1))
+
+    screened = screener.query(filters, sort_by, ascending, top_n)
+    st.sidebar.dataframe(format_table(screened, percent_columns=percent_metrics))
+
+# Upstream calls made and identical concurrent requests coalesced, across every session of this server process
+with st.expander("Fetch Metrics"):
+    st.dataframe(fetch_metrics())
+    # Token-bucket pacing per provider: page requests (interactive) are served before refreshes (background)
+    st.dataframe(rate_limit_stats())
+    # Requests, bytes and latency on the wire since this rerun started (other sessions' requests in the meantime included)
+    st.dataframe(journal_summary(since=page_view))
+
+# Bytes each chart panel sent to the browser on this rerun, only measured while the checkbox is ticked
+with st.expander("Chart Payloads"):
+    if st.checkbox("Measure chart payloads", key="measure_payloads"):
+        st.dataframe(pd.DataFrame(payload_sizes()).T)
+
+# Pre-rendered report images from the latest data refresh (python -m formulas.render_cache and formulas.regression_report)
+report = load_report()
+if report:
+    with st.expander("Static Report"):
+        for name, path in report.items():
+            st.image(str(path), caption=name.replace("_", " ").title())
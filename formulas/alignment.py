@@ -0,0 +1,118 @@
+"""Functions to Align Crypto Timeseries that Start on Different Listing Dates"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+
+
+"""Alignment Function to outer-join per-asset series so each asset keeps its full history"""
+
+def align_timeseries(series, labels=None):
+
+    # Outer join on the date index; assets that were not listed yet hold NaN instead of truncating the others
+    aligned = pd.concat(list(series), axis="columns", join="outer", sort=True)
+    if labels is not None:
+        aligned.columns = list(labels)
+    aligned.index.names = ["Date"]
+
+    return aligned
+
+
+def listing_dates(aligned):
+
+    # First and last dates on which each asset has an observation
+    valid = aligned.notna().values
+    has_data = valid.any(axis=0)
+    first = np.where(has_data, valid.argmax(axis=0), 0)
+    last = np.where(has_data, len(valid) - 1 - valid[::-1].argmax(axis=0), 0)
+
+    listings = pd.DataFrame({"Listed": aligned.index[first], "Last Observation": aligned.index[last],
+                             "Observations": valid.sum(axis=0)}, index=aligned.columns)
+    listings.loc[~has_data, ["Listed", "Last Observation"]] = pd.NaT
+
+    return listings
+
+
+"""Trailing Window Function to select the last N calendar days instead of the last N rows"""
+
+def trailing_window(aligned, days):
+
+    # Row counts drift away from calendar days once any asset has gaps, so the window is cut by date
+    if len(aligned) == 0:
+        return aligned
+    cutoff = aligned.index[-1] - pd.Timedelta(days=int(days) - 1)
+    start = aligned.index.searchsorted(cutoff, side="left")
+
+    return aligned.iloc[start:]
+
+
+"""Masked Moments Functions that skip missing observations without copying the matrix per asset or pair"""
+
+def masked_moments(aligned):
+
+    # Observation count, mean and sample variance for every column in one pass
+    values = aligned.values.astype(float)
+    mask = ~np.isnan(values)
+    filled = np.where(mask, values, 0.0)
+
+    count = mask.sum(axis=0)
+    mean = filled.sum(axis=0) / np.maximum(count, 1)
+    centered = np.where(mask, values - mean, 0.0)
+    variance = (centered ** 2).sum(axis=0) / np.maximum(count - 1, 1)
+
+    moments = pd.DataFrame({"Observations": count, "Mean": mean, "Variance": variance}, index=aligned.columns)
+    moments.loc[count < 2, "Variance"] = np.nan
+
+    return moments
+
+
+def pairwise_correlations(aligned, min_periods=2):
+
+    values = aligned.values.astype(float)
+    mask = ~np.isnan(values)
+    weights = mask.astype(float)
+
+    # Centering on each column's own mean keeps the sums of squares well conditioned
+    column_mean = np.where(mask, values, 0.0).sum(axis=0) / np.maximum(mask.sum(axis=0), 1)
+    centered = np.where(mask, values - column_mean, 0.0)
+
+    # Sums over the rows where both assets in a pair are observed, for every pair at once
+    n = weights.T @ weights
+    sum_x = centered.T @ weights
+    sum_xx = (centered ** 2).T @ weights
+    sum_xy = centered.T @ centered
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = sum_xy - sum_x * sum_x.T / n
+        variance_x = sum_xx - sum_x ** 2 / n
+        correlations = covariance / np.sqrt(variance_x * variance_x.T)
+
+    correlations[n < max(min_periods, 2)] = np.nan
+    correlations = np.clip(correlations, -1, 1)
+
+    return pd.DataFrame(correlations, index=aligned.columns, columns=aligned.columns)
+
+
+def cross_correlations(left, right, min_periods=2):
+
+    # Pairwise-complete correlations of every left column with every right column on a shared index, without the full N x N matrix
+    x, y = left.values.astype(float), right.values.astype(float)
+    mask_x, mask_y = ~np.isnan(x), ~np.isnan(y)
+    weights_x, weights_y = mask_x.astype(float), mask_y.astype(float)
+    centered_x = np.where(mask_x, x - np.where(mask_x, x, 0.0).sum(axis=0) / np.maximum(mask_x.sum(axis=0), 1), 0.0)
+    centered_y = np.where(mask_y, y - np.where(mask_y, y, 0.0).sum(axis=0) / np.maximum(mask_y.sum(axis=0), 1), 0.0)
+
+    # Sums over the rows where both series in a pair are observed
+    n = weights_x.T @ weights_y
+    sum_x, sum_y = centered_x.T @ weights_y, weights_x.T @ centered_y
+    sum_xx, sum_yy = (centered_x ** 2).T @ weights_y, weights_x.T @ (centered_y ** 2)
+    sum_xy = centered_x.T @ centered_y
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = sum_xy - sum_x * sum_y / n
+        correlations = covariance / np.sqrt((sum_xx - sum_x ** 2 / n) * (sum_yy - sum_y ** 2 / n))
+
+    correlations[n < max(min_periods, 2)] = np.nan
+    correlations = np.clip(correlations, -1, 1)
+
+    return pd.DataFrame(correlations, index=left.columns, columns=right.columns)
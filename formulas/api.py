@@ -4,7 +4,6 @@
 import pandas as pd
 import numpy as np
 from messari.messari import Messari
-import financialanalysis as fa
 import matplotlib.pyplot as plt
 from pathlib import Path
 from dotenv import load_dotenv
@@ -12,14 +11,16 @@ import os
 import json
 import requests
 import sys
+from formulas.risk import risk_metrics
+from formulas.fetch import fetch_metric_timeseries
+from formulas.dates import linear_trend
 
 load_dotenv()
 
 messari_api_key = os.getenv("MESSARI_API_KEY")
 messari = Messari(messari_api_key)
 
-# Update the Risk-Free Rate using the 10-Year US Treasury Yield
-risk_free_rate = .02
+# The Risk-Free Rate is the 10-Year US Treasury Yield curve stored in data/ (see formulas/risk.py)
 
 
 
@@ -28,7 +29,7 @@ risk_free_rate = .02
 def get_timeseries_data(asset, start, end):
 
     # API pull from Messari for timeseries price data
-    price_data = messari.get_metric_timeseries(asset_slugs=asset, asset_metric = "price", start=start, end=end)
+    price_data = fetch_metric_timeseries(messari, asset, "price", start, end)
     
     # Filters the data to capture the closing price only
     price_data = pd.DataFrame(price_data[asset]['close'])
@@ -48,7 +49,7 @@ def get_timeseries_data(asset, start, end):
 def get_rolling_averages(asset, start, end):
 
     # API pull from Messari for timeseries price data
-    price_data = messari.get_metric_timeseries(asset_slugs=asset, asset_metric = "price", start=start, end=end)
+    price_data = fetch_metric_timeseries(messari, asset, "price", start, end)
     
     # Filters the data to capture the closing price only
     price_data = pd.DataFrame(price_data[asset]['close'])
@@ -71,7 +72,7 @@ def get_rolling_averages(asset, start, end):
 def get_cumulative_returns(asset, start, end):
     
     # API pull from Messari for timeseries price data
-    price_data = messari.get_metric_timeseries(asset_slugs=asset, asset_metric = "price", start=start, end=end)
+    price_data = fetch_metric_timeseries(messari, asset, "price", start, end)
     
     # Filters the data to capture the closing price only
     price_data = pd.DataFrame(price_data[asset]['close'])
@@ -93,7 +94,7 @@ def get_cumulative_returns(asset, start, end):
 def get_daily_returns(asset, start, end):
     
     # API pull from Messari for timeseries price data
-    daily_returns = messari.get_metric_timeseries(asset_slugs=asset, asset_metric = "price", start=start, end=end)
+    daily_returns = fetch_metric_timeseries(messari, asset, "price", start, end)
 
     # Filters the data to capture the closing price only
     daily_returns = pd.DataFrame(daily_returns[asset]['close'])
@@ -112,8 +113,8 @@ def get_daily_returns(asset, start, end):
 def get_mvrv (asset, start, end):
     
     # API pull from Messari for timeseries price data
-    mcap_circulating_df = messari.get_metric_timeseries(asset_slugs=asset, asset_metric = "mcap.circ", start=start, end=end)
-    mcap_realized_df = messari.get_metric_timeseries(asset_slugs=asset, asset_metric = "mcap.realized", start=start, end=end)
+    mcap_circulating_df = fetch_metric_timeseries(messari, asset, "mcap.circ", start, end)
+    mcap_realized_df = fetch_metric_timeseries(messari, asset, "mcap.realized", start, end)
 
     # Combines data and calculates MVRV Ratio
     mvrv = pd.concat([mcap_circulating_df, mcap_realized_df], axis = "columns", join ="outer")
@@ -127,7 +128,7 @@ def get_mvrv (asset, start, end):
 def get_market_cap (asset, start, end):
     
     # API pull from Messari for timeseries price data
-    mcap_circulating_df = messari.get_metric_timeseries(asset_slugs=asset, asset_metric = "mcap.circ", start=start, end=end)
+    mcap_circulating_df = fetch_metric_timeseries(messari, asset, "mcap.circ", start, end)
     mcap_circulating_df.columns = [f"{asset} Market Cap"]
 
     return mcap_circulating_df    
@@ -135,7 +136,7 @@ def get_market_cap (asset, start, end):
 def get_token_statistics(asset, start, end):
     
     # API pull from Messari for timeseries price data
-    price_data = messari.get_metric_timeseries(asset_slugs=asset, asset_metric = "price", start=start, end=end)
+    price_data = fetch_metric_timeseries(messari, asset, "price", start, end)
 
     # Filters the data to capture the closing price only
     price_data = pd.DataFrame(price_data[asset]['close'])
@@ -143,35 +144,12 @@ def get_token_statistics(asset, start, end):
     price_data.index.names = ['Date']
     price_data = price_data.tail(365)
     
-    # Calculates average daily returns and cumulative returns of the asset
-    daily_returns = pd.DataFrame(price_data.pct_change().dropna())
-    cumulative_returns = pd.DataFrame((1 + daily_returns).cumprod())
-    total_return = cumulative_returns.iloc[-1]
-    peak = cumulative_returns.expanding(min_periods=1).max()
-    ath = peak.max()
-
-    # Calculates annualized returns / standard deviation, the variance, and max drawdown
-    standard_deviation = daily_returns.std() * np.sqrt(365)
-    max_drawdown = (cumulative_returns/peak-1).min()
-    negative_standard_deviation = daily_returns[daily_returns<0].std() * np.sqrt(365)
-
-    # Calculates the Sharpe, Sortino, & Calmar Ratios. Negative Annualized Standard Deviation is used for Sortino Ratio
-    sharpe_ratio = (total_return - risk_free_rate) / standard_deviation
-    sortino_ratio = (total_return - risk_free_rate) / negative_standard_deviation
-    calmar_ratio = (total_return - risk_free_rate) / (abs(max_drawdown))
-
-    # Combines three metrics into a single DataFrame
-    alist = []
-    alist.append(total_return)
-    alist.append(standard_deviation)
-    alist.append(max_drawdown)
-    alist.append(ath)
-    alist.append(sharpe_ratio)
-    alist.append(sortino_ratio)
-    alist.append(calmar_ratio)
-    token_statistics = pd.DataFrame(alist).T
-    token_statistics.columns = ["Price Change", "Annual Volatility", "Max Drawdown", "Peak", "Sharpe Ratio", "Sortino Ratio", "Calmar Ratio"]
-    token_statistics = token_statistics.round(2)
+    # Annualized ratios over the observed frequency against the daily risk-free curve
+    metrics = risk_metrics(price_data)
+
+    # "Price Change" keeps its growth-multiple meaning from the data/ snapshots
+    metrics["Price Change"] = 1 + metrics["Total Return"]
+    token_statistics = metrics[["Price Change", "Annual Volatility", "Max Drawdown", "Peak", "Sharpe Ratio", "Sortino Ratio", "Calmar Ratio"]]
 
     return token_statistics
 
@@ -180,7 +158,7 @@ def get_token_statistics(asset, start, end):
 def get_cumulative_returns(asset, start, end):
     
     # API pull from Messari for timeseries price data
-    price_data = messari.get_metric_timeseries(asset_slugs=asset, asset_metric = "price", start=start, end=end)
+    price_data = fetch_metric_timeseries(messari, asset, "price", start, end)
     
     # Filters the data to capture the closing price only
     price_data = pd.DataFrame(price_data[asset]['close'])
@@ -200,7 +178,7 @@ def get_cumulative_returns(asset, start, end):
 def timeseries_linear_regression(asset, start, end):
     
     # API pull from Messari for timeseries price data
-    price_data = messari.get_metric_timeseries(asset_slugs=asset, asset_metric = "price", start=start, end=end)
+    price_data = fetch_metric_timeseries(messari, asset, "price", start, end)
     
     # Filters the data to capture the closing price only
     price_data = pd.DataFrame(price_data[asset]['close'])
@@ -221,15 +199,8 @@ def timeseries_linear_regression(asset, start, end):
     linear_regression_df = price_data
     linear_regression_df.reset_index(inplace=True)
     
-    X = linear_regression_df["Date"].to_list() # convert Series to list
-    X = fa.datetimeToFloatyear(X) # for example, 2020-07-01 becomes 2020.49589041
-    X = np.array(X) # convert list to a numpy array
-    X = X[::,None] # convert row vector to column vector (just column vector is acceptable)
-    y = linear_regression_df[asset] # get y data (relative price)
-    y = y.values # convert Series to numpy
-    y = y[::,None] # row vector to column vector (just column vector is acceptable)
-    
-    slope, intercept, x, fittedline = fa.timeseriesLinearRegression(linear_regression_df["Date"], linear_regression_df[asset])
+    # Regression on days since the first date, straight from the Date column
+    slope, intercept, fittedline = linear_trend(linear_regression_df["Date"], linear_regression_df[asset])
 
     
     fittedline_upper_1 = fittedline + std
@@ -0,0 +1,104 @@
+"""Functions to Store the data/ Tables as Typed, Compressed Parquet Artifacts with a Schema and Date Range"""
+
+# Required libraries and dependencies
+import argparse
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+artifact_format = 1
+artifact_compression = "zstd"
+
+# Where the pipeline keeps its tables and the manifest of the latest artifacts, shared by the pipeline and its readers
+data_path = Path(__file__).resolve().parents[1] / "data"
+pipeline_manifest = "pipeline.json"
+
+
+def _epoch_milliseconds(dates):
+
+    # Dates are stored as int64 milliseconds since the epoch (UTC), so loading never re-parses strings
+    dates = pd.DatetimeIndex(dates)
+    dates = dates.tz_convert(None) if dates.tz is not None else dates
+    return dates.values.astype("datetime64[ms]").astype(np.int64)
+
+
+"""Artifact Write Function to turn a DataFrame into a Parquet file with its own schema metadata"""
+
+def write_artifact(table, path, float_dtype="float64"):
+
+    index_name = table.index.name or "index"
+    is_dated = isinstance(table.index, pd.DatetimeIndex)
+
+    # A date index becomes an int64 column; label indexes (Metric, Token) stay strings
+    index = pa.array(_epoch_milliseconds(table.index), type=pa.int64()) if is_dated else pa.array([str(label) for label in table.index])
+    arrays = [index] + [pa.array(table[column].values.astype(float_dtype)) for column in table.columns]
+    names = [index_name] + [str(column) for column in table.columns]
+
+    metadata = {"format": str(artifact_format), "index": index_name, "index_kind": "date" if is_dated else "label",
+                "rows": str(len(table)), "float_dtype": float_dtype}
+    if is_dated and table.index.tz is not None:
+        metadata["timezone"] = str(table.index.tz)
+    if is_dated and len(table):
+        metadata["start"] = str(table.index.min().date())
+        metadata["end"] = str(table.index.max().date())
+
+    arrow_table = pa.Table.from_arrays(arrays, names=names).replace_schema_metadata(metadata)
+    pq.write_table(arrow_table, str(path), compression=artifact_compression)
+
+    return artifact_manifest(path)
+
+
+"""Artifact Read Functions for whole tables, a subset of columns, or a date range"""
+
+def artifact_manifest(path):
+
+    # Read from the Parquet footer alone: schema, covered date range and row count
+    schema = pq.read_schema(str(path))
+    metadata = {key.decode(): value.decode() for key, value in (schema.metadata or {}).items() if not key.startswith(b"pandas")}
+    columns = [name for name in schema.names if name != metadata.get("index")]
+    return dict(metadata, file=Path(path).name, columns=columns,
+                dtypes={field.name: str(field.type) for field in schema if field.name != metadata.get("index")})
+
+
+def read_artifact(path, columns=None, start=None, end=None):
+
+    manifest = artifact_manifest(path)
+    index_name = manifest["index"]
+    is_dated = manifest["index_kind"] == "date"
+
+    # Only the requested column chunks are read; a date range is pushed down as a row-group filter
+    filters = []
+    if is_dated and start is not None:
+        filters.append((index_name, ">=", int(_epoch_milliseconds([pd.to_datetime(start)])[0])))
+    if is_dated and end is not None:
+        filters.append((index_name, "<=", int(_epoch_milliseconds([pd.to_datetime(end)])[0])))
+    selected = None if columns is None else [index_name] + list(columns)
+    arrow_table = pq.read_table(str(path), columns=selected, filters=filters or None)
+
+    index = arrow_table.column(index_name).to_numpy()
+    if is_dated:
+        index = pd.DatetimeIndex(pd.to_datetime(index, unit="ms"), name=index_name)
+        index = index.tz_localize("UTC").tz_convert(manifest["timezone"]) if "timezone" in manifest else index
+    else:
+        index = pd.Index(index, name=index_name)
+    data = {name: arrow_table.column(name).to_numpy() for name in arrow_table.column_names if name != index_name}
+
+    return pd.DataFrame(data, index=index)
+
+
+# Converts the dated CSV snapshots in data/ to Parquet: python -m formulas.artifacts data/*.csv
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert data/ CSV snapshots to Parquet artifacts")
+    parser.add_argument("paths", nargs="+", help="CSV files to convert")
+    parser.add_argument("--float-dtype", default="float64", choices=["float32", "float64"])
+    args = parser.parse_args()
+
+    for path in map(Path, args.paths):
+        table = pd.read_csv(path, index_col=0)
+        if table.index.name == "Date":
+            table.index = pd.to_datetime(table.index)
+        manifest = write_artifact(table, path.with_suffix(".parquet"), args.float_dtype)
+        print(json.dumps(manifest))
@@ -2,7 +2,6 @@ import pandas as pd
 import datetime as dt
 import numpy as np
 from messari.messari import Messari
-import financialanalysis as fa
 import matplotlib.pyplot as plt
 from pathlib import Path
 from dotenv import load_dotenv
@@ -10,6 +9,8 @@ import os
 import json
 import requests
 import sys
+from formulas.alignment import trailing_window, pairwise_correlations
+from formulas.dates import linear_trend
 
 
 load_dotenv()
@@ -24,10 +25,11 @@ def rolling_correlations(prices_df, asset, window):
 
 def static_correlations(prices_df, asset):
 
-    correlation_2month = prices_df.tail(60).corr() * prices_df.tail(60).corr()
-    correlation_3month = prices_df.tail(90).corr() * prices_df.tail(90).corr()
-    correlation_6month = prices_df.tail(180).corr() * prices_df.tail(180).corr()
-    correlation_12month = prices_df.tail(365).corr() * prices_df.tail(365).corr()
+    # Pairwise-complete r^2 over calendar windows, so late listings only shorten their own pairs
+    correlation_2month = pairwise_correlations(trailing_window(prices_df, 60)) ** 2
+    correlation_3month = pairwise_correlations(trailing_window(prices_df, 90)) ** 2
+    correlation_6month = pairwise_correlations(trailing_window(prices_df, 180)) ** 2
+    correlation_12month = pairwise_correlations(trailing_window(prices_df, 365)) ** 2
 
     two_month = correlation_2month[asset]
     three_month = correlation_3month[asset]
@@ -42,16 +44,13 @@ def static_correlations(prices_df, asset):
                                 "60-Day Correlation"])
 
     static_correlations = static_correlations.drop(columns={asset})
-    static_correlations = static_correlations.round(2)
 
     return static_correlations 
 
 
 def correlations_matrix (prices_df, days):
 
-    correlations_matrix = prices_df.tail(int(days)).corr() * prices_df.tail(int(days)).corr()
-
-    correlations_matrix = correlations_matrix.round(2)
+    correlations_matrix = pairwise_correlations(trailing_window(prices_df, days)) ** 2
     
     return correlations_matrix
 
@@ -70,15 +69,8 @@ def timeseries_linear_regression(data, asset):
     linear_regression_df = data
     linear_regression_df.reset_index(inplace=True)
     
-    X = linear_regression_df["Date"].to_list() # convert Series to list
-    X = fa.datetimeToFloatyear(X) # for example, 2020-07-01 becomes 2020.49589041
-    X = np.array(X) # convert list to a numpy array
-    X = X[::,None] # convert row vector to column vector (just column vector is acceptable)
-    y = linear_regression_df[asset] # get y data (relative price)
-    y = y.values # convert Series to numpy
-    y = y[::,None] # row vector to column vector (just column vector is acceptable)
-    
-    slope, intercept, x, fittedline = fa.timeseriesLinearRegression(linear_regression_df["Date"], linear_regression_df[asset])
+    # Regression on days since the first date, straight from the Date column
+    slope, intercept, fittedline = linear_trend(linear_regression_df["Date"], linear_regression_df[asset])
     
     intercept_one_std = (intercept * 1.34) - intercept
     intercept_two_std = (intercept * 1.475) - intercept
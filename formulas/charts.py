@@ -8,6 +8,8 @@ import holoviews as hv
 import panel as pn
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from formulas.downsampling import downsample_figure
+from formulas.dates import linear_trend
 
 
 def crypto_widget():
@@ -58,7 +60,7 @@ def mvrv_price_chart(asset, mvrv_data):
     chart.update_yaxes(title_text="MVRV Z-Score", secondary_y=False)
     chart.update_yaxes(ticklen=5, secondary_y=True)
     chart.update_layout(template="simple_white")
-    chart
+    chart = downsample_figure(chart)
 
     return chart
 
@@ -87,15 +89,8 @@ def timeseries_linear_regression(asset, start, end):
     linear_regression_df = price_data
     linear_regression_df.reset_index(inplace=True)
     
-    X = linear_regression_df["Date"].to_list() # convert Series to list
-    X = fa.datetimeToFloatyear(X) # for example, 2020-07-01 becomes 2020.49589041
-    X = np.array(X) # convert list to a numpy array
-    X = X[::,None] # convert row vector to column vector (just column vector is acceptable)
-    y = linear_regression_df[asset] # get y data (relative price)
-    y = y.values # convert Series to numpy
-    y = y[::,None] # row vector to column vector (just column vector is acceptable)
-    
-    slope, intercept, x, fittedline = fa.timeseriesLinearRegression(linear_regression_df["Date"], linear_regression_df[asset])
+    # Regression on days since the first date, straight from the Date column
+    slope, intercept, fittedline = linear_trend(linear_regression_df["Date"], linear_regression_df[asset])
 
     
     fittedline_upper_1 = fittedline + std
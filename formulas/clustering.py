@@ -0,0 +1,78 @@
+"""Functions to Cluster Assets by Correlation Distance and Reorder the Correlation Matrix into Visible Blocks"""
+
+# Required libraries and dependencies
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import linkage, leaves_list, optimal_leaf_ordering, fcluster
+from scipy.spatial.distance import squareform
+from formulas.alignment import trailing_window, pairwise_correlations
+
+# Linkages for the latest (window, data) pairs; a new price refresh changes the data key
+linkage_cache = OrderedDict()
+linkage_cache_size = 16
+
+
+def price_fingerprint(prices):
+
+    # Cheap content key for a price matrix: any changed value, date or asset gives a new key
+    values = pd.util.hash_pandas_object(prices, index=True).values
+    return (prices.shape, tuple(prices.columns), int(values.sum()), int(np.bitwise_xor.reduce(values)))
+
+
+"""Linkage Function to compute correlation distances and the hierarchical tree once per window and refresh"""
+
+def correlation_linkage(prices, days, method="average", refresh_key=None):
+
+    key = (days, method, price_fingerprint(prices) if refresh_key is None else refresh_key)
+    if key in linkage_cache:
+        linkage_cache.move_to_end(key)
+        return linkage_cache[key]
+
+    # Pairwise-complete correlations of daily returns over the window
+    returns = trailing_window(prices, days).pct_change()
+    correlations = pairwise_correlations(returns)
+    rho = np.clip(np.nan_to_num(correlations.values, nan=0.0), -1, 1)
+
+    # Distance sqrt((1 - rho) / 2) is a metric: 0 for identical assets, 1 for perfectly opposite ones
+    distances = np.sqrt((1 - rho) / 2)
+    np.fill_diagonal(distances, 0)
+    condensed = squareform(distances, checks=False)
+
+    tree = linkage(condensed, method=method) if len(condensed) else np.empty((0, 4))
+    if len(tree) > 1:
+        tree = optimal_leaf_ordering(tree, condensed)
+    order = leaves_list(tree) if len(tree) else np.arange(len(correlations))
+
+    entry = {"correlations": correlations, "linkage": tree, "order": order}
+    linkage_cache[key] = entry
+    if len(linkage_cache) > linkage_cache_size:
+        linkage_cache.popitem(last=False)
+
+    return entry
+
+
+"""Cluster View Functions that reuse the cached tree for every heatmap view and cluster count"""
+
+def ordered_correlations(prices, days, squared=True, method="average", refresh_key=None):
+
+    # The matrix with rows and columns in dendrogram leaf order, so correlated groups form blocks on the diagonal
+    entry = correlation_linkage(prices, days, method, refresh_key)
+    correlations = entry["correlations"].iloc[entry["order"], entry["order"]]
+    return correlations ** 2 if squared else correlations
+
+
+def cluster_membership(prices, days, n_clusters=4, method="average", refresh_key=None):
+
+    entry = correlation_linkage(prices, days, method, refresh_key)
+    assets = entry["correlations"].index
+    if len(entry["linkage"]) == 0:
+        return pd.Series(1, index=assets, name="Cluster")
+
+    # Clusters are numbered in leaf order, so cluster 1 is the top-left block of the ordered heatmap
+    labels = fcluster(entry["linkage"], t=min(n_clusters, len(assets)), criterion="maxclust")
+    first_seen = pd.unique(labels[entry["order"]])
+    renumber = {label: number for number, label in enumerate(first_seen, start=1)}
+    membership = pd.Series([renumber[label] for label in labels], index=assets, name="Cluster")
+
+    return membership.iloc[entry["order"]]
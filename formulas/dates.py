@@ -0,0 +1,71 @@
+"""Functions to Represent Dates as Int32 Days since the Epoch and Slice Date Windows by Binary Search"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+
+
+"""Conversion Functions used at the boundaries: API responses, stored tables and chart axes"""
+
+def epoch_days(dates):
+
+    # Calendar day of each date as int32 days since 1970-01-01; timezone-aware dates keep their local calendar day
+    dates = pd.DatetimeIndex(dates)
+    dates = dates.tz_localize(None) if dates.tz is not None else dates
+    return dates.values.astype("datetime64[D]").astype(np.int32)
+
+
+def epoch_day(date):
+
+    # A single date (or an epoch day already) as an int
+    if isinstance(date, (int, np.integer)):
+        return int(date)
+    return int(epoch_days([pd.Timestamp(date)])[0])
+
+
+def day_dates(days, name=None):
+
+    # Midnight of each epoch day, as the DatetimeIndex the matrices and charts use
+    return pd.DatetimeIndex(np.asarray(days, dtype=np.int64).astype("datetime64[D]").astype("datetime64[ns]"), name=name)
+
+
+def normalize_dates(dates, name=None):
+
+    # Timestamps with a time of day or a timezone (e.g. Alpaca bars) become plain calendar dates without formatting strings
+    return day_dates(epoch_days(dates), name=name)
+
+
+"""Window Functions that find date ranges by binary search over the sorted epoch days"""
+
+def _search_keys(index):
+
+    # A DatetimeIndex is searched in its own datetime64 values, so a lookup never converts the whole index
+    if isinstance(index, pd.DatetimeIndex):
+        values = (index.tz_localize(None) if index.tz is not None else index).values
+        return values, lambda day: np.datetime64(day, "D").astype(values.dtype)
+    return np.asarray(index), int
+
+
+def window_bounds(index, start=None, end=None):
+
+    # Row positions [first, stop) of an ascending date index or epoch-day array inside the inclusive date range
+    values, key = _search_keys(index)
+    first = 0 if start is None else int(np.searchsorted(values, key(epoch_day(start)), side="left"))
+    stop = len(values) if end is None else int(np.searchsorted(values, key(epoch_day(end) + 1), side="left"))
+    return first, max(first, stop)
+
+
+def date_window(table, start=None, end=None):
+    first, stop = window_bounds(table.index, start, end)
+    return table.iloc[first:stop]
+
+
+"""Trend Function to fit a straight line over time measured in days"""
+
+def linear_trend(dates, values):
+
+    # Least squares over days since the first date: slope per day, intercept and the fitted line at every date
+    days = epoch_days(dates)
+    days = (days - days[0]).astype(float) if len(days) else days.astype(float)
+    slope, intercept = np.polyfit(days, np.asarray(values, dtype=float), 1)
+    return slope, intercept, intercept + slope * days
@@ -0,0 +1,113 @@
+"""Functions to Downsample Long Timeseries Before They Are Sent to Plotly/Bokeh Charts"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+from formulas.dates import date_window
+
+# Maximum number of points sent to the browser per trace
+default_point_budget = 1000
+
+
+def _numeric(x):
+
+    # Dates are decimated on their int64 nanosecond values
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+"""Largest-Triangle-Three-Buckets Function to get the indices of the points that best preserve a line's shape"""
+
+def lttb(x, y, max_points=default_point_budget):
+
+    x = _numeric(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+
+    # Below three points there are no buckets left, only the endpoints the budget has room for
+    if max_points < 3:
+        return np.array([0, n - 1])[:max(max_points, 0)]
+
+    # First and last points are always kept; the rest are split into equal buckets
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+
+        # Average of the next bucket is the third corner of the triangle
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(np.nan_to_num(area, nan=-1)))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+"""Min/Max Envelope Function to get the indices of each bucket's lowest and highest point"""
+
+def minmax_envelope(y, max_points=default_point_budget):
+
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+
+    # Two slots are kept for the first and last points, so the budget is a hard limit
+    buckets = (max_points - 2) // 2
+    if buckets < 1:
+        return np.array([0, n - 1])[:max(max_points, 0)]
+
+    # Pads the last bucket with its own edge value so every bucket has the same width
+    width = int(np.ceil(n / buckets))
+    padded = np.pad(y, (0, buckets * width - n), mode="edge").reshape(buckets, width)
+    filled = np.where(np.isnan(padded), np.nanmean(y), padded)
+    offsets = np.arange(buckets) * width
+
+    lows = offsets + filled.argmin(axis=1)
+    highs = offsets + filled.argmax(axis=1)
+
+    return np.unique(np.minimum(np.r_[0, lows, highs, n - 1], n - 1))
+
+
+"""Downsampling Functions for DataFrames and Plotly figures"""
+
+def downsample_frame(frame, max_points=default_point_budget, column=None, start=None, end=None, method="lttb"):
+
+    # Zooming slices the full-resolution frame first, so a narrow window keeps every point it has
+    if start is not None or end is not None:
+        frame = date_window(frame, start, end)
+
+    driver = frame[column if column is not None else frame.columns[0]]
+    if method == "minmax":
+        selected = minmax_envelope(driver.values, max_points)
+    else:
+        selected = lttb(frame.index.values, driver.values, max_points)
+
+    return frame.iloc[selected]
+
+
+def downsample_figure(figure, max_points=default_point_budget, method="lttb"):
+
+    # Decimates every x/y trace of a plotly figure in place, each trace against its own shape
+    for trace in figure.data:
+        if trace.x is None or trace.y is None or len(trace.y) <= max_points:
+            continue
+        x = np.asarray(trace.x)
+        if x.dtype == object:
+            x = pd.to_datetime(x).values
+        y = np.asarray(trace.y, dtype=float)
+        selected = minmax_envelope(y, max_points) if method == "minmax" else lttb(x, y, max_points)
+        trace.x, trace.y = x[selected], y[selected]
+
+    return figure
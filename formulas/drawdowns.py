@@ -0,0 +1,129 @@
+"""Functions to Calculate Peak-to-Trough Drawdowns for Every Asset in a Price Matrix"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+from formulas.dates import epoch_days
+
+
+"""Drawdown Series Function to get the running peak and drawdown of every asset in one vectorized pass"""
+
+def drawdown_series(prices):
+
+    values = prices.values.astype(float)
+
+    # fmax ignores NaN, so pre-listing and missing days do not reset the running peak
+    peaks = np.fmax.accumulate(values, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdowns = values / peaks - 1
+
+    peaks = pd.DataFrame(peaks, index=prices.index, columns=prices.columns)
+    drawdowns = pd.DataFrame(drawdowns, index=prices.index, columns=prices.columns)
+
+    return peaks, drawdowns
+
+
+def _peak_positions(drawdowns):
+
+    # Row positions of the latest peak at or before each day and the next peak at or after it
+    n_rows = len(drawdowns)
+    rows = np.arange(n_rows)[:, None]
+    at_peak = drawdowns >= 0
+
+    last_peak = np.maximum.accumulate(np.where(at_peak, rows, -1), axis=0)
+    next_peak = np.minimum.accumulate(np.where(at_peak, rows, n_rows)[::-1], axis=0)[::-1]
+
+    return at_peak, last_peak, next_peak
+
+
+"""Drawdown Analytics Function to get drawdown durations, recoveries and the top-N episodes for every asset"""
+
+def drawdown_analytics(prices, top_n=5):
+
+    peaks, drawdowns = drawdown_series(prices)
+    values = drawdowns.values
+    dates = prices.index
+    days = epoch_days(dates)
+    n_rows, n_assets = values.shape
+    columns = np.arange(n_assets)
+
+    at_peak, last_peak, next_peak = _peak_positions(values)
+    valid = ~np.isnan(values)
+
+    # Calendar days spent below the previous peak on each day
+    underwater = np.where(valid & (last_peak >= 0), days[:, None] - days[np.maximum(last_peak, 0)], np.nan)
+    underwater = pd.DataFrame(underwater, index=dates, columns=prices.columns)
+
+    # Worst drawdown per asset, with the peak it fell from and the day it was recovered (if ever)
+    has_data = valid.any(axis=0)
+    trough = np.argmin(np.where(valid, values, np.inf), axis=0)
+    peak = last_peak[trough, columns]
+    recovery = next_peak[trough, columns]
+    recovered = has_data & (recovery < n_rows)
+
+    summary = pd.DataFrame({
+        "Max Drawdown": np.where(has_data, values[trough, columns], np.nan),
+        "Peak Date": dates[np.maximum(peak, 0)],
+        "Trough Date": dates[trough],
+        "Recovery Date": dates[np.minimum(recovery, n_rows - 1)],
+        "Drawdown Duration": days[trough] - days[np.maximum(peak, 0)],
+        "Time to Recovery": np.where(recovered, days[np.minimum(recovery, n_rows - 1)] - days[trough], np.nan),
+        "Longest Underwater": np.nanmax(np.where(valid, underwater.values, -np.inf), axis=0),
+        "Current Drawdown": drawdowns.ffill().values[-1] if n_rows else np.nan,
+    }, index=prices.columns)
+    summary.loc[~recovered, "Recovery Date"] = pd.NaT
+    summary.loc[~has_data] = np.nan
+
+    episodes = _drawdown_episodes(values, at_peak, last_peak, next_peak, dates, prices.columns, top_n)
+
+    return drawdowns, summary, episodes
+
+
+def _drawdown_episodes(values, at_peak, last_peak, next_peak, dates, assets, top_n=5):
+
+    n_rows = len(values)
+    days = epoch_days(dates)
+
+    # An episode runs from one peak to the next; its id is the number of peaks seen so far
+    episode = np.cumsum(at_peak, axis=0)
+    column, row = np.nonzero((values < 0).T)
+    depth = values[row, column]
+    key = column.astype(np.int64) * (n_rows + 1) + episode[row, column]
+
+    # Underwater days come out grouped by asset then date, so every episode is a contiguous segment
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.array([], dtype=int)
+    deepest = np.minimum.reduceat(depth, starts) if len(key) else depth
+    segment = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(key)]))
+
+    # First day in each episode that reaches its deepest point
+    candidates = np.flatnonzero(depth == deepest[segment])
+    _, first = np.unique(segment[candidates], return_index=True)
+    trough = candidates[first]
+    trough_row, trough_column, trough_depth = row[trough], column[trough], depth[trough]
+
+    # Rank episodes within each asset by depth and keep the top N
+    order = np.lexsort((trough_depth, trough_column))
+    trough_row, trough_column, trough_depth = trough_row[order], trough_column[order], trough_depth[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(trough_column)) + 1] if len(order) else np.array([], dtype=int)
+    rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    keep = rank < top_n
+    trough_row, trough_column, trough_depth, rank = trough_row[keep], trough_column[keep], trough_depth[keep], rank[keep]
+
+    peak_row = last_peak[trough_row, trough_column]
+    recovery_row = next_peak[trough_row, trough_column]
+    recovered = recovery_row < n_rows
+    recovery_row = np.minimum(recovery_row, n_rows - 1)
+
+    episodes = pd.DataFrame({
+        "Asset": np.asarray(assets)[trough_column],
+        "Rank": rank + 1,
+        "Drawdown": trough_depth,
+        "Peak Date": dates[peak_row],
+        "Trough Date": dates[trough_row],
+        "Recovery Date": dates[recovery_row],
+        "Drawdown Duration": days[trough_row] - days[peak_row],
+        "Time to Recovery": np.where(recovered, days[recovery_row] - days[trough_row], np.nan),
+    })
+    episodes.loc[~recovered, "Recovery Date"] = pd.NaT
+
+    return episodes.set_index(["Asset", "Rank"])
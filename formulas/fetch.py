@@ -0,0 +1,498 @@
+"""Functions to Route Upstream API Calls through One Fetch Layer that Coalesces, Paces and Retries Requests"""
+
+# Required libraries and dependencies
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import requests
+from formulas.artifacts import write_artifact, read_artifact
+from formulas.dates import epoch_day, day_dates
+
+# Priority lanes: interactive page requests are always served before background refreshes
+lanes = {"interactive": 0, "background": 1}
+
+# Requests per minute and burst size per provider, overridden by e.g. MESSARI_REQUESTS_PER_MINUTE / MESSARI_BURST
+rate_limit_defaults = {"messari": (20, 5), "alpaca": (200, 20)}
+
+# Retries of transient failures (timeouts, dropped connections, 429 and 5xx), with full-jitter exponential backoff in seconds
+retry_attempts = 3
+retry_base_delay = .5
+retry_max_delay = 8.0
+transient_statuses = {408, 425, 429, 500, 502, 503, 504}
+
+# Ranges longer than this many days (one year back from any date, leap day included) are fetched as chunks of this many
+# days, several at a time, each one request under the point limit
+range_chunk_days = 366
+chunk_workers = 4
+
+# Directory of completed chunks (set by use_chunk_store), so an interrupted backfill resumes where it stopped
+chunk_store_path = None
+
+# Consecutive transient failures that open a provider's circuit, and seconds it stays open before one trial call
+breaker_threshold = 5
+breaker_reset_timeout = 30.0
+
+
+"""Single-Flight Class so concurrent callers of the same request wait on one upstream call and share its result"""
+
+class SingleFlight:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.metrics = {}
+
+    def _count(self, provider, name):
+        with self._lock:
+            self._count_locked(provider, name)
+
+    def _count_locked(self, provider, name):
+        counts = self.metrics.setdefault(provider, {"Requests": 0, "Upstream Calls": 0, "Coalesced": 0, "Retries": 0, "Errors": 0})
+        counts[name] += 1
+
+    def do(self, key, function, *args, **kwargs):
+
+        # The first caller for a key becomes the leader and makes the call; everyone arriving meanwhile waits for it
+        provider = key[0]
+        with self._lock:
+            self._count_locked(provider, "Requests")
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = {"done": threading.Event(), "result": None, "error": None}
+            else:
+                self._count_locked(provider, "Coalesced")
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return _share(call["result"])
+
+        try:
+            call["result"] = function(*args, **kwargs)
+        except Exception as error:
+            call["error"] = error
+            raise
+        finally:
+            with self._lock:
+                self._count_locked(provider, "Upstream Calls")
+                if call["error"] is not None:
+                    self._count_locked(provider, "Errors")
+                del self._in_flight[key]
+            call["done"].set()
+
+        return _share(call["result"])
+
+
+def _share(result):
+
+    # Every caller gets its own copy, so one session reshaping its DataFrame cannot change another's
+    return result.copy() if isinstance(result, (pd.DataFrame, pd.Series)) else result
+
+
+single_flight = SingleFlight()
+
+
+def _date(value):
+
+    # Requests are keyed (and sent) by calendar date, so "today" from two sessions a second apart is the same request
+    return None if value is None else str(pd.to_datetime(value).date())
+
+
+"""Token Bucket Class to pace upstream calls per provider, serving waiting requests in lane order"""
+
+class TokenBucket:
+
+    def __init__(self, requests_per_minute, burst, reserve=1):
+        self.rate = requests_per_minute / 60
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        # Background requests leave this many tokens for interactive ones
+        self.reserve = min(reserve, self.capacity - 1)
+        self.updated = time.monotonic()
+        self._condition = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self.stats = {lane: {"Granted": 0, "Total Wait (s)": 0.0, "Max Wait (s)": 0.0} for lane in lanes}
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, lane="interactive"):
+
+        # Waiters form one heap ordered by (lane, arrival); only the head may take a token
+        ticket = (lanes[lane], next(self._sequence))
+        needed = 1 if lanes[lane] == 0 else 1 + self.reserve
+        started = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            while True:
+                self._refill()
+                if self._queue[0] == ticket and self.tokens >= needed:
+                    break
+                timeout = (needed - self.tokens) / self.rate if self._queue[0] == ticket else None
+                self._condition.wait(timeout)
+            heapq.heappop(self._queue)
+            self.tokens -= 1
+
+            waited = time.monotonic() - started
+            stats = self.stats[lane]
+            stats["Granted"] += 1
+            stats["Total Wait (s)"] += waited
+            stats["Max Wait (s)"] = max(stats["Max Wait (s)"], waited)
+            self._condition.notify_all()
+
+        return waited
+
+    def queue_depth(self, lane):
+        with self._condition:
+            return sum(1 for priority, _ in self._queue if priority == lanes[lane])
+
+
+rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+_lane = threading.local()
+
+
+def rate_limiter(provider):
+
+    # Created on first use, after load_dotenv / Streamlit secrets have populated the environment
+    with _rate_limiters_lock:
+        if provider not in rate_limiters:
+            requests_per_minute, burst = rate_limit_defaults.get(provider, (60, 10))
+            requests_per_minute = float(os.getenv(f"{provider.upper()}_REQUESTS_PER_MINUTE", requests_per_minute))
+            burst = int(os.getenv(f"{provider.upper()}_BURST", burst))
+            rate_limiters[provider] = TokenBucket(requests_per_minute, burst)
+        return rate_limiters[provider]
+
+
+def set_rate_limit(provider, requests_per_minute, burst):
+
+    # Replaces a provider's bucket, e.g. for a paid plan or a local client that needs no pacing
+    with _rate_limiters_lock:
+        rate_limiters[provider] = TokenBucket(requests_per_minute, burst)
+    return rate_limiters[provider]
+
+
+def current_lane():
+    return getattr(_lane, "name", "interactive")
+
+
+@contextmanager
+def fetch_lane(lane):
+
+    # Fetches made by this thread inside the block use the given lane (batch jobs use "background")
+    if lane not in lanes:
+        raise ValueError(f"Unknown fetch lane '{lane}', expected one of {', '.join(lanes)}")
+    previous = current_lane()
+    _lane.name = lane
+    try:
+        yield
+    finally:
+        _lane.name = previous
+
+
+"""Resilience Classes and Functions to retry transient failures and stop calling a provider that keeps failing"""
+
+class FetchUnavailableError(RuntimeError):
+    pass
+
+
+class CircuitOpenError(FetchUnavailableError):
+    pass
+
+
+class CircuitBreaker:
+
+    def __init__(self, provider, threshold=breaker_threshold, reset_timeout=breaker_reset_timeout):
+        self.provider = provider
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = None
+        self.trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened >= self.reset_timeout else "open"
+
+    def allow(self):
+
+        # Open: fail at once instead of queueing for a provider that is down; after the timeout one trial call goes through
+        with self._lock:
+            if self.opened is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self.opened)
+            if remaining > 0 or self.trial:
+                raise CircuitOpenError(f"{self.provider.title()} is unavailable after {self.failures} consecutive failures; "
+                                       f"retrying in {max(remaining, 0):.0f}s")
+            self.trial = True
+
+    def record(self, healthy):
+
+        # Any response that is not a transient failure means the provider is reachable
+        with self._lock:
+            self.trial = False
+            if healthy:
+                self.failures, self.opened = 0, None
+                return
+            self.failures += 1
+            if self.opened is not None or self.failures >= self.threshold:
+                self.opened = time.monotonic()
+
+
+circuit_breakers = {}
+
+
+def circuit_breaker(provider):
+
+    with _rate_limiters_lock:
+        if provider not in circuit_breakers:
+            circuit_breakers[provider] = CircuitBreaker(provider)
+        return circuit_breakers[provider]
+
+
+def _status(error):
+
+    # requests.HTTPError carries the response; alpaca_trade_api's APIError exposes status_code directly
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_transient(error):
+
+    status = _status(error)
+    if status is not None:
+        return int(status) in transient_statuses
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, ConnectionError, TimeoutError))
+
+
+def backoff_delay(attempt, error=None):
+
+    # Full jitter spreads retries from many sessions apart; a Retry-After header is honored up to the cap
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        retry_after = float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        retry_after = None
+    if retry_after is not None:
+        return min(retry_after, retry_max_delay)
+    return random.uniform(0, min(retry_max_delay, retry_base_delay * 2 ** attempt))
+
+
+def _upstream(provider, function, lane):
+
+    # The leader's call: each attempt checks the circuit and waits for a rate-limit token
+    def call(*args, **kwargs):
+        breaker = circuit_breaker(provider)
+        for attempt in range(retry_attempts + 1):
+            breaker.allow()
+            rate_limiter(provider).acquire(lane)
+            try:
+                result = function(*args, **kwargs)
+            except Exception as error:
+                transient = is_transient(error)
+                breaker.record(not transient)
+                if not transient or attempt == retry_attempts:
+                    raise
+                single_flight._count(provider, "Retries")
+                time.sleep(backoff_delay(attempt, error))
+            else:
+                breaker.record(True)
+                return result
+
+    return call
+
+
+"""Range Chunking Functions to split long histories into parallel requests and keep completed chunks on disk"""
+
+def date_chunks(start, end, days=None):
+
+    # Inclusive (start, end) date strings of the range cut at multiples of `days` from 1970-01-01, so ranges that start on
+    # different days share their inner chunks; the first and last chunk are clipped to the range itself
+    days = range_chunk_days if days is None else days
+    start, end = epoch_day(start), epoch_day(end)
+    end = max(start, end)
+    firsts = np.arange(start // days * days, end + 1, days)
+    lasts = np.minimum(firsts + days - 1, end)
+    firsts[0] = start
+    return list(zip(day_dates(firsts).strftime("%Y-%m-%d"), day_dates(lasts).strftime("%Y-%m-%d")))
+
+
+def stitch_chunks(chunks):
+
+    # In date order; a row returned by two neighbouring chunks (inclusive or timezone-shifted bounds) is kept once
+    filled = [chunk for chunk in chunks if len(chunk)]
+    if not filled:
+        return chunks[0]
+    stitched = pd.concat(filled, axis="rows", sort=False).sort_index(kind="mergesort")
+    return stitched[~stitched.index.duplicated(keep="last")]
+
+
+def use_chunk_store(path):
+
+    # Keeps completed chunks under path (None turns the store off)
+    global chunk_store_path
+    chunk_store_path = None if path is None else Path(path)
+
+
+def _chunk_directory(provider, client_name, key):
+    digest = hashlib.sha1(repr((client_name,) + tuple(key)).encode()).hexdigest()[:16]
+    return chunk_store_path / provider / digest
+
+
+def _stored_chunk(store, request, start, end):
+
+    path = None if store is None else store / f"{start}_{end}.parquet"
+    if path is not None and path.exists():
+        chunk = read_artifact(path)
+        chunk.columns = pd.MultiIndex.from_tuples([tuple(json.loads(column)) for column in chunk.columns]) if len(chunk.columns) else chunk.columns
+        return chunk
+
+    chunk = request(start, end)
+
+    # Only chunks that ended before today are final; the file appears in one rename, so a killed run never leaves half a chunk
+    if path is not None and pd.to_datetime(end) < pd.Timestamp.today().normalize():
+        stored = chunk.copy()
+        stored.columns = [json.dumps([str(level) for level in (column if isinstance(column, tuple) else (column,))]) for column in chunk.columns]
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_suffix(f".{threading.get_ident()}.tmp")
+            write_artifact(stored, partial)
+            os.replace(partial, path)
+        except (TypeError, ValueError, OSError):
+            pass
+    return chunk
+
+
+"""Fetch Functions used in place of direct client calls in formulas/api.py, formulas/filters.py and cryptoapp.py"""
+
+def fetch(provider, key, function, *args, **kwargs):
+
+    # Only the single-flight leader waits for a token and retries; coalesced callers share its result or its error
+    lane = current_lane()
+    return single_flight.do((provider,) + tuple(key), _upstream(provider, function, lane), *args, **kwargs)
+
+
+def fetch_metric_timeseries(client, asset_slugs, asset_metric, start=None, end=None):
+
+    slugs = asset_slugs if isinstance(asset_slugs, str) else tuple(asset_slugs)
+    start, end = _date(start), _date(end)
+    key = ("get_metric_timeseries", slugs, asset_metric)
+
+    def request(start, end):
+        return fetch("messari", key + (start, end), client.get_metric_timeseries,
+                     asset_slugs=asset_slugs, asset_metric=asset_metric, start=start, end=end)
+
+    # Without a start date Messari picks the range itself, so there is nothing to split
+    if start is None:
+        return request(start, end)
+
+    # A range that fits in one chunk is one request, unless completed chunks are being stored for other ranges to reuse
+    today = _date("today")
+    last = min(end or today, today)
+    if chunk_store_path is None and epoch_day(last) - epoch_day(start) <= range_chunk_days:
+        return request(start, end)
+    chunks = date_chunks(start, last)
+
+    # Chunks run in parallel on the caller's lane; each one still queues at the rate limiter
+    store = None if chunk_store_path is None else _chunk_directory("messari", type(client).__name__, key)
+    lane = current_lane()
+
+    def load(bounds):
+        with fetch_lane(lane):
+            return _stored_chunk(store, request, *bounds)
+
+    with ThreadPoolExecutor(max_workers=min(chunk_workers, len(chunks))) as pool:
+        return stitch_chunks(list(pool.map(load, chunks)))
+
+
+def fetch_bars(client, symbols, timeframe, start, end, method="get_bars", limit=None):
+
+    # Alpaca bars as a DataFrame; method="get_barset" serves the older v1 endpoint used by formulas/filters.py
+    start, end = _date(start), _date(end)
+    options = {"start": start, "end": end} if limit is None else {"start": start, "end": end, "limit": limit}
+
+    def request():
+        return getattr(client, method)(list(symbols), timeframe, **options).df
+
+    return fetch("alpaca", (method, tuple(symbols), str(timeframe), start, end, limit), request)
+
+
+def fetch_metrics():
+
+    # Per-provider counts since the process started, and each provider's circuit right now
+    metrics = pd.DataFrame(single_flight.metrics).T
+    if len(metrics):
+        metrics["Circuit"] = [circuit_breaker(provider).state for provider in metrics.index]
+    return metrics
+
+
+"""Partial Result Functions so one failing asset leaves a gap in a table instead of failing the whole page"""
+
+def gather(keys, load, max_workers=1):
+
+    # Loads every key it can, in key order; failures are collected by key with their reason instead of raised
+    lane = current_lane()
+
+    def attempt(key):
+        try:
+            with fetch_lane(lane):
+                return load(key), None
+        except Exception as error:
+            return None, f"{type(error).__name__}: {error}"
+
+    keys = list(keys)
+    if max_workers > 1 and len(keys) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as pool:
+            results = list(pool.map(attempt, keys))
+    else:
+        results = [attempt(key) for key in keys]
+
+    loaded = {key: result for key, (result, error) in zip(keys, results) if error is None}
+    missing = {key: error for key, (result, error) in zip(keys, results) if error is not None}
+
+    if keys and not loaded:
+        raise FetchUnavailableError("No data loaded: " + "; ".join(f"{key} ({reason})" for key, reason in missing.items()))
+    return loaded, missing
+
+
+def mark_missing(table, missing):
+
+    # The keys that failed to load travel with the table as {label: reason}
+    table.attrs["missing"] = dict(missing)
+    return table
+
+
+def missing_assets(table):
+    return dict(getattr(table, "attrs", {}).get("missing", {}))
+
+
+def rate_limit_stats():
+
+    # Queue depth right now, and grants and waits since the process started, per provider and lane
+    rows = {}
+    for provider, bucket in list(rate_limiters.items()):
+        for lane, stats in bucket.stats.items():
+            rows[(provider, lane)] = {"Queue Depth": bucket.queue_depth(lane), "Granted": stats["Granted"],
+                                      "Mean Wait (s)": stats["Total Wait (s)"] / max(stats["Granted"], 1),
+                                      "Max Wait (s)": stats["Max Wait (s)"]}
+    return pd.DataFrame.from_dict(rows, orient="index")
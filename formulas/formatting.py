@@ -0,0 +1,34 @@
+"""Functions to Format Full-Precision Results at Render Time, Leaving the Underlying Data Unrounded"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+
+# Decimal places shown in tables and metrics; calculations always keep full precision
+display_decimals = 2
+
+
+def format_number(value, decimals=display_decimals, na_rep="n/a"):
+
+    # Single values for st.metric and captions
+    if value is None or (isinstance(value, (float, np.floating)) and np.isnan(value)):
+        return na_rep
+    return f"{value:,.{decimals}f}"
+
+
+def format_percent(value, decimals=1, na_rep="n/a"):
+
+    if value is None or (isinstance(value, (float, np.floating)) and np.isnan(value)):
+        return na_rep
+    return f"{value:.{decimals}%}"
+
+
+def format_table(frame, decimals=display_decimals, percent_columns=(), na_rep=""):
+
+    # A Styler only changes how numbers are printed, so st.dataframe still receives the full-precision table
+    frame = frame.to_frame() if isinstance(frame, pd.Series) else frame
+    numeric_columns = frame.select_dtypes(include="number").columns
+    formatter = {column: f"{{:,.{decimals}f}}" for column in numeric_columns}
+    formatter.update({column: "{:.1%}" for column in percent_columns if column in frame.columns})
+
+    return frame.style.format(formatter=formatter, na_rep=na_rep)
@@ -0,0 +1,212 @@
+"""Functions to Journal Every Upstream HTTP Request and Record or Replay the Raw Responses from a Local Archive"""
+
+# Required libraries and dependencies
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+archive_path = Path(__file__).resolve().parents[1] / "data" / "archive"
+
+# observe: journal only; record: also archive every response; replay: serve responses from the archive without the network
+journal_modes = ["observe", "record", "replay"]
+
+# Hosts of the paid data plans; anything else is journaled under its host name
+provider_hosts = {"data.messari.io": "messari", "api.alpaca.markets": "alpaca",
+                  "paper-api.alpaca.markets": "alpaca", "data.alpaca.markets": "alpaca"}
+
+# Response headers kept in the archive so a replayed response decodes like the original
+archived_headers = ["Content-Type", "Content-Encoding", "Content-Length", "Date"]
+
+journal = deque(maxlen=100000)
+journal_settings = {"mode": None, "archive": archive_path}
+_journal_lock = threading.Lock()
+# The unwrapped send, even if another copy of this module already patched the adapter
+_original_send = getattr(HTTPAdapter.send, "original_send", HTTPAdapter.send)
+_sequence = [0]
+
+
+class ReplayMissError(LookupError):
+    pass
+
+
+def provider_name(url):
+    return provider_hosts.get(urlsplit(url).hostname or "", urlsplit(url).hostname or "unknown")
+
+
+def request_key(request):
+
+    # Method, URL with sorted query parameters and body; credentials travel in headers and never reach the key or the archive
+    parts = urlsplit(request.url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    body = request.body.encode() if isinstance(request.body, str) else (request.body or b"")
+    digest = hashlib.sha256(f"{request.method} {parts.scheme}://{parts.netloc}{parts.path}?{query}".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+"""Archive Functions to store a raw response as one gzip file per request and rebuild it for replay"""
+
+def _archive_file(key):
+    return Path(journal_settings["archive"]) / key[:2] / f"{key}.json.gz"
+
+
+def archive_response(key, response, latency):
+
+    path = _archive_file(key)
+    record = {"url": response.url, "status": response.status_code, "reason": response.reason, "encoding": response.encoding,
+              "headers": {name: response.headers[name] for name in archived_headers if name in response.headers},
+              "latency_ms": latency * 1000, "recorded": pd.Timestamp.now().isoformat(timespec="seconds"),
+              "body": base64.b64encode(response.content).decode()}
+
+    # Written under a temporary name and renamed, so a concurrent replay never reads half a file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(f".{threading.get_ident()}.tmp")
+    with gzip.open(partial, "wt", encoding="utf-8") as archive:
+        json.dump(record, archive)
+    os.replace(partial, path)
+
+
+def replay_response(key, request):
+
+    path = _archive_file(key)
+    if not path.exists():
+        raise ReplayMissError(f"No archived response for {request.method} {request.url}")
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        record = json.load(archive)
+
+    response = requests.Response()
+    response.status_code = record["status"]
+    response.reason = record["reason"]
+    response.encoding = record["encoding"]
+    response.url = record["url"]
+    response.request = request
+    # The body is stored decoded, so the original transfer encoding must not be applied again
+    response.headers = CaseInsensitiveDict({name: value for name, value in record["headers"].items() if name != "Content-Encoding"})
+    response._content = base64.b64decode(record["body"])
+    return response
+
+
+"""Transport Functions that wrap requests' HTTPAdapter.send, below every client library"""
+
+def _journaled_send(adapter, request, **kwargs):
+
+    key = request_key(request)
+    mode = journal_settings["mode"]
+    request_body = request.body.encode() if isinstance(request.body, str) else (request.body or b"")
+    entry = {"Time": pd.Timestamp.now(), "Provider": provider_name(request.url), "Method": request.method,
+             "Path": urlsplit(request.url).path, "Status": None, "Cache": "error",
+             "Request Bytes": len(request.url) + len(request_body), "Response Bytes": 0, "Encoded Bytes": None, "Key": key}
+
+    timer = time.perf_counter()
+    try:
+        if mode == "replay":
+            response, entry["Cache"] = replay_response(key, request), "replay"
+        else:
+            response, entry["Cache"] = _original_send(adapter, request, **kwargs), "network"
+    finally:
+        # Failed requests (timeouts, refused connections, replay misses) are journaled too
+        entry["Latency (ms)"] = (time.perf_counter() - timer) * 1000
+        if entry["Cache"] == "error":
+            _append(entry)
+
+    # Only successful responses are archived, so a replay never serves a rate-limit or server error
+    if mode == "record" and response.ok:
+        archive_response(key, response, entry["Latency (ms)"] / 1000)
+        entry["Cache"] = "recorded"
+
+    encoded = response.headers.get("Content-Length")
+    entry.update({"Status": response.status_code, "Response Bytes": len(response.content),
+                  "Encoded Bytes": int(encoded) if encoded and encoded.isdigit() else None})
+    _append(entry)
+
+    return response
+
+
+_journaled_send.original_send = _original_send
+
+
+def _append(entry):
+    with _journal_lock:
+        _sequence[0] += 1
+        journal.append(dict(entry, Sequence=_sequence[0]))
+
+
+def install_journal(mode="observe", archive=None):
+
+    # Idempotent, so a Streamlit rerun can call it on every page load
+    if mode not in journal_modes:
+        raise ValueError(f"Unknown journal mode '{mode}', expected one of {', '.join(journal_modes)}")
+    journal_settings["mode"] = mode
+    journal_settings["archive"] = Path(archive) if archive is not None else archive_path
+    HTTPAdapter.send = _journaled_send
+
+    # Replayed responses cost no quota, so benchmarks run at disk speed rather than the plan's request rate
+    if mode == "replay":
+        from formulas.fetch import set_rate_limit
+        for provider in set(provider_hosts.values()):
+            set_rate_limit(provider, 1e9, 1000000)
+
+
+def uninstall_journal():
+    journal_settings["mode"] = None
+    HTTPAdapter.send = _original_send
+
+
+"""Journal Summary Functions for request counts, bytes and latency per provider"""
+
+def journal_position():
+
+    # Sequence number of the latest entry; pass it back as since= to see only what came after
+    return _sequence[0]
+
+
+def journal_frame(since=0):
+    with _journal_lock:
+        entries = [entry for entry in journal if entry["Sequence"] > since]
+    return pd.DataFrame(entries)
+
+
+def journal_summary(since=0):
+
+    entries = journal_frame(since)
+    if entries.empty:
+        return pd.DataFrame(columns=["Requests", "Response Bytes", "Encoded Bytes", "Mean Latency (ms)", "Max Latency (ms)"])
+    grouped = entries.groupby(["Provider", "Cache"])
+    return pd.DataFrame({"Requests": grouped.size(), "Response Bytes": grouped["Response Bytes"].sum(),
+                         "Encoded Bytes": grouped["Encoded Bytes"].sum(min_count=1),
+                         "Mean Latency (ms)": grouped["Latency (ms)"].mean(), "Max Latency (ms)": grouped["Latency (ms)"].max()})
+
+
+def archive_summary(archive=None):
+
+    # Responses and bytes held in an archive, per provider
+    rows = []
+    for path in Path(archive or journal_settings["archive"]).glob("*/*.json.gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as record_file:
+            record = json.load(record_file)
+        rows.append({"Provider": provider_name(record["url"]), "Response Bytes": len(base64.b64decode(record["body"])),
+                     "Archived Bytes": path.stat().st_size, "Latency (ms)": record["latency_ms"]})
+    rows = pd.DataFrame(rows, columns=["Provider", "Response Bytes", "Archived Bytes", "Latency (ms)"])
+    return rows.groupby("Provider").agg(Responses=("Response Bytes", "size"), **{"Response Bytes": ("Response Bytes", "sum"),
+                                                                                  "Archived Bytes": ("Archived Bytes", "sum"),
+                                                                                  "Mean Latency (ms)": ("Latency (ms)", "mean")})
+
+
+# Summarizes an archive recorded with FETCH_JOURNAL=record or python -m formulas.pipeline --journal record
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a recorded response archive")
+    parser.add_argument("archive", nargs="?", default=str(archive_path))
+    args = parser.parse_args()
+    print(archive_summary(args.archive).to_string())
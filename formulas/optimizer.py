@@ -0,0 +1,229 @@
+"""Functions to Estimate a Shrunk Covariance Matrix and Solve Minimum-Variance, Maximum-Sharpe and Risk-Parity Portfolios"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+from formulas.alignment import trailing_window
+from formulas.risk import periods_per_year
+
+
+"""Covariance Functions to estimate annualized expected returns and a Ledoit-Wolf covariance once per refresh"""
+
+def ledoit_wolf(returns):
+
+    # Shrinks the sample covariance of demeaned returns (T x N) toward a scaled identity with the analytic optimal intensity
+    n_rows, n_assets = returns.shape
+    sample = returns.T @ returns / n_rows
+    target = np.trace(sample) / n_assets
+
+    # Squared distance to the target, and the estimation error of the sample covariance from one matrix product
+    distance = ((sample - target * np.eye(n_assets)) ** 2).sum() / n_assets
+    error = ((returns ** 2).sum(axis=1) ** 2).sum() - n_rows * (sample ** 2).sum()
+    error = min(distance, error / (n_assets * n_rows ** 2))
+    shrinkage = error / distance if distance > 0 else 1.0
+
+    return shrinkage * target * np.eye(n_assets) + (1 - shrinkage) * sample, shrinkage
+
+
+def covariance_matrix(prices, days=365, min_periods=None, shrink=True):
+
+    prices = trailing_window(prices, days) if days is not None else prices
+    ppy = periods_per_year(prices.index)
+
+    # Daily returns over the window; assets with too short a history are left out rather than distorting the matrix
+    filled = prices.ffill().values.astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = filled[1:] / filled[:-1] - 1
+    valid = ~np.isnan(prices.values[1:].astype(float)) & ~np.isnan(returns)
+    count = valid.sum(axis=0)
+    min_periods = max(2, len(returns) // 2) if min_periods is None else min_periods
+    keep = count >= min_periods
+    returns, valid, count = returns[:, keep], valid[:, keep], count[keep]
+    assets = prices.columns[keep]
+
+    # Missing days count as an average day once each asset is demeaned on its own observations
+    mean = np.where(valid, returns, 0).sum(axis=0) / count
+    centered = np.where(valid, returns - mean, 0.0)
+    if shrink:
+        covariance, shrinkage = ledoit_wolf(centered)
+    else:
+        covariance, shrinkage = centered.T @ centered / (len(centered) - 1), 0.0
+
+    covariance = pd.DataFrame(covariance * ppy, index=assets, columns=assets)
+    expected_returns = pd.Series(mean * ppy, index=assets, name="Expected Return")
+
+    return covariance, expected_returns, shrinkage
+
+
+"""Portfolio Solver Functions on a covariance DataFrame, long-only with an optional cap on any single weight"""
+
+def _starting_weights(variances, max_weight):
+
+    # A feasible corner: the lowest-variance assets filled up to the cap in turn
+    weights = np.zeros(len(variances))
+    remaining = 1.0
+    for asset in np.argsort(variances):
+        weights[asset] = min(max_weight, remaining)
+        remaining -= weights[asset]
+        if remaining <= 1e-15:
+            break
+    return weights
+
+
+def _solve(sigma, linear, max_weight, x0=None, tolerance=1e-12, max_iterations=None):
+
+    # Primal active-set method for min w'Sw - linear'w with sum(w) = 1 and 0 <= w <= max_weight
+    # Each step solves the KKT system of the free assets only, so a warm start close to the optimum needs few, small solves
+    n_assets = len(sigma)
+    if max_weight * n_assets < 1 - 1e-12:
+        raise ValueError(f"A cap of {max_weight} cannot hold a fully invested portfolio of {n_assets} assets")
+    weights = _starting_weights(np.diag(sigma), max_weight) if x0 is None else np.asarray(x0, dtype=float).copy()
+    lower = weights <= tolerance
+    upper = weights >= max_weight - tolerance
+    max_iterations = 10 * n_assets + 100 if max_iterations is None else max_iterations
+
+    for _ in range(max_iterations):
+        gradient = 2 * sigma @ weights - linear
+        free = np.flatnonzero(~(lower | upper))
+
+        # Step within the free assets that keeps the weights summing to 1: [2S_FF -1; 1' 0][p; nu] = [-g_F; 0]
+        kkt = np.zeros((len(free) + 1, len(free) + 1))
+        kkt[:-1, :-1] = 2 * sigma[np.ix_(free, free)]
+        kkt[:-1, -1] = -1
+        kkt[-1, :-1] = 1
+        solution = np.linalg.lstsq(kkt, np.r_[-gradient[free], 0], rcond=None)[0]
+        step, multiplier = solution[:-1], solution[-1]
+
+        if np.abs(step).max(initial=0) <= tolerance:
+            # Optimal for this working set; release the bound whose multiplier has the wrong sign, if any
+            violation = np.where(lower, gradient - multiplier, np.inf)
+            violation = np.minimum(violation, np.where(upper, multiplier - gradient, np.inf))
+            worst = int(np.argmin(violation))
+            if violation[worst] >= -tolerance:
+                break
+            lower[worst] = upper[worst] = False
+            continue
+
+        # Longest step before a free weight reaches a bound, which then joins the working set
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratios = np.where(step < 0, -weights[free] / step, np.where(step > 0, (max_weight - weights[free]) / step, np.inf))
+        blocking = int(np.argmin(ratios))
+        length = min(1.0, ratios[blocking])
+        weights[free] += length * step
+        if length < 1.0:
+            asset = free[blocking]
+            if step[blocking] < 0:
+                weights[asset], lower[asset] = 0.0, True
+            else:
+                weights[asset], upper[asset] = max_weight, True
+
+    weights = np.clip(weights, 0, max_weight)
+    return weights / weights.sum()
+
+
+def minimum_variance_weights(covariance, max_weight=1.0, x0=None):
+
+    sigma = covariance.values
+    weights = _solve(sigma, np.zeros(len(sigma)), max_weight, x0)
+    return pd.Series(weights, index=covariance.index, name="Minimum Variance")
+
+
+def _frontier_sweep(sigma, mu, max_weight, n_points):
+
+    # Solutions of w'Sw - t mu'w from t = 0 (minimum variance) up to the first t that reaches the highest attainable return
+    allocation = np.clip(1 - max_weight * np.arange(len(mu)), 0, max_weight)
+    highest = (allocation * np.sort(mu)[::-1]).sum()
+    weights = _solve(sigma, np.zeros(len(mu)), max_weight)
+    start = weights
+
+    aversion = 2 * np.trace(sigma) / len(mu) / max(np.abs(mu).max(), 1e-12)
+    for _ in range(60):
+        weights = _solve(sigma, aversion * mu, max_weight, weights)
+        if weights @ mu >= highest - 1e-9 * max(abs(highest), 1):
+            break
+        aversion *= 2
+
+    # A dense warm-started sweep over t; neighbouring solves differ by a few active-set changes
+    aversions = np.r_[0, np.geomspace(aversion * 1e-4, aversion, 4 * n_points)]
+    points = [start]
+    for value in aversions[1:]:
+        points.append(_solve(sigma, value * mu, max_weight, points[-1]))
+
+    return aversions, np.array(points)
+
+
+def efficient_frontier(covariance, expected_returns, n_points=25, max_weight=1.0):
+
+    sigma = covariance.values
+    mu = expected_returns.reindex(covariance.index).values
+
+    # Each solve starts from the previous point's weights and active set
+    _, points = _frontier_sweep(sigma, mu, max_weight, n_points)
+
+    # The sweep's points nearest to evenly spaced target returns
+    returns = points @ mu
+    targets = np.linspace(returns[0], returns[-1], n_points)
+    points = points[np.unique(np.abs(returns[None, :] - targets[:, None]).argmin(axis=1))]
+    points = pd.DataFrame(points, columns=covariance.index)
+    frontier = pd.DataFrame({"Expected Return": points.values @ mu,
+                             "Volatility": np.sqrt(np.einsum("ij,jk,ik->i", points.values, sigma, points.values))})
+    return frontier, points
+
+
+def maximum_sharpe_weights(covariance, expected_returns, risk_free=0.0, max_weight=1.0, n_points=25):
+
+    sigma = covariance.values
+    excess = expected_returns.reindex(covariance.index).values - risk_free
+
+    def sharpe(weights):
+        return weights @ excess / np.sqrt(weights @ sigma @ weights)
+
+    # The tangency portfolio lies on the frontier: the sweep, then golden-section search between the neighbours of the best point
+    aversions, points = _frontier_sweep(sigma, excess, max_weight, n_points)
+    ratios = [sharpe(weights) for weights in points]
+    best = int(np.argmax(ratios))
+    low, high = aversions[max(best - 1, 0)], aversions[min(best + 1, len(aversions) - 1)]
+    best_ratio, best_weights = ratios[best], points[best]
+
+    golden = (np.sqrt(5) - 1) / 2
+    for _ in range(40):
+        left, right = high - golden * (high - low), low + golden * (high - low)
+        left_weights = _solve(sigma, left * excess, max_weight, best_weights)
+        right_weights = _solve(sigma, right * excess, max_weight, best_weights)
+        left_ratio, right_ratio = sharpe(left_weights), sharpe(right_weights)
+        if left_ratio >= right_ratio:
+            high = right
+            if left_ratio > best_ratio:
+                best_ratio, best_weights = left_ratio, left_weights
+        else:
+            low = left
+            if right_ratio > best_ratio:
+                best_ratio, best_weights = right_ratio, right_weights
+        if high - low <= 1e-9 * max(high, 1e-12):
+            break
+
+    return pd.Series(best_weights, index=covariance.index, name="Maximum Sharpe")
+
+
+def risk_parity_weights(covariance, budgets=None, tolerance=1e-10, max_iterations=100):
+
+    # Newton's method on the convex form: min 0.5 y'Sy - sum(b log y), whose solution has risk contributions equal to b
+    sigma = covariance.values
+    n_assets = len(sigma)
+    budgets = np.full(n_assets, 1 / n_assets) if budgets is None else np.asarray(budgets, dtype=float) / np.sum(budgets)
+    y = budgets / np.sqrt(np.diag(sigma))
+
+    for _ in range(max_iterations):
+        gradient = sigma @ y - budgets / y
+        hessian = sigma + np.diag(budgets / y ** 2)
+        step = np.linalg.solve(hessian, gradient)
+
+        # Backtracking keeps every y positive
+        scale = 1.0
+        while np.any(y - scale * step <= 0):
+            scale /= 2
+        y = y - scale * step
+        if np.abs(gradient).max() < tolerance:
+            break
+
+    return pd.Series(y / y.sum(), index=covariance.index, name="Risk Parity")
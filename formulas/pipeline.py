@@ -0,0 +1,264 @@
+"""Functions to Refresh the data/ Tables and Report Charts Headlessly as a Dependency Graph of Stages"""
+
+# Required libraries and dependencies
+import argparse
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+import pandas as pd
+from formulas.artifacts import data_path, pipeline_manifest, write_artifact, read_artifact
+from formulas.fetch import fetch_lane, missing_assets, use_chunk_store
+from formulas.journal import journal_modes, install_journal, journal_summary
+
+# Bump a stage's version whenever its code changes so its artifacts are rebuilt
+stage_versions = {"crypto_prices": 1, "crypto_statistics": 1, "power_rankings": 1, "stock_prices": 1,
+                  "mvrv_data": 1, "static_report": 1, "regression_charts": 1, "screener": 1}
+
+
+"""Stage Functions that each produce one or more DataFrames (or chart files) from the run parameters and upstream tables"""
+
+def _crypto_prices(run, inputs):
+    from formulas.filters import load_crypto_prices
+    crypto_returns, crypto_prices = load_crypto_prices(run["start"], run["end"], assets=run["assets"])
+    return {"crypto_prices": crypto_prices, "crypto_returns": crypto_returns}
+
+
+def _crypto_statistics(run, inputs):
+    from formulas.filters import load_crypto_statistics
+    return {"crypto_statistics": load_crypto_statistics(run["start"], run["end"], assets=run["assets"])}
+
+
+def _power_rankings(run, inputs):
+    from formulas.filters import load_power_rankings
+    return {"power_rankings": load_power_rankings(run["start"], run["end"], assets=run["assets"])}
+
+
+def _stock_prices(run, inputs):
+    from formulas.filters import load_stock_prices
+    return {"stock_prices": load_stock_prices(run["start"], run["end"])}
+
+
+def _mvrv_data(run, inputs):
+    from formulas.filters import load_mvrv_data
+    return {"mvrv_data": load_mvrv_data(run["start"], run["end"])}
+
+
+def _static_report(run, inputs):
+    from formulas.render_cache import refresh_report
+    refresh_report(inputs["crypto_prices"], output_path=run["charts"])
+    return {}
+
+
+def _regression_charts(run, inputs):
+    from formulas.regression_report import render_regression_report
+    render_regression_report(inputs["crypto_prices"], output_path=run["charts"])
+    return {}
+
+
+def _screener(run, inputs):
+    from formulas.filters import column_names
+    from formulas.screener import screener_metrics, latest_mvrv
+    mvrv = latest_mvrv(inputs["mvrv_data"])
+    mvrv.index = column_names(mvrv.index)
+    return {"screener_metrics": screener_metrics(inputs["crypto_prices"], inputs["stock_prices"][["S&P 500 (SPY)"]], mvrv)}
+
+
+# Stage: (function, upstream stages, whether it reads the run parameters or only its upstream tables)
+stages = {
+    "crypto_prices": (_crypto_prices, [], True),
+    "crypto_statistics": (_crypto_statistics, [], True),
+    "power_rankings": (_power_rankings, [], True),
+    "stock_prices": (_stock_prices, [], True),
+    "mvrv_data": (_mvrv_data, [], True),
+    "static_report": (_static_report, ["crypto_prices"], False),
+    "regression_charts": (_regression_charts, ["crypto_prices"], False),
+    "screener": (_screener, ["crypto_prices", "stock_prices", "mvrv_data"], False),
+}
+
+
+"""Graph Functions to order the stages, hash their inputs and read/write the versioned artifacts"""
+
+def stage_order(selected=None):
+
+    # The selected stages plus everything upstream of them, dependencies first
+    order = []
+
+    def visit(name, path=()):
+        if name in path:
+            raise ValueError(f"Pipeline stages form a cycle: {' -> '.join(path + (name,))}")
+        if name in order:
+            return
+        for dependency in stages[name][1]:
+            visit(dependency, path + (name,))
+        order.append(name)
+
+    for name in (selected or list(stages)):
+        if name not in stages:
+            raise ValueError(f"Unknown pipeline stage '{name}', expected one of {', '.join(stages)}")
+        visit(name)
+
+    return order
+
+
+def file_hash(path):
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as artifact:
+        for block in iter(lambda: artifact.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def input_hash(name, run, manifest):
+
+    # Fetch stages are keyed on their parameters; derived stages on the content of the tables they read
+    function, dependencies, uses_run = stages[name]
+    digest = hashlib.sha256(f"{name}:{stage_versions[name]}".encode())
+    if uses_run:
+        digest.update(json.dumps({"start": run["start"], "end": run["end"], "assets": run["assets"]}).encode())
+    for dependency in dependencies:
+        for artifact, entry in sorted(manifest[dependency]["artifacts"].items()):
+            digest.update(f"{artifact}:{entry['sha256']}".encode())
+
+    return digest.hexdigest()[:20]
+
+
+def store_artifact(name, table, stamp, output_path=data_path):
+
+    # Same naming as the old CSV snapshots, e.g. data/crypto_prices_04.04.22.parquet
+    path = Path(output_path) / f"{name}_{stamp}.parquet"
+    manifest = write_artifact(table, path)
+    return dict(manifest, sha256=file_hash(path), missing=missing_assets(table))
+
+
+def _is_current(name, digest, manifest, output_path):
+
+    # A table stored with missing assets is refetched on the next run even if its inputs are unchanged
+    entry = manifest.get(name)
+    return (entry is not None and entry["input_hash"] == digest
+            and all((Path(output_path) / artifact["file"]).exists() and not artifact.get("missing")
+                    for artifact in entry["artifacts"].values()))
+
+
+"""Pipeline Run Function to execute independent stages in parallel and skip the ones whose inputs are unchanged"""
+
+def run_pipeline(selected=None, start=None, end=None, assets=None, output_path=data_path, max_workers=4, force=False):
+
+    from formulas.render_cache import charts_path
+
+    # The app's default date range is only looked up when a run does not name its own
+    if start is None or end is None:
+        from formulas.filters import start_date, end_date
+        start, end = start_date if start is None else start, end_date if end is None else end
+
+    output_path = Path(output_path)
+    output_path.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_path / pipeline_manifest
+    manifest = {}
+    if manifest_path.exists():
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+
+    end = pd.to_datetime(end)
+    run = {"start": str(pd.to_datetime(start).date()), "end": str(end.date()),
+           "assets": None if assets is None else list(assets)}
+
+    # Report images go to the tracked charts/ only for the default data/ run; any other output keeps its own <output>/charts
+    run["charts"] = str(charts_path if output_path.resolve() == data_path.resolve() else output_path / "charts")
+    stamp = end.strftime("%m.%d.%y")
+
+    order = stage_order(selected)
+    status = {}
+    done = set()
+    running = {}
+
+    def execute(name):
+        timer = time.perf_counter()
+        inputs = {artifact: read_artifact(output_path / entry["file"])
+                  for dependency in stages[name][1] for artifact, entry in manifest[dependency]["artifacts"].items()}
+        # Headless refreshes queue behind interactive page requests at the rate limiter
+        with fetch_lane("background"):
+            tables = stages[name][0](run, inputs)
+        artifacts = {artifact: store_artifact(artifact, table, stamp, output_path) for artifact, table in tables.items()}
+        return artifacts, time.perf_counter() - timer
+
+    # Stages start as soon as their upstream stages are finished; fetches and chart rendering overlap
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while len(done) < len(order):
+            for name in order:
+                if name in done or name in running or not all(dependency in done for dependency in stages[name][1]):
+                    continue
+                digest = input_hash(name, run, manifest)
+                if not force and _is_current(name, digest, manifest, output_path):
+                    status[name] = "skipped"
+                    done.add(name)
+                    continue
+                running[name] = (pool.submit(execute, name), digest)
+
+            if not running:
+                continue
+            finished, _ = wait([future for future, _ in running.values()], return_when=FIRST_COMPLETED)
+            for name in [name for name, (future, _) in running.items() if future in finished]:
+                future, digest = running.pop(name)
+                artifacts, seconds = future.result()
+                manifest[name] = {"input_hash": digest, "artifacts": artifacts, "seconds": round(seconds, 2),
+                                  "finished": pd.Timestamp.now().isoformat(timespec="seconds")}
+                missing = sorted({asset for artifact in artifacts.values() for asset in artifact["missing"]})
+                status[name] = f"ran, missing {', '.join(missing)}" if missing else "ran"
+                done.add(name)
+
+            # Written after every stage so an interrupted run keeps what it already finished
+            with open(manifest_path, "w") as manifest_file:
+                json.dump(manifest, manifest_file, indent=2)
+
+    with open(manifest_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    return status
+
+
+# Refreshes every data/ table, or just the named stages and their dependencies: python -m formulas.pipeline power_rankings
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the data/ tables and report charts without starting Streamlit")
+    parser.add_argument("stages", nargs="*", help=f"stages to refresh (default: all of {', '.join(stages)})")
+    parser.add_argument("--start", default=None, help="first date to pull (default: formulas.filters.start_date)")
+    parser.add_argument("--end", default=None, help="last date to pull (default: today)")
+    parser.add_argument("--output", default=None, help="directory for the artifacts and pipeline.json (default: data/, or data/synthetic with --synthetic)")
+    parser.add_argument("--workers", type=int, default=4, help="stages run at the same time")
+    parser.add_argument("--force", action="store_true", help="rerun stages even when their inputs are unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="print the stage order and exit")
+    parser.add_argument("--synthetic", type=int, default=0, help="serve this many synthetic assets instead of calling Messari")
+    parser.add_argument("--no-chunk-store", action="store_true", help="refetch every date chunk instead of reusing <output>/chunks")
+    parser.add_argument("--journal", choices=journal_modes, default="observe", help="record upstream responses, or replay them offline")
+    parser.add_argument("--archive", default=None, help="response archive for --journal record/replay (default: data/archive)")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        for name in stage_order(args.stages):
+            print(f"{name} <- {', '.join(stages[name][1]) or '(run parameters)'}")
+        raise SystemExit
+
+    assets = None
+    if args.synthetic:
+        from formulas.synthetic import install_synthetic_client
+        assets = install_synthetic_client(n_assets=args.synthetic)
+
+    # Synthetic runs never write over the real tables or the tracked report images
+    if args.output is None:
+        args.output = str(data_path / "synthetic" if args.synthetic else data_path)
+
+    # Completed date chunks are kept between runs, so an interrupted backfill only fetches what it had not finished
+    if not (args.synthetic or args.no_chunk_store):
+        use_chunk_store(Path(args.output) / "chunks")
+
+    install_journal(args.journal, args.archive)
+
+    timer = time.perf_counter()
+    status = run_pipeline(args.stages, args.start, args.end, assets, args.output, args.workers, args.force)
+    for name, outcome in status.items():
+        print(f"{name}: {outcome}")
+    print(f"Finished in {time.perf_counter() - timer:.2f}s")
+    if len(journal_summary()):
+        print(journal_summary().to_string())
@@ -0,0 +1,92 @@
+"""Functions to Project Future Prices with Monte Carlo Paths and Summarize Them as Percentile Fans"""
+
+# Required libraries and dependencies
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+projection_methods = {"Geometric Brownian Motion": "gbm", "Block Bootstrap": "bootstrap"}
+fan_percentiles = (5, 25, 50, 75, 95)
+
+
+def _log_returns(prices):
+
+    prices = prices.dropna().values.astype(float)
+    return np.diff(np.log(prices))
+
+
+"""Path Simulation Functions that draw every path at once as a (paths x horizon) matrix of log returns"""
+
+def gbm_log_returns(history, horizon, n_paths, rng):
+
+    # Constant drift and volatility estimated from the daily log returns
+    return rng.normal(history.mean(), history.std(ddof=1), size=(n_paths, horizon))
+
+
+def bootstrap_log_returns(history, horizon, n_paths, rng, block=10):
+
+    # Contiguous blocks of history keep volatility clustering and short-term autocorrelation
+    block = max(1, min(block, len(history)))
+    n_blocks = -(-horizon // block)
+    starts = rng.integers(0, len(history) - block + 1, size=(n_paths, n_blocks))
+    positions = (starts[:, :, None] + np.arange(block)).reshape(n_paths, -1)[:, :horizon]
+    return history[positions]
+
+
+def simulate_paths(prices, horizon=180, n_paths=2000, method="gbm", block=10, seed=0):
+
+    history = _log_returns(prices)
+    if len(history) < 2:
+        raise ValueError("At least three prices are needed to simulate paths")
+
+    rng = np.random.default_rng(seed)
+    if method == "gbm":
+        log_returns = gbm_log_returns(history, horizon, n_paths, rng)
+    elif method == "bootstrap":
+        log_returns = bootstrap_log_returns(history, horizon, n_paths, rng, block)
+    else:
+        raise ValueError(f"Unknown projection method '{method}', expected one of {', '.join(projection_methods.values())}")
+
+    # Price levels from the last observed price, compounding in place
+    np.cumsum(log_returns, axis=1, out=log_returns)
+    return prices.dropna().iloc[-1] * np.exp(log_returns)
+
+
+"""Percentile Fan Functions to summarize the simulated paths for one asset or the whole universe"""
+
+def percentile_fan(paths, dates, percentiles=fan_percentiles):
+
+    fan = np.percentile(paths, percentiles, axis=0).T
+    return pd.DataFrame(fan, index=dates, columns=[f"P{percentile}" for percentile in percentiles])
+
+
+def project_prices(prices, horizon=180, n_paths=2000, method="gbm", block=10, seed=0, percentiles=fan_percentiles):
+
+    # The fan starts one step after the last observed date at the series' own spacing (daily for crypto)
+    prices = prices.dropna()
+    step = pd.Timedelta(days=1) if len(prices) < 2 else prices.index[-1] - prices.index[-2]
+    dates = pd.date_range(prices.index[-1] + step, periods=horizon, freq=step, name=prices.index.name)
+
+    paths = simulate_paths(prices, horizon, n_paths, method, block, seed)
+    return percentile_fan(paths, dates, percentiles)
+
+
+def _project_asset(job):
+
+    asset, prices, options = job
+    return asset, project_prices(prices, **options)
+
+
+def project_universe(crypto_prices, horizon=180, n_paths=2000, method="gbm", block=10, seed=0, max_workers=None):
+
+    # Independent seeds per asset keep every fan reproducible however the jobs are scheduled
+    seeds = np.random.SeedSequence(seed).spawn(crypto_prices.shape[1])
+    jobs = [(asset, crypto_prices[asset], {"horizon": horizon, "n_paths": n_paths, "method": method, "block": block,
+                                            "seed": np.random.default_rng(child).integers(2 ** 32)})
+            for asset, child in zip(crypto_prices.columns, seeds) if crypto_prices[asset].notna().sum() >= 3]
+
+    if max_workers == 1 or len(jobs) < 2:
+        return dict(map(_project_asset, jobs))
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        return dict(pool.map(_project_asset, jobs, chunksize=max(1, len(jobs) // (4 * (max_workers or os.cpu_count())))))
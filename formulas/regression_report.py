@@ -0,0 +1,107 @@
+"""Functions to Batch-Render the Per-Asset Linear Regression Charts across a Pool of Processes"""
+
+# Required libraries and dependencies
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from formulas.render_cache import charts_path, chart_slug, job_hash, render_regression_chart
+
+# Price matrix loaded once per worker process by the pool initializer
+_worker_prices = None
+
+
+def _init_worker(crypto_prices):
+
+    # Each worker receives the matrix a single time instead of once per asset job
+    global _worker_prices
+    _worker_prices = crypto_prices
+
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _render_asset(asset, path):
+
+    timer = time.perf_counter()
+    render_regression_chart(path, asset, _worker_prices[asset])
+    return time.perf_counter() - timer
+
+
+"""Regression Report Functions to fan the asset jobs out over the pool and record a manifest"""
+
+def regression_chart_name(asset):
+
+    # Same file names as the charts/*_linear_regression.png set
+    return chart_slug(asset) + "_linear_regression.png"
+
+
+def render_regression_report(crypto_prices, output_path=charts_path, assets=None, max_workers=None, force=False):
+
+    output_path = Path(output_path)
+    output_path.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_path / "regression_manifest.json"
+    previous = {}
+    if manifest_path.exists() and not force:
+        with open(manifest_path) as manifest_file:
+            previous = json.load(manifest_file)
+
+    assets = list(crypto_prices.columns) if assets is None else list(assets)
+    manifest = {}
+    pending = []
+    for asset in assets:
+        prices = crypto_prices[asset].dropna()
+        if prices.empty:
+            continue
+        path = output_path / regression_chart_name(asset)
+        digest = job_hash("linear_regression", render_regression_chart, {"asset": asset, "prices": prices})
+        manifest[asset] = {"file": path.name, "hash": digest,
+                           "start": prices.index[0].strftime("%Y-%m-%d"), "end": prices.index[-1].strftime("%Y-%m-%d")}
+
+        # An image drawn from identical data is left as it is
+        if previous.get(asset, {}).get("hash") == digest and path.exists():
+            continue
+        pending.append((asset, str(path)))
+
+    # Asset names are the only thing sent per job; workers look the prices up in their preloaded matrix
+    if pending:
+        matrix = crypto_prices[[asset for asset, _ in pending]]
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                 initializer=_init_worker, initargs=(matrix,)) as pool:
+            futures = {asset: pool.submit(_render_asset, asset, path) for asset, path in pending}
+            for asset, future in futures.items():
+                manifest[asset]["render_seconds"] = round(future.result(), 3)
+
+    with open(manifest_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    return manifest
+
+
+# Redraws every asset's regression chart: python -m formulas.regression_report --workers 8
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the per-asset linear regression charts in parallel")
+    parser.add_argument("--output", default=str(charts_path), help="directory for the images and regression_manifest.json")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (defaults to the CPU count)")
+    parser.add_argument("--force", action="store_true", help="redraw images even when their data is unchanged")
+    parser.add_argument("--synthetic", type=int, default=0, help="render this many synthetic assets instead of calling Messari")
+    parser.add_argument("--days", type=int, default=2000, help="days of synthetic history")
+    args = parser.parse_args()
+
+    timer = time.perf_counter()
+    if args.synthetic:
+        from formulas.synthetic import SyntheticMessari
+        crypto_prices = SyntheticMessari(n_assets=args.synthetic, n_days=args.days).prices
+    else:
+        from formulas.fetch import fetch_lane
+        from formulas.filters import load_crypto_prices, start_date, end_date
+        with fetch_lane("background"):
+            crypto_returns, crypto_prices = load_crypto_prices(start_date, end_date)
+    loaded = time.perf_counter() - timer
+
+    manifest = render_regression_report(crypto_prices, args.output, max_workers=args.workers, force=args.force)
+    redrawn = sum("render_seconds" in entry for entry in manifest.values())
+    print(f"Loaded {crypto_prices.shape[1]} assets in {loaded:.2f}s; "
+          f"redrew {redrawn} of {len(manifest)} charts in {time.perf_counter() - timer - loaded:.2f}s")
@@ -0,0 +1,207 @@
+"""Functions to Pre-Render the Static Report Charts in Parallel and Cache Them by Data Hash"""
+
+# Required libraries and dependencies
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pandas as pd
+from formulas.alignment import trailing_window, pairwise_correlations
+from formulas.dates import linear_trend
+from formulas.drawdowns import drawdown_analytics
+from formulas.risk import risk_metrics
+
+# Bump whenever the chart code changes so every cached image is redrawn
+render_version = 1
+
+charts_path = Path(__file__).resolve().parents[1] / "charts"
+
+# Assets whose committed chart files predate their current label (BNB Smart Chain was renamed BNB Chain)
+chart_slugs = {"BNB Chain (BNB)": "bnb_smart_chain", "BNB": "bnb_smart_chain"}
+
+
+def chart_slug(asset):
+
+    # File-name stem of an asset's charts, e.g. "Bitcoin (BTC)" -> "bitcoin"
+    return chart_slugs.get(asset, asset.split(" (")[0].lower().replace(" ", "_"))
+
+
+def _init_worker():
+
+    # Workers draw off-screen; each worker is a fresh process that has not drawn anything yet, so Agg can still be selected there
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+"""Chart Functions that run inside the worker processes and write one PNG each"""
+
+def render_regression_chart(path, asset, prices):
+
+    import matplotlib.pyplot as plt
+
+    # Linear regression channel of cumulative returns with 1 and 2 standard deviation bands
+    prices = prices.dropna()
+    cumulative_returns = prices / prices.iloc[0]
+    slope, intercept, fittedline = linear_trend(prices.index, cumulative_returns.values)
+    std = cumulative_returns.std()
+
+    fig = plt.figure(figsize=(16, 9))
+    plt.plot(prices.index, cumulative_returns, label="original", color="black")
+    plt.plot(prices.index, fittedline, label="prediction", color="red")
+    plt.plot(prices.index, fittedline + std, label="1 Standard Deviation", color="green")
+    plt.plot(prices.index, fittedline - std, label="1 Standard Deviation", color="green")
+    plt.plot(prices.index, fittedline + std * 2, label="2 Standard Deviations", color="blue")
+    plt.plot(prices.index, fittedline - std * 2, label="2 Standard Deviations", color="blue")
+    plt.plot(prices.index, cumulative_returns.rolling(window=200).mean(), label="SMA 200", color="grey")
+    plt.plot(prices.index, cumulative_returns.rolling(window=50).mean(), label="SMA 50", color="lightgrey")
+
+    plt.xlabel("Date")
+    plt.ylabel("Price Change")
+    plt.suptitle(f"Linear Regression of {asset} Timeseries Data")
+    plt.legend(loc="best")
+    fig.savefig(path)
+    plt.close(fig)
+
+    return path
+
+
+def render_bar_chart(path, title, values):
+
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(12, 7))
+    values.plot.bar(color="black", rot=45)
+    plt.title(title)
+    plt.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+    return path
+
+
+def render_heatmap(path, title, matrix):
+
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(12, 10))
+    image = ax.imshow(matrix.values, cmap="Greys", vmin=0, vmax=1)
+    ax.set_xticks(range(len(matrix.columns)))
+    ax.set_xticklabels(matrix.columns, rotation=45, ha="right")
+    ax.set_yticks(range(len(matrix.index)))
+    ax.set_yticklabels(matrix.index)
+    fig.colorbar(image)
+    ax.set_title(title)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+    return path
+
+
+"""Report Job Functions to describe every report image and hash the data it is drawn from"""
+
+def report_jobs(crypto_prices):
+
+    # (name, chart function, arguments) for the cross-asset images kept in charts/; the per-asset regression
+    # channels are drawn once by formulas.regression_report and only linked into the report by load_report
+    jobs = []
+
+    last_year = trailing_window(crypto_prices, 365)
+    growth = {"price_growth_last_12_months": ("Price Growth (Last 12 Months)", 365),
+              "price_growth_last_180_days": ("Price Growth (Last 180 Days)", 180),
+              "price_growth_last_90_days": ("Price Growth (Last 90 Days)", 90)}
+    for name, (title, days) in growth.items():
+        window = trailing_window(crypto_prices, days)
+        jobs.append((name, render_bar_chart, {"title": title, "values": (window.ffill().iloc[-1] / window.bfill().iloc[0]).sort_values(ascending=False)}))
+
+    _, drawdown_summary, _ = drawdown_analytics(last_year, top_n=1)
+    metrics = risk_metrics(last_year)
+    jobs.append(("price_peak_to_trough", render_bar_chart, {"title": "Price Peak-to-Trough (Last 12 Months)", "values": drawdown_summary["Max Drawdown"].sort_values()}))
+    jobs.append(("sortino_ratios", render_bar_chart, {"title": "Sortino Ratios (Last 12 Months)", "values": metrics["Sortino Ratio"].sort_values(ascending=False)}))
+    jobs.append(("price_correlations_last_12_months", render_heatmap, {"title": "Price Correlations (Last 12 Months, r^2)", "matrix": pairwise_correlations(last_year.pct_change()) ** 2}))
+
+    return jobs
+
+
+def job_hash(name, function, arguments):
+
+    # Hash of everything that determines the picture: chart code version, function, parameters and data
+    digest = hashlib.sha256(f"{render_version}:{name}:{function.__name__}".encode())
+    for key in sorted(arguments):
+        value = arguments[key]
+        digest.update(key.encode())
+        if isinstance(value, (pd.Series, pd.DataFrame)):
+            digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+            digest.update(str(list(value.columns) if isinstance(value, pd.DataFrame) else value.name).encode())
+        else:
+            digest.update(repr(value).encode())
+
+    return digest.hexdigest()[:20]
+
+
+"""Report Refresh Function to redraw only the images whose data changed, across a pool of processes"""
+
+def refresh_report(crypto_prices, output_path=charts_path, jobs=None, max_workers=None):
+
+    output_path = Path(output_path)
+    cache_path = output_path / "cache"
+    cache_path.mkdir(parents=True, exist_ok=True)
+
+    jobs = report_jobs(crypto_prices) if jobs is None else jobs
+    manifest = {}
+    pending = []
+    for name, function, arguments in jobs:
+        digest = job_hash(name, function, arguments)
+        path = cache_path / f"{digest}.png"
+        manifest[name] = {"file": str(path.relative_to(output_path)), "hash": digest, "cached": path.exists()}
+        if not path.exists():
+            pending.append((function, path, arguments))
+
+    # Unchanged images are skipped; the rest are drawn in parallel and written under their content hash
+    if pending:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), initializer=_init_worker) as pool:
+            futures = [pool.submit(function, str(path), **arguments) for function, path, arguments in pending]
+            for future in futures:
+                future.result()
+
+    with open(output_path / "manifest.json", "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    # Images no longer referenced by the manifest are removed so the cache does not grow without bound
+    referenced = {output_path / entry["file"] for entry in manifest.values()}
+    for path in cache_path.glob("*.png"):
+        if path not in referenced:
+            path.unlink()
+
+    return manifest
+
+
+def load_report(output_path=charts_path):
+
+    # Report view: image paths by chart name from the latest refreshes, or empty before the first one
+    report = {}
+    manifest_path = Path(output_path) / "manifest.json"
+    if manifest_path.exists():
+        with open(manifest_path) as manifest_file:
+            report.update({name: Path(output_path) / entry["file"] for name, entry in json.load(manifest_file).items()})
+
+    # Regression channels written by formulas.regression_report into the same directory
+    regression_path = Path(output_path) / "regression_manifest.json"
+    if regression_path.exists():
+        with open(regression_path) as manifest_file:
+            report.update({Path(entry["file"]).stem: Path(output_path) / entry["file"] for entry in json.load(manifest_file).values()})
+
+    return report
+
+
+# Redraws the report after a data refresh: python -m formulas.render_cache
+if __name__ == "__main__":
+    from formulas.fetch import fetch_lane
+    from formulas.filters import load_crypto_prices, start_date, end_date
+
+    with fetch_lane("background"):
+        crypto_returns, crypto_prices = load_crypto_prices(start_date, end_date)
+    manifest = refresh_report(crypto_prices)
+    redrawn = [name for name, entry in manifest.items() if not entry["cached"]]
+    print(f"{len(redrawn)} of {len(manifest)} report images redrawn")
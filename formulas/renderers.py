@@ -0,0 +1,65 @@
+"""Functions to Build Bokeh Bar and Heatmap Panels Directly from NumPy Arrays"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+from bokeh.models import ColumnDataSource, HoverTool, LinearColorMapper
+from bokeh.palettes import Greys256
+from bokeh.plotting import figure
+
+
+"""Bar Chart Function to draw one bar per metric, replacing hvplot.bar -> holoviews -> hv.render"""
+
+def bar_chart(data, color="black", hover_color="green", rot=45, width=700, height=300):
+
+    # A one-row DataFrame (or a Series) of metrics becomes categorical bars
+    series = data.iloc[0] if isinstance(data, pd.DataFrame) else data
+    labels = [str(label) for label in series.index]
+    source = ColumnDataSource({"label": labels, "value": series.values.astype(np.float64)})
+
+    chart = figure(x_range=labels, width=width, height=height, toolbar_location="above",
+                   tools="pan,wheel_zoom,box_zoom,save,reset")
+    chart.vbar(x="label", top="value", width=.8, source=source, color=color, hover_color=hover_color)
+    chart.add_tools(HoverTool(tooltips=[("Metric", "@label"), ("Value", "@value{0.00}")]))
+
+    chart.xaxis.major_label_orientation = np.radians(rot)
+    chart.xgrid.grid_line_color = None
+    chart.y_range.start = min(0, float(np.nanmin(source.data["value"]))) if len(labels) else 0
+
+    return chart
+
+
+"""Heatmap Function to draw a labelled matrix of values, replacing hvplot.heatmap -> holoviews -> hv.render"""
+
+def heatmap(data, cmap=Greys256[::-1], rot=45, xaxis=True, width=700, height=None, low=None, high=None):
+
+    # A Series is drawn as a single column strip; a DataFrame keeps its rows and columns
+    frame = data.to_frame() if isinstance(data, pd.Series) else data
+    x_labels = [str(label) for label in frame.columns]
+    y_labels = [str(label) for label in frame.index]
+    values = frame.values.astype(np.float64)
+
+    # Cell coordinates for every value, built with array broadcasting
+    source = ColumnDataSource({
+        "x": np.tile(np.array(x_labels, dtype=object), len(y_labels)),
+        "y": np.repeat(np.array(y_labels, dtype=object), len(x_labels)),
+        "value": values.ravel(),
+    })
+    mapper = LinearColorMapper(palette=list(cmap),
+                               low=np.nanmin(values) if low is None else low,
+                               high=np.nanmax(values) if high is None else high,
+                               nan_color="white")
+
+    height = height if height is not None else max(150, 40 + 30 * len(y_labels))
+    chart = figure(x_range=x_labels, y_range=list(reversed(y_labels)), width=width, height=height,
+                   toolbar_location="above", tools="save,reset")
+    chart.rect(x="x", y="y", width=1, height=1, source=source, line_color=None,
+               fill_color={"field": "value", "transform": mapper})
+    chart.add_tools(HoverTool(tooltips=[("", "@y / @x"), ("Value", "@value{0.00}")]))
+
+    chart.xaxis.major_label_orientation = np.radians(rot)
+    chart.xaxis.visible = xaxis
+    chart.grid.grid_line_color = None
+    chart.axis.axis_line_color = None
+
+    return chart
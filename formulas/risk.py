@@ -0,0 +1,108 @@
+"""Functions to Calculate Annualized Risk/Return Ratios for Every Asset in a Price Matrix"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from formulas.drawdowns import drawdown_series
+
+# Daily 10-Year US Treasury yields are stored locally; the constant is only used until the file exists
+risk_free_rate_path = Path(__file__).resolve().parents[1] / "data" / "risk_free_rate.csv"
+risk_free_rate_url = "https://fred.stlouisfed.org/graph/fredgraph.csv?id=DGS10"
+default_risk_free_rate = .025
+
+
+"""Risk-Free Rate Functions to keep a local daily curve of the 10-Year US Treasury Yield"""
+
+def update_risk_free_rate(path=risk_free_rate_path):
+
+    # FRED publishes DGS10 in percent with "." on market holidays
+    rates = pd.read_csv(risk_free_rate_url, index_col=0, parse_dates=True, na_values=".")
+    rates = (rates.iloc[:, 0] / 100).dropna().rename("Rate").rename_axis("Date")
+    rates.to_csv(path)
+
+    return rates
+
+
+def load_risk_free_rate(index, path=risk_free_rate_path, default=default_risk_free_rate):
+
+    # Annual yields carried forward onto the requested dates (weekends and holidays keep the last close)
+    dates = index.tz_localize(None) if index.tz is not None else index
+    if Path(path).exists():
+        rates = pd.read_csv(path, index_col="Date", parse_dates=True)["Rate"]
+        rates = rates.reindex(rates.index.union(dates)).ffill().bfill().reindex(dates)
+    else:
+        rates = pd.Series(default, index=dates)
+
+    return pd.Series(rates.fillna(default).values, index=index, name="Rate")
+
+
+def periods_per_year(index):
+
+    # Observation frequency measured from the dates themselves: 365 for daily crypto, ~252 for exchange days
+    if len(index) < 2:
+        return 365.0
+    span_years = (index[-1] - index[0]) / pd.Timedelta(days=365.25)
+
+    return (len(index) - 1) / span_years
+
+
+"""Risk Metrics Function to get returns, volatility, drawdown and Sharpe/Sortino/Calmar ratios for every asset at once"""
+
+def risk_metrics(prices, risk_free=None):
+
+    prices = prices.to_frame() if isinstance(prices, pd.Series) else prices
+    ppy = periods_per_year(prices.index)
+
+    # Returns across a missing day span the gap; days without a price stay NaN
+    filled = prices.ffill().values.astype(float)
+    observed = ~np.isnan(prices.values.astype(float))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = filled[1:] / filled[:-1] - 1
+    valid = observed[1:] & ~np.isnan(returns)
+    returns = np.where(valid, returns, 0.0)
+    count = valid.sum(axis=0)
+    n = np.maximum(count, 1)
+
+    # Per-period risk-free rate on each return date, from the stored annual curve unless one is passed in
+    if risk_free is None:
+        annual_rates = load_risk_free_rate(prices.index)
+    elif isinstance(risk_free, pd.Series):
+        annual_rates = risk_free.reindex(prices.index, method="ffill").fillna(default_risk_free_rate)
+    else:
+        annual_rates = pd.Series(risk_free, index=prices.index)
+    period_rates = ((1 + annual_rates.values[1:]) ** (1 / ppy) - 1)[:, None]
+
+    # Geometric growth and its annualized rate over each asset's own observed span
+    log_growth = np.log1p(returns).sum(axis=0)
+    total_return = np.expm1(log_growth)
+    annualized_return = np.expm1(log_growth * ppy / n)
+    annualized_rate = np.expm1(np.log1p(np.where(valid, period_rates, 0)).sum(axis=0) * ppy / n)
+
+    # Volatility and downside deviation below the risk-free rate, without building masked copies
+    mean = returns.sum(axis=0) / n
+    variance = (np.where(valid, returns - mean, 0) ** 2).sum(axis=0) / np.maximum(count - 1, 1)
+    volatility = np.sqrt(variance * ppy)
+    shortfall = np.minimum(returns - period_rates, 0) * valid
+    downside_deviation = np.sqrt((shortfall ** 2).sum(axis=0) / n * ppy)
+
+    _, drawdowns = drawdown_series(prices)
+    max_drawdown = drawdowns.min().values
+    peak = np.nanmax(np.exp(np.cumsum(np.log1p(returns), axis=0)), axis=0) if len(returns) else np.full(len(count), np.nan)
+
+    excess_return = annualized_return - annualized_rate
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics = pd.DataFrame({
+            "Total Return": total_return,
+            "Annualized Return": annualized_return,
+            "Annual Volatility": volatility,
+            "Downside Deviation": downside_deviation,
+            "Max Drawdown": max_drawdown,
+            "Peak": peak,
+            "Sharpe Ratio": excess_return / volatility,
+            "Sortino Ratio": excess_return / downside_deviation,
+            "Calmar Ratio": excess_return / np.abs(max_drawdown),
+        }, index=prices.columns)
+    metrics.loc[count < 2] = np.nan
+
+    return metrics.replace([np.inf, -np.inf], np.nan)
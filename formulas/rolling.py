@@ -0,0 +1,99 @@
+"""Functions to Calculate Rolling Risk Metrics for Every Asset with Prefix Sums"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+from formulas.risk import load_risk_free_rate, periods_per_year, default_risk_free_rate
+
+
+def _prefix(values):
+
+    # Cumulative sums with a leading zero row, so any window sum is prefix[end] - prefix[start]
+    prefix = np.zeros((len(values) + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=prefix[1:])
+    return prefix
+
+
+def _window(prefix, window):
+
+    # Sum over the trailing window ending on every row (shorter at the start of the series)
+    sums = np.empty((len(prefix) - 1,) + prefix.shape[1:])
+    head = min(window, len(sums))
+    np.subtract(prefix[1:head + 1], prefix[0], out=sums[:head])
+    np.subtract(prefix[window + 1:], prefix[1:len(prefix) - window], out=sums[head:])
+    return sums
+
+
+"""Rolling Risk Metrics Function to get rolling volatility, Sharpe, Sortino and beta for several windows in O(T) per window"""
+
+def rolling_risk_metrics(prices, windows=(30, 90, 180), benchmark=None, risk_free=None, min_periods=None):
+
+    ppy = periods_per_year(prices.index)
+    dates = prices.index[1:]
+
+    # Daily returns with missing observations zeroed out and tracked in a mask
+    filled = prices.ffill().values.astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = filled[1:] / filled[:-1] - 1
+    valid = ~np.isnan(prices.values[1:].astype(float)) & ~np.isnan(returns)
+    returns = np.where(valid, returns, 0.0)
+
+    if risk_free is None:
+        annual_rates = load_risk_free_rate(prices.index)
+    elif isinstance(risk_free, pd.Series):
+        annual_rates = risk_free.reindex(prices.index, method="ffill").fillna(default_risk_free_rate)
+    else:
+        annual_rates = pd.Series(risk_free, index=prices.index)
+    period_rates = ((1 + annual_rates.values[1:]) ** (1 / ppy) - 1)[:, None]
+
+    # One pass of prefix sums serves every window: counts, log growth, squares and downside squares
+    prefix_count = _prefix(valid.astype(float))
+    prefix_log = _prefix(np.log1p(returns))
+    prefix_rate = _prefix(np.log1p(period_rates) * valid)
+    prefix_sum = _prefix(returns)
+    prefix_squares = _prefix(returns ** 2)
+    prefix_downside = _prefix(np.minimum(returns - period_rates, 0) ** 2 * valid)
+
+    # Beta uses only the days on which both the asset and the benchmark traded
+    if benchmark is not None:
+        market = returns[:, list(prices.columns).index(benchmark)][:, None]
+        joint = valid & valid[:, [list(prices.columns).index(benchmark)]]
+        prefix_joint = _prefix(joint.astype(float))
+        prefix_joint_asset = _prefix(returns * joint)
+        prefix_joint_market = _prefix(market * joint)
+        prefix_joint_market_squares = _prefix(market ** 2 * joint)
+        prefix_cross = _prefix(returns * market * joint)
+
+    rolling_metrics = {}
+    for window in windows:
+        n = _window(prefix_count, window)
+        enough = n >= (window // 2 if min_periods is None else min_periods)
+        n_safe = np.maximum(n, 2)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sum_returns = _window(prefix_sum, window)
+            variance = (_window(prefix_squares, window) - sum_returns ** 2 / n_safe) / (n_safe - 1)
+            volatility = np.sqrt(np.maximum(variance, 0) * ppy)
+            downside_deviation = np.sqrt(_window(prefix_downside, window) / n_safe * ppy)
+
+            excess_return = np.expm1(_window(prefix_log, window) * ppy / n_safe) - np.expm1(_window(prefix_rate, window) * ppy / n_safe)
+            metrics = {
+                "Annual Volatility": volatility,
+                "Sharpe Ratio": excess_return / volatility,
+                "Sortino Ratio": excess_return / downside_deviation,
+            }
+
+            if benchmark is not None:
+                m = np.maximum(_window(prefix_joint, window), 2)
+                sum_asset = _window(prefix_joint_asset, window)
+                sum_market = _window(prefix_joint_market, window)
+                covariance = _window(prefix_cross, window) - sum_asset * sum_market / m
+                market_variance = _window(prefix_joint_market_squares, window) - sum_market ** 2 / m
+                metrics["Beta"] = covariance / market_variance
+
+        rolling_metrics[window] = {
+            metric: pd.DataFrame(np.where(enough & np.isfinite(values), values, np.nan), index=dates, columns=prices.columns)
+            for metric, values in metrics.items()
+        }
+
+    return rolling_metrics
@@ -0,0 +1,155 @@
+"""Functions to Precompute a Columnar Metrics Table for the Whole Universe and Answer Filter, Sort and Top-N Screener Queries"""
+
+# Required libraries and dependencies
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from formulas.alignment import trailing_window, cross_correlations
+from formulas.artifacts import data_path, pipeline_manifest, read_artifact
+from formulas.risk import risk_metrics
+from formulas.sessions import benchmark_correlations
+
+# Trailing return windows in calendar days
+return_windows = {"Return 7D": 7, "Return 30D": 30, "Return 90D": 90, "Return 365D": 365}
+
+# Columns shown as percentages in the sidebar table
+percent_metrics = ["Return 7D", "Return 30D", "Return 90D", "Return 365D", "Annual Volatility", "Max Drawdown"]
+
+# Screeners loaded from the pipeline's artifacts, by file and modification time
+_screener_cache = {}
+
+
+"""Metrics Function to compute every screener column for every asset at once, once per data refresh"""
+
+def screener_metrics(prices, benchmarks=None, mvrv=None, reference="Bitcoin (BTC)", days=365):
+
+    prices = trailing_window(prices, days)
+    metrics = pd.DataFrame(index=prices.columns)
+
+    # Compounded over whatever history each asset has inside the window, like the power rankings
+    for column, window_days in return_windows.items():
+        window = trailing_window(prices, window_days)
+        metrics[column] = window.ffill().iloc[-1].values / window.bfill().iloc[0].values - 1
+
+    risk = risk_metrics(prices)
+    for column in ["Annual Volatility", "Max Drawdown", "Sharpe Ratio", "Sortino Ratio", "Calmar Ratio"]:
+        metrics[column] = risk[column]
+
+    # One column of correlations rather than the N x N matrix, so the cost grows linearly with the universe
+    returns = prices.pct_change()
+    if reference in returns.columns:
+        metrics["Correlation to BTC"] = cross_correlations(returns, returns[[reference]]).iloc[:, 0]
+    else:
+        metrics["Correlation to BTC"] = np.nan
+    if benchmarks is not None:
+        metrics["Correlation to SPY"] = benchmark_correlations(prices, benchmarks.iloc[:, :1]).iloc[:, 0]
+    else:
+        metrics["Correlation to SPY"] = np.nan
+    metrics["MVRV Z-Score"] = mvrv.reindex(metrics.index) if mvrv is not None else np.nan
+
+    return metrics.rename_axis("Asset").replace([np.inf, -np.inf], np.nan)
+
+
+def latest_mvrv(mvrv_data):
+
+    # Latest MVRV Z-Score per asset slug from the mvrv_data table ("Bitcoin Z-Score", ...)
+    z_scores = mvrv_data[[column for column in mvrv_data.columns if column.endswith(" Z-Score")]]
+    latest = z_scores.ffill().iloc[-1] if len(z_scores) else pd.Series(dtype=float)
+    latest.index = [column[:-len(" Z-Score")] for column in latest.index]
+    return latest
+
+
+"""Screener Class holding the metrics column by column with a sorted index per column"""
+
+class Screener:
+
+    def __init__(self, metrics):
+        self.metrics = list(metrics.columns)
+        self.assets = metrics.index.values
+        self.columns = {column: metrics[column].values.astype(float) for column in metrics.columns}
+
+        # Asset positions in ascending value order with NaN last, and how many values are not NaN
+        self.orders = {column: np.argsort(values, kind="mergesort") for column, values in self.columns.items()}
+        self.sorted_values = {column: self.columns[column][order] for column, order in self.orders.items()}
+        self.counts = {column: int((~np.isnan(values)).sum()) for column, values in self.columns.items()}
+
+    def __len__(self):
+        return len(self.assets)
+
+    def value_range(self, column):
+        count = self.counts[column]
+        return (self.sorted_values[column][0], self.sorted_values[column][count - 1]) if count else (np.nan, np.nan)
+
+    def matches(self, column, low=None, high=None):
+
+        # Positions with low <= value <= high: two binary searches and a slice of the sorted index
+        count = self.counts[column]
+        values = self.sorted_values[column][:count]
+        first = 0 if low is None else int(np.searchsorted(values, low, side="left"))
+        stop = count if high is None else int(np.searchsorted(values, high, side="right"))
+        return self.orders[column][first:max(first, stop)]
+
+    def query(self, filters=None, sort_by=None, ascending=False, top_n=None, columns=None):
+
+        # filters: {column: (low, high)} with None for an open end; the result is sorted by one column and cut to top_n
+        filters = filters or {}
+        top_n = len(self.assets) if top_n is None else max(int(top_n), 0)
+
+        if filters:
+            # The narrowest range comes from the sorted index; the others are checked on its candidates only
+            ranges = sorted(filters.items(), key=lambda item: len(self.matches(item[0], *item[1])))
+            selected = self.matches(ranges[0][0], *ranges[0][1])
+            for column, (low, high) in ranges[1:]:
+                values = self.columns[column][selected]
+                keep = ~np.isnan(values)
+                if low is not None:
+                    keep &= values >= low
+                if high is not None:
+                    keep &= values <= high
+                selected = selected[keep]
+
+            if sort_by is None:
+                selected = np.sort(selected)[:top_n]
+            else:
+                # Top-N by partition, then only those N are sorted; NaN goes last either way
+                values = self.columns[sort_by][selected]
+                keys = np.where(np.isnan(values), np.inf, values if ascending else -values)
+                if top_n < len(selected):
+                    partition = np.argpartition(keys, top_n - 1)[:top_n] if top_n else np.array([], dtype=int)
+                    selected, keys = selected[partition], keys[partition]
+                selected = selected[np.argsort(keys, kind="mergesort")]
+
+        elif sort_by is None:
+            selected = np.arange(min(top_n, len(self.assets)))
+        else:
+            # Without filters the answer is a slice of the column's sorted index
+            count = self.counts[sort_by]
+            order = self.orders[sort_by]
+            ranked = order[:count] if ascending else order[:count][::-1]
+            selected = np.concatenate([ranked, order[count:]])[:top_n]
+
+        columns = self.metrics if columns is None else list(columns)
+        result = pd.DataFrame({column: self.columns[column][selected] for column in columns}, index=self.assets[selected])
+        return result.rename_axis("Asset")
+
+
+"""Loading Function for the screener table precomputed by the pipeline (python -m formulas.pipeline screener)"""
+
+def load_screener(output_path=data_path):
+
+    # The latest screener_metrics artifact, or None before the first pipeline run
+    manifest_path = Path(output_path) / pipeline_manifest
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path) as manifest_file:
+        entry = json.load(manifest_file).get("screener", {}).get("artifacts", {}).get("screener_metrics")
+    if entry is None or not (Path(output_path) / entry["file"]).exists():
+        return None
+
+    path = Path(output_path) / entry["file"]
+    key = (str(path), path.stat().st_mtime)
+    if key not in _screener_cache:
+        _screener_cache.clear()
+        _screener_cache[key] = Screener(read_artifact(path))
+    return _screener_cache[key]
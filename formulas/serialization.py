@@ -0,0 +1,136 @@
+"""Functions to Serialize Chart Data Compactly (Epoch-Millisecond Dates, Numeric Arrays) and Measure Payload Sizes per Panel"""
+
+# Required libraries and dependencies
+import datetime as dt
+import json
+import numpy as np
+import pandas as pd
+import plotly.utils
+
+
+"""Array Functions to turn date and numeric trace data into plain numeric arrays"""
+
+def epoch_milliseconds(dates):
+
+    # Timezone-aware dates are measured in UTC
+    dates = dates.tz_convert(None) if dates.tz is not None else dates
+    return dates.values.astype("datetime64[ms]").astype(np.int64)
+
+
+def _as_array(values):
+
+    # Normalizes trace data to a DatetimeIndex or a 1-D numeric array; anything else is left as JSON
+    if isinstance(values, (pd.DatetimeIndex, pd.Series)) and pd.api.types.is_datetime64_any_dtype(values):
+        return pd.DatetimeIndex(values)
+    if isinstance(values, (pd.Index, pd.Series)):
+        values = values.values
+    if not isinstance(values, np.ndarray) or values.ndim != 1 or len(values) == 0:
+        return None
+    if np.issubdtype(values.dtype, np.datetime64):
+        return pd.DatetimeIndex(values)
+    if values.dtype == object and isinstance(values[0], (pd.Timestamp, dt.datetime)):
+        return pd.DatetimeIndex(values)
+    if np.issubdtype(values.dtype, np.number):
+        return values
+    return None
+
+
+"""Plotly Serialization Functions to turn a figure (or figure dict) into a compact figure and its JSON payload"""
+
+def compact_figure(figure):
+
+    figure = figure.to_dict() if hasattr(figure, "to_dict") else figure
+    layout = dict(figure.get("layout", {}))
+    data = []
+
+    for trace in figure.get("data", []):
+        trace = dict(trace)
+        for key in ("x", "y"):
+            values = _as_array(trace.get(key))
+            if values is None:
+                continue
+
+            # Dates go out as epoch milliseconds instead of ISO strings; numeric date axes have to be declared as dates
+            if isinstance(values, pd.DatetimeIndex):
+                axis = f"{key}axis{trace.get(key + 'axis', key)[1:]}"
+                layout[axis] = dict(layout.get(axis, {}), type="date")
+                values = epoch_milliseconds(values)
+            trace[key] = values
+        data.append(trace)
+
+    return {"data": data, "layout": layout}
+
+
+def plotly_payload(figure):
+    return json.dumps(compact_figure(figure), cls=plotly.utils.PlotlyJSONEncoder)
+
+
+"""Payload Size Functions that record the bytes each panel sends, per browser session and rerun"""
+
+def payload_sizes():
+
+    # Kept in the session state, so concurrent sessions never see each other's panels
+    import streamlit as st
+    return st.session_state.setdefault("payload_sizes", {})
+
+
+def measuring_payloads():
+
+    # Set by the Chart Payloads checkbox; serializing a figure only to count its bytes is skipped otherwise
+    import streamlit as st
+    return st.session_state.get("measure_payloads", False)
+
+
+def reset_payload_sizes():
+
+    # Called at the top of every rerun, so the table only lists what this rerun sent
+    import streamlit as st
+    st.session_state["payload_sizes"] = {}
+
+
+def measure_payload(panel, payload, figure=None):
+
+    # Optionally compares against plotly's own JSON text encoding of the same figure
+    sizes = {"Payload Bytes": len(payload)}
+    if figure is not None:
+        figure = figure.to_dict() if hasattr(figure, "to_dict") else figure
+        sizes["JSON Text Bytes"] = len(json.dumps(figure, cls=plotly.utils.PlotlyJSONEncoder))
+    payload_sizes()[panel] = sizes
+
+    return sizes
+
+
+"""Rendering Functions that send the compact figures to the Streamlit page"""
+
+def render_plotly(panel, figure, compare=False):
+
+    import streamlit as st
+
+    # Streamlit's bundled plotly renderer, so no chart loads plotly.js from the network or parses it in its own iframe
+    figure_data = compact_figure(figure)
+    if measuring_payloads():
+        measure_payload(panel, json.dumps(figure_data, cls=plotly.utils.PlotlyJSONEncoder), figure if compare else None)
+
+    return st.plotly_chart(figure_data, use_container_width=True)
+
+
+def render_bokeh(panel, model):
+
+    import streamlit as st
+    from bokeh.embed import json_item
+    from bokeh.models import ColumnDataSource
+
+    # Bokeh sends numpy columns in its own binary array encoding but Python lists as JSON text, so every column becomes an array
+    for source in model.select({"type": ColumnDataSource}):
+        for column, values in list(source.data.items()):
+            values = _as_array(np.asarray(values) if isinstance(values, list) else values)
+            if isinstance(values, pd.DatetimeIndex):
+                source.data[column] = epoch_milliseconds(values).astype(np.float64)
+            elif values is not None:
+                source.data[column] = values.astype(np.float64)
+
+    # st.bokeh_chart sends json.dumps(json_item(model)), so that string is only built again when it is being measured
+    if measuring_payloads():
+        measure_payload(panel, json.dumps(json_item(model)))
+
+    return st.bokeh_chart(model)
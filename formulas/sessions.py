@@ -0,0 +1,68 @@
+"""Functions to Join 24/7 Crypto Series onto an Exchange Session Calendar and Correlate Returns across Markets"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+from formulas.alignment import cross_correlations
+from formulas.dates import epoch_days, day_dates
+
+
+"""Calendar Functions to compound the crypto days between two exchange sessions into the later session"""
+
+def session_days(index):
+
+    # Sorted, unique epoch days on which the exchange traded, taken from a stock price index
+    return np.unique(epoch_days(index))
+
+
+def session_returns(prices, sessions):
+
+    # Session k collects the crypto days in (session k-1, session k], so weekends and holidays roll into the next session
+    prices = prices.to_frame() if isinstance(prices, pd.Series) else prices
+    sessions = session_days(sessions)
+    days = epoch_days(prices.index)
+    values = prices.values.astype(float)
+
+    # Summed log returns are the compounded return; cumulative sums read at the session boundaries sum every session at once
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_returns = np.diff(np.log(values), axis=0)
+    observed = ~np.isnan(log_returns)
+    zeros = np.zeros((1, values.shape[1]))
+    total = np.vstack([zeros, np.cumsum(np.where(observed, log_returns, 0.0), axis=0)])
+    count = np.vstack([zeros, np.cumsum(observed, axis=0)])
+
+    # Return row j belongs to day j + 1, so the rows up to a session are those of the days on or before it, less one
+    bounds = np.maximum(np.searchsorted(days, sessions, side="right") - 1, 0)
+    start, stop = bounds[:-1], bounds[1:]
+    compounded = np.expm1(total[stop] - total[start])
+
+    # A session is only reported when every crypto day inside it was observed (not before listing, not past the data)
+    complete = (count[stop] - count[start]) == (stop - start)[:, None]
+    compounded[~complete | (stop == start)[:, None]] = np.nan
+
+    return pd.DataFrame(compounded, index=day_dates(sessions[1:], name="Date"), columns=prices.columns)
+
+
+def calendar_join(crypto_prices, stock_prices):
+
+    # Session-to-session returns of both markets on the exchange calendar, one row per session after the first
+    stock_prices = stock_prices.to_frame() if isinstance(stock_prices, pd.Series) else stock_prices
+    stock_prices = stock_prices.groupby(epoch_days(stock_prices.index)).last()
+    sessions = day_dates(stock_prices.index, name="Date")
+    stock_returns = stock_prices.values[1:] / stock_prices.values[:-1] - 1
+    stock_returns = pd.DataFrame(stock_returns, index=sessions[1:], columns=stock_prices.columns)
+
+    crypto_returns = session_returns(crypto_prices, sessions)
+    return pd.concat([crypto_returns, stock_returns], axis="columns")
+
+
+"""Correlation Function for any number of crypto assets against any number of benchmarks in one pass"""
+
+def benchmark_correlations(crypto_prices, benchmark_prices, min_periods=20):
+
+    # Correlations of returns on shared sessions; levels of two rising series correlate whatever their daily moves do
+    joined = calendar_join(crypto_prices, benchmark_prices)
+    n_crypto = 1 if crypto_prices.ndim == 1 else crypto_prices.shape[1]
+
+    # Crypto assets as rows, benchmarks as columns; only that block is computed, so thousands of assets stay cheap
+    return cross_correlations(joined.iloc[:, :n_crypto], joined.iloc[:, n_crypto:], min_periods)
@@ -0,0 +1,145 @@
+"""Functions to Generate Synthetic Crypto Market Data for Offline Scale Testing"""
+
+# Required libraries and dependencies
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+
+"""Synthetic Price Paths Function to simulate correlated daily closes for N assets over T days"""
+
+def generate_price_paths(n_assets, n_days, start="2018-01-01", seed=None,
+                         annual_drift=.35, annual_volatility=.85, market_correlation=.6,
+                         jump_intensity=6, jump_volatility=.12,
+                         listing_fraction=.3, delisting_fraction=.05, missing_fraction=.01):
+
+    rng = np.random.default_rng(seed)
+    dt_year = 1 / 365
+
+    dates = pd.date_range(start=start, periods=n_days, freq="D", name="Date")
+    assets = [f"Synthetic {i + 1:04d}" for i in range(n_assets)]
+
+    # Per-asset drift, volatility and loading on the common market factor
+    drift = rng.normal(annual_drift, annual_drift / 2, n_assets)
+    volatility = annual_volatility * rng.lognormal(0, .35, n_assets)
+    loading = np.sqrt(np.clip(rng.normal(market_correlation, .15, n_assets), 0, .95))
+
+    # One-factor model: every asset shares the market shock plus its own idiosyncratic shock
+    market_shock = rng.standard_normal((n_days, 1))
+    own_shock = rng.standard_normal((n_days, n_assets))
+    shocks = loading * market_shock + np.sqrt(1 - loading ** 2) * own_shock
+    log_returns = (drift - .5 * volatility ** 2) * dt_year + volatility * np.sqrt(dt_year) * shocks
+
+    # Jumps arrive as a Poisson process, both market-wide and asset specific
+    market_jumps = rng.poisson(jump_intensity / 2 * dt_year, (n_days, 1)) * rng.normal(0, jump_volatility, (n_days, 1))
+    own_jumps = rng.poisson(jump_intensity * dt_year, (n_days, n_assets)) * rng.normal(0, jump_volatility, (n_days, n_assets))
+    log_returns += market_jumps + own_jumps
+
+    # Starting prices span sub-cent tokens up to Bitcoin-sized prices
+    start_prices = np.exp(rng.uniform(np.log(.01), np.log(50000), n_assets))
+    log_returns[0] = 0
+    prices = start_prices * np.exp(np.cumsum(log_returns, axis=0))
+
+    # Late listings, delistings and missing days are blanked out with NaN
+    listing_day = np.zeros(n_assets, dtype=int)
+    listed = rng.random(n_assets) < listing_fraction
+    listing_day[listed] = rng.integers(1, max(2, int(n_days * .9)), listed.sum())
+
+    delisting_day = np.full(n_assets, n_days)
+    delisted = rng.random(n_assets) < delisting_fraction
+    earliest = np.minimum(listing_day[delisted] + 30, n_days - 1)
+    delisting_day[delisted] = rng.integers(earliest, n_days)
+
+    day = np.arange(n_days)[:, None]
+    alive = (day >= listing_day) & (day < delisting_day)
+    missing = (rng.random((n_days, n_assets)) < missing_fraction) & (day != listing_day)
+    prices[~alive | missing] = np.nan
+
+    return pd.DataFrame(prices, index=dates, columns=assets)
+
+
+"""Synthetic Messari Client that serves generated data in the same shape as messari.get_metric_timeseries"""
+
+class SyntheticMessari:
+
+    def __init__(self, n_assets=120, n_days=2000, end=None, seed=0, **kwargs):
+        end = pd.to_datetime("today").normalize() if end is None else pd.to_datetime(end)
+        start = end - pd.Timedelta(days=n_days - 1)
+        rng = np.random.default_rng(seed)
+
+        self.prices = generate_price_paths(n_assets, n_days, start=start, seed=seed, **kwargs)
+        self.assets = list(self.prices.columns)
+
+        # Circulating supply is sized for a $10M-$1T market cap, grows slowly, and realized value lags the market value
+        first_price = self.prices.bfill().iloc[0].values
+        supply = np.exp(rng.uniform(np.log(1e7), np.log(1e12), n_assets)) / first_price
+        supply = supply * (1 + rng.uniform(0, .3, n_assets) * np.linspace(0, 1, n_days)[:, None])
+        self.market_cap = self.prices * supply
+        self.realized_cap = self.market_cap.ewm(halflife=120, ignore_na=True).mean().where(self.market_cap.notna())
+
+    def get_metric_timeseries(self, asset_slugs, asset_metric, start=None, end=None, interval="1d"):
+        slugs = [asset_slugs] if isinstance(asset_slugs, str) else list(asset_slugs)
+        start = self.prices.index[0] if start is None else pd.to_datetime(start).normalize()
+        end = self.prices.index[-1] if end is None else pd.to_datetime(end).normalize()
+
+        frames = {}
+        for slug in slugs:
+            if asset_metric == "price":
+                close = self.prices[slug].loc[start:end].dropna()
+                frames[slug] = self._candles(close)
+            elif asset_metric == "mcap.circ":
+                frames[slug] = self.market_cap[slug].loc[start:end].dropna().to_frame("circulating_marketcap")
+            elif asset_metric == "mcap.realized":
+                frames[slug] = self.realized_cap[slug].loc[start:end].dropna().to_frame("realized_marketcap")
+            else:
+                raise ValueError(f"Synthetic data does not cover the '{asset_metric}' metric")
+
+        # Messari returns one column block per asset, keyed by the asset slug
+        timeseries = pd.concat(frames, axis="columns")
+        timeseries.index.names = ["timestamp"]
+        return timeseries
+
+    def _candles(self, close):
+        rng = np.random.default_rng(len(close))
+        open_ = close.shift(1).fillna(close)
+        spread = 1 + np.abs(rng.normal(0, .02, len(close)))
+        return pd.DataFrame({
+            "open": open_,
+            "high": np.maximum(open_, close) * spread,
+            "low": np.minimum(open_, close) / spread,
+            "close": close,
+            "volume": close * np.exp(rng.normal(16, 1, len(close))),
+        })
+
+
+def install_synthetic_client(n_assets=120, n_days=2000, **kwargs):
+
+    # Replaces the module level Messari client so every formulas.api function reads synthetic data
+    import formulas.api
+    from formulas.fetch import set_rate_limit
+    client = SyntheticMessari(n_assets=n_assets, n_days=n_days, **kwargs)
+    formulas.api.messari = client
+    # Local data has no upstream quota, so timings measure the loaders rather than the rate limiter
+    set_rate_limit("messari", 1e9, 1000000)
+    return client.assets
+
+
+# Times the data/ loaders against a synthetic universe: python -m formulas.synthetic --scale 10
+if __name__ == "__main__":
+    from formulas.filters import crypto_assets, load_crypto_prices, load_power_rankings, load_crypto_statistics
+
+    parser = argparse.ArgumentParser(description="Drive the data loaders with synthetic market data")
+    parser.add_argument("--scale", type=int, default=10, help="multiple of the production asset universe")
+    parser.add_argument("--days", type=int, default=2000, help="days of history to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    assets = install_synthetic_client(n_assets=len(crypto_assets) * args.scale, n_days=args.days, seed=args.seed)
+    start_date = pd.to_datetime("today") - pd.Timedelta(days=args.days - 1)
+    end_date = pd.to_datetime("today")
+
+    for loader in [load_crypto_prices, load_power_rankings, load_crypto_statistics]:
+        timer = time.perf_counter()
+        loader(start_date, end_date, assets=assets)
+        print(f"{loader.__name__}: {len(assets)} assets in {time.perf_counter() - timer:.2f}s")
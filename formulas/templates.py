@@ -0,0 +1,81 @@
+"""Functions to Build Chart Templates Once and Fill Them with New Data on Every Rerun"""
+
+# Required libraries and dependencies
+from functools import lru_cache
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# Channel columns in the same order as the template traces
+regression_channel_columns = ["Price", "Prediction", "Lower 1", "Upper 1", "Lower 2", "Upper 2", "SMA 200", "SMA 50"]
+
+
+"""Regression Channel Template Function to build the layout and the styled (empty) traces of the channel chart a single time"""
+
+@lru_cache(maxsize=1)
+def regression_channel_template():
+
+    chart = make_subplots(specs=[[{"secondary_y" : True}]])
+    chart.add_trace(go.Scatter(name="Price", line_color="black"), secondary_y=True,)
+    chart.add_trace(go.Scatter(name="Prediction", line_color="lightslategray", hoverinfo='none'), secondary_y=False,)
+    chart.add_trace(go.Scatter(name="Standard Deviation", line_color="forestgreen", hoverinfo='none'), secondary_y=False,)
+    chart.add_trace(go.Scatter(line_color="forestgreen", showlegend=False, hoverinfo='none'), secondary_y=False,)
+    chart.add_trace(go.Scatter(name="2 Standard Deviations", line_color="rosybrown", hoverinfo='none'), secondary_y=False,)
+    chart.add_trace(go.Scatter(name="2 Standard Deviations", line_color="rosybrown", showlegend=False, hoverinfo='none'), secondary_y=False,)
+    chart.add_trace(go.Scatter(name="200-Day SMA", line_color="gray"), secondary_y=True,)
+    chart.add_trace(go.Scatter(name="50-Day SMA", line_color="lightgray"), secondary_y=True,)
+
+    chart.update_xaxes(title_text = "Date", showline=False)
+    chart.update_yaxes(title_text="Actual Price", zeroline = True, tickformat = '$', showgrid=True, tick0 = 0, nticks = 10, secondary_y=True)
+    chart.update_yaxes(showticklabels = False, tick0 = 0, secondary_y=False)
+    chart.update_layout(template="simple_white")
+    chart.update_traces(marker_colorscale="Earth", selector=dict(type='scatter'))
+    chart.update_traces(fill="none")
+    chart.update_layout(legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="left", x=.01, font = dict(size = 10, color = "black")))
+    chart.update_layout(plot_bgcolor='white')
+    chart.update_layout(margin=dict(l=0, r=0, t=55))
+
+    # Plain dicts are shared read-only between sessions; each rerun copies only the pieces it changes
+    return chart.to_dict()
+
+
+"""Regression Channel Figure Function to swap a channel DataFrame's arrays into the cached template"""
+
+def regression_channel_figure(channel):
+
+    template = regression_channel_template()
+    dates = channel.index
+
+    data = [dict(trace, x=dates, y=channel[column].values.astype(np.float64))
+            for trace, column in zip(template["data"], regression_channel_columns)]
+
+    # Only the axis ranges depend on the data
+    layout = dict(template["layout"])
+    layout["yaxis2"] = dict(layout["yaxis2"], range=[channel["Price"].min() * .6, channel["Price"].max() * 1.2])
+    layout["yaxis"] = dict(layout["yaxis"], range=[channel["Cumulative Returns"].min() * .6, channel["Cumulative Returns"].max() * 1.2])
+
+    return {"data": data, "layout": layout}
+
+
+"""Projection Fan Function to overlay Monte Carlo percentile bands on a regression channel figure"""
+
+def add_projection_fan(figure, fan):
+
+    # Outer band (P5-P95), inner band (P25-P75) and the median, drawn against the price axis
+    bands = [("P5", "P95", "rgba(70, 130, 180, .15)", "90% of Paths"), ("P25", "P75", "rgba(70, 130, 180, .3)", "50% of Paths")]
+    data = list(figure["data"])
+    for lower, upper, fillcolor, name in bands:
+        data.append(dict(type="scatter", x=fan.index, y=fan[lower].values, yaxis="y2", line=dict(width=0), showlegend=False, hoverinfo="skip"))
+        data.append(dict(type="scatter", x=fan.index, y=fan[upper].values, yaxis="y2", line=dict(width=0), fill="tonexty",
+                         fillcolor=fillcolor, name=name, hoverinfo="skip"))
+    data.append(dict(type="scatter", x=fan.index, y=fan["P50"].values, yaxis="y2", name="Median Projection",
+                     line=dict(color="steelblue", dash="dash")))
+
+    # Both y-axes are stretched by the same factor so the channel stays aligned with the price line
+    layout = dict(figure["layout"])
+    low, high = layout["yaxis2"]["range"]
+    top = max(high, float(np.nanmax(fan.values)) * 1.05)
+    layout["yaxis2"] = dict(layout["yaxis2"], range=[low, top])
+    layout["yaxis"] = dict(layout["yaxis"], range=[layout["yaxis"]["range"][0], layout["yaxis"]["range"][1] * top / high])
+
+    return {"data": data, "layout": layout}
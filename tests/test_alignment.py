@@ -0,0 +1,53 @@
+"""Tests to Check the Masked Moments and Pairwise-Complete Correlations against pandas"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+import pytest
+from formulas.alignment import align_timeseries, trailing_window, masked_moments, pairwise_correlations, cross_correlations
+from formulas.synthetic import generate_price_paths
+
+
+@pytest.fixture(scope="module")
+def returns():
+
+    # Late listings, delistings and missing days leave a different set of observations in every column
+    prices = generate_price_paths(25, 600, seed=11)
+    prices.iloc[:590, 0] = np.nan
+    return prices.pct_change()
+
+
+@pytest.mark.parametrize("min_periods", [2, 30, 200])
+def test_pairwise_correlations_match_pandas(returns, min_periods):
+    np.testing.assert_allclose(pairwise_correlations(returns, min_periods).values,
+                               returns.corr(min_periods=min_periods).values, atol=1e-10, equal_nan=True)
+
+
+def test_cross_correlations_match_the_pairwise_block(returns):
+    block = cross_correlations(returns, returns.iloc[:, :4], min_periods=30)
+
+    assert list(block.columns) == list(returns.columns[:4])
+    np.testing.assert_allclose(block.values, pairwise_correlations(returns, 30).iloc[:, :4].values, atol=1e-12, equal_nan=True)
+
+
+def test_masked_moments_match_pandas(returns):
+    moments = masked_moments(returns)
+
+    np.testing.assert_array_equal(moments["Observations"].values, returns.count().values)
+    np.testing.assert_allclose(moments["Mean"].values, returns.mean().values, rtol=1e-12)
+    np.testing.assert_allclose(moments["Variance"].values, returns.var().values, rtol=1e-10, equal_nan=True)
+
+
+def test_outer_join_keeps_every_history():
+    early = pd.Series([1.0, 2.0, 3.0], index=pd.date_range("2022-01-01", periods=3))
+    late = pd.Series([5.0], index=pd.date_range("2022-01-03", periods=1))
+    aligned = align_timeseries([early, late], ["Early", "Late"])
+
+    assert len(aligned) == 3
+    assert aligned["Late"].isna().sum() == 2
+
+
+def test_trailing_window_counts_calendar_days():
+    prices = pd.DataFrame({"Asset": range(8)}, index=pd.date_range("2022-01-01", periods=10).delete([6, 7]))
+
+    assert list(trailing_window(prices, 5).index.day) == [6, 9, 10]
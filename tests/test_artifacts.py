@@ -0,0 +1,54 @@
+"""Tests to Check that Parquet Artifacts Round-Trip the data/ Tables and Read Back Column and Date Subsets"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+import pytest
+from formulas.artifacts import write_artifact, read_artifact, artifact_manifest
+from formulas.synthetic import generate_price_paths
+
+
+@pytest.fixture
+def prices():
+
+    # Missing values stay NaN through the round trip
+    prices = generate_price_paths(6, 120, seed=71)
+    prices.index = prices.index.rename("Date")
+    prices.iloc[:30, 2] = np.nan
+    return prices
+
+
+def test_dated_table_round_trip(prices, tmp_path):
+    manifest = write_artifact(prices, tmp_path / "prices.parquet")
+    loaded = read_artifact(tmp_path / "prices.parquet")
+
+    pd.testing.assert_frame_equal(loaded, prices, check_freq=False, check_index_type=False)
+    assert loaded.index.equals(prices.index)
+    assert manifest["start"] == str(prices.index[0].date()) and manifest["end"] == str(prices.index[-1].date())
+    assert manifest["rows"] == str(len(prices)) and manifest["columns"] == list(prices.columns)
+
+
+def test_label_index_and_float32(tmp_path):
+    table = pd.DataFrame({"Sharpe Ratio": [1.25, -0.5], "Sortino Ratio": [2.0, np.nan]}, index=pd.Index(["Bitcoin", "Ethereum"], name="Token"))
+    manifest = write_artifact(table, tmp_path / "statistics.parquet", float_dtype="float32")
+    loaded = read_artifact(tmp_path / "statistics.parquet")
+
+    assert list(loaded.index) == ["Bitcoin", "Ethereum"] and loaded.index.name == "Token"
+    assert manifest["dtypes"] == {"Sharpe Ratio": "float", "Sortino Ratio": "float"}
+    np.testing.assert_array_equal(loaded.values, table.values.astype("float32"))
+
+
+def test_timezone_is_kept(tmp_path):
+    table = pd.DataFrame({"SPY": [400.0, 401.5]}, index=pd.DatetimeIndex(["2022-01-03 16:00", "2022-01-04 16:00"], name="Date").tz_localize("America/New_York"))
+    write_artifact(table, tmp_path / "stocks.parquet")
+
+    assert read_artifact(tmp_path / "stocks.parquet").index.equals(table.index)
+
+
+def test_column_and_date_subsets(prices, tmp_path):
+    write_artifact(prices, tmp_path / "prices.parquet")
+    columns = list(prices.columns[[1, 4]])
+    window = read_artifact(tmp_path / "prices.parquet", columns=columns, start="2018-02-01", end="2018-02-10")
+
+    pd.testing.assert_frame_equal(window, prices.loc["2018-02-01":"2018-02-10", columns], check_freq=False, check_index_type=False)
+    assert len(window) == 10 and artifact_manifest(tmp_path / "prices.parquet")["file"] == "prices.parquet"
@@ -0,0 +1,51 @@
+"""Tests to Check the Epoch-Day Conversions and Binary-Search Date Windows against pandas"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+import pytest
+from formulas.dates import epoch_days, epoch_day, day_dates, normalize_dates, window_bounds, date_window, linear_trend
+
+
+def test_epoch_days_round_trip():
+    dates = pd.date_range("1969-12-30", "2030-01-01", freq="37D")
+    days = epoch_days(dates)
+
+    assert days.dtype == np.int32
+    np.testing.assert_array_equal(days, (dates - pd.Timestamp("1970-01-01")).days)
+    assert day_dates(days).equals(pd.DatetimeIndex(dates.values))
+    assert epoch_day("1970-01-02") == 1 and epoch_day(np.int32(5)) == 5 and epoch_day(pd.Timestamp("2022-03-01 23:59")) == 19052
+
+
+def test_timezone_aware_dates_keep_their_local_day():
+    bars = pd.DatetimeIndex(["2022-03-01 23:30", "2022-03-02 09:30"]).tz_localize("America/New_York")
+
+    assert normalize_dates(bars, name="Date").equals(pd.DatetimeIndex(["2022-03-01", "2022-03-02"], name="Date"))
+
+
+@pytest.mark.parametrize("start, end", [(None, None), ("2022-01-05", "2022-01-20"), ("2021-06-01", "2022-01-03"),
+                                        ("2022-01-07", "2022-01-07"), ("2022-01-08", "2022-01-07"), ("2022-03-01", None)])
+def test_date_window_matches_label_slicing(start, end):
+    # Missing days and a time of day on some rows, as in outer-joined and exchange tables
+    index = pd.date_range("2022-01-01", periods=60).delete([6, 7, 30]).union(pd.DatetimeIndex(["2022-01-10 16:00"]))
+    table = pd.DataFrame({"Price": np.arange(len(index), dtype=float)}, index=index)
+    expected = table[(table.index >= (pd.Timestamp(start) if start else index[0]))
+                     & (table.index < (pd.Timestamp(end) + pd.Timedelta(days=1) if end else index[-1] + pd.Timedelta(days=1)))]
+
+    pd.testing.assert_frame_equal(date_window(table, start, end), expected)
+    assert window_bounds(epoch_days(index), start, end) == window_bounds(index, start, end)
+
+
+def test_window_bounds_on_microsecond_index():
+    index = pd.DatetimeIndex(pd.date_range("2022-01-01", periods=10).values.astype("datetime64[us]"))
+
+    assert window_bounds(index, "2022-01-03", "2022-01-05") == (2, 5)
+
+
+def test_linear_trend_matches_polyfit_in_days():
+    dates = pd.date_range("2022-01-01", periods=100).delete([10, 11, 12])
+    values = 3 + .5 * (dates - dates[0]).days.values
+
+    slope, intercept, fitted = linear_trend(dates, values)
+    assert slope == pytest.approx(.5) and intercept == pytest.approx(3)
+    np.testing.assert_allclose(fitted, values)
@@ -0,0 +1,56 @@
+"""Tests to Check that the Downsamplers Keep to their Point Budget and Preserve the Shape of a Trace"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+from formulas.downsampling import lttb, minmax_envelope, downsample_frame, downsample_figure
+
+
+@pytest.fixture(scope="module")
+def series():
+    rng = np.random.default_rng(51)
+    y = np.cumsum(rng.normal(size=5000))
+    y[1234] += 100
+    y[4321] -= 100
+    return pd.Series(y, index=pd.date_range("2010-01-01", periods=5000))
+
+
+@pytest.mark.parametrize("max_points", list(range(0, 12)) + [100, 999, 4999, 5000, 6000])
+def test_budget_is_a_hard_limit(series, max_points):
+    for selected in [lttb(series.index.values, series.values, max_points), minmax_envelope(series.values, max_points)]:
+        assert len(selected) <= max_points
+        assert np.all(np.diff(selected) > 0)
+        if max_points >= 2:
+            assert selected[0] == 0 and selected[-1] == len(series) - 1
+
+
+def test_short_series_are_returned_whole(series):
+    np.testing.assert_array_equal(lttb(series.index.values[:50], series.values[:50], 100), np.arange(50))
+    np.testing.assert_array_equal(minmax_envelope(series.values[:50], 50), np.arange(50))
+
+
+def test_spikes_survive(series):
+    for selected in [lttb(series.index.values, series.values, 200), minmax_envelope(series.values, 200)]:
+        assert {1234, 4321} <= set(selected)
+
+
+def test_lttb_fills_its_budget(series):
+    assert len(lttb(series.index.values, series.values, 300)) == 300
+
+
+def test_frame_window_keeps_full_resolution(series):
+    frame = series.to_frame("Price")
+    window = downsample_frame(frame, max_points=1000, start="2012-01-01", end="2012-12-31")
+
+    assert len(window) == 366 and window.index[0] == pd.Timestamp("2012-01-01")
+    assert len(downsample_frame(frame, max_points=1000)) == 1000
+
+
+def test_figure_traces_are_decimated_in_place(series):
+    figure = go.Figure([go.Scatter(x=series.index, y=series.values), go.Scatter(x=series.index[:10], y=series.values[:10])])
+    downsample_figure(figure, max_points=500, method="minmax")
+
+    assert len(figure.data[0].y) <= 500 and len(figure.data[0].x) == len(figure.data[0].y)
+    assert len(figure.data[1].y) == 10
@@ -0,0 +1,62 @@
+"""Tests to Check the Vectorized Drawdown Analytics against a Per-Asset pandas Loop"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+import pytest
+from formulas.drawdowns import drawdown_series, drawdown_analytics
+from formulas.synthetic import generate_price_paths
+
+
+@pytest.fixture(scope="module")
+def prices():
+
+    # Late listings and missing days must not reset the running peak
+    prices = generate_price_paths(12, 700, seed=21)
+    prices.iloc[:300, 0] = np.nan
+    prices.iloc[100:110, 1] = np.nan
+    return prices
+
+
+def test_max_drawdown_and_dates_match_pandas(prices):
+    _, summary, _ = drawdown_analytics(prices)
+
+    for asset in prices.columns:
+        history = prices[asset].dropna()
+        drawdowns = history / history.cummax() - 1
+        trough = drawdowns.idxmin()
+        peak = drawdowns[:trough][drawdowns[:trough] >= 0].index[-1]
+        recoveries = drawdowns[trough:][drawdowns[trough:] >= 0].index
+
+        assert summary.loc[asset, "Max Drawdown"] == pytest.approx(drawdowns.min())
+        assert summary.loc[asset, "Trough Date"] == trough
+        assert summary.loc[asset, "Peak Date"] == peak
+        assert summary.loc[asset, "Drawdown Duration"] == (trough - peak).days
+        if len(recoveries):
+            assert summary.loc[asset, "Recovery Date"] == recoveries[0]
+            assert summary.loc[asset, "Time to Recovery"] == (recoveries[0] - trough).days
+        else:
+            assert pd.isna(summary.loc[asset, "Recovery Date"])
+
+
+def test_drawdown_series_matches_cummax(prices):
+    peaks, drawdowns = drawdown_series(prices)
+
+    for asset in prices.columns:
+        history = prices[asset].dropna()
+        np.testing.assert_allclose(drawdowns[asset].dropna().values, (history / history.cummax() - 1).values, rtol=1e-12)
+        np.testing.assert_allclose(peaks[asset].reindex(history.index).values, history.cummax().values)
+
+
+def test_episodes_on_a_known_path():
+    dates = pd.date_range("2022-01-01", periods=9)
+    prices = pd.DataFrame({"Asset": [10, 8, 9, 11, 10.5, 6, 7, 12, 11.0]}, index=dates)
+    drawdowns, summary, episodes = drawdown_analytics(prices, top_n=5)
+
+    # Three episodes: 11 -> 6 (recovered at 12), 10 -> 8 (recovered at 11) and 12 -> 11 (still underwater)
+    assert list(episodes["Drawdown"].round(6)) == [round(6 / 11 - 1, 6), -.2, round(11 / 12 - 1, 6)]
+    assert list(episodes["Trough Date"]) == [dates[5], dates[1], dates[8]]
+    assert list(episodes["Peak Date"]) == [dates[3], dates[0], dates[7]]
+    assert list(episodes["Recovery Date"][:2]) == [dates[7], dates[3]] and pd.isna(episodes["Recovery Date"].iloc[2])
+    assert summary.loc["Asset", "Current Drawdown"] == pytest.approx(11 / 12 - 1)
+    assert summary.loc["Asset", "Longest Underwater"] == 3
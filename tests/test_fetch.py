@@ -0,0 +1,179 @@
+"""Tests to Check the Single-Flight Coalescing, Token-Bucket Pacing, Priority Lanes and Date Chunks of the Fetch Layer"""
+
+# Required libraries and dependencies
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pytest
+import formulas.fetch as fetch
+from formulas.fetch import SingleFlight, TokenBucket, date_chunks, fetch_metric_timeseries
+
+
+def run_concurrently(target, n_threads):
+    threads = [threading.Thread(target=target) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert not any(thread.is_alive() for thread in threads)
+
+
+"""Single-Flight Tests"""
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls, results = [], []
+
+    def upstream():
+        # Stays in flight until every caller has arrived, so all of them must coalesce onto this call
+        calls.append(1)
+        deadline = time.monotonic() + 5
+        while flight.metrics["messari"]["Requests"] < 8 and time.monotonic() < deadline:
+            time.sleep(.001)
+        return pd.DataFrame({"close": [1.0, 2.0]})
+
+    run_concurrently(lambda: results.append(flight.do(("messari", "price"), upstream)), 8)
+
+    assert len(calls) == 1
+    assert flight.metrics["messari"] == {"Requests": 8, "Upstream Calls": 1, "Coalesced": 7, "Retries": 0, "Errors": 0}
+    assert all(result.equals(results[0]) for result in results)
+    # Every caller gets its own copy
+    assert len({id(result) for result in results}) == 8
+
+
+def test_coalesced_callers_share_the_error():
+    flight = SingleFlight()
+    errors = []
+
+    def upstream():
+        deadline = time.monotonic() + 5
+        while flight.metrics["messari"]["Requests"] < 4 and time.monotonic() < deadline:
+            time.sleep(.001)
+        raise ConnectionError("upstream down")
+
+    def call():
+        try:
+            flight.do(("messari", "price"), upstream)
+        except ConnectionError as error:
+            errors.append(error)
+
+    run_concurrently(call, 4)
+
+    assert len(errors) == 4
+    assert flight.metrics["messari"]["Upstream Calls"] == 1
+    assert flight.metrics["messari"]["Errors"] == 1
+
+
+def test_different_keys_and_later_calls_are_not_coalesced():
+    flight = SingleFlight()
+    calls = []
+
+    for key in [("messari", "a"), ("messari", "b"), ("messari", "a")]:
+        flight.do(key, lambda: calls.append(1))
+
+    assert len(calls) == 3
+    assert flight.metrics["messari"]["Coalesced"] == 0
+
+
+"""Token Bucket Tests"""
+
+def test_burst_then_paced():
+    bucket = TokenBucket(requests_per_minute=600, burst=3)
+
+    burst_waits = [bucket.acquire() for _ in range(3)]
+    started = time.monotonic()
+    bucket.acquire()
+
+    assert max(burst_waits) < .05
+    # 10 tokens per second: the fourth request waits for one refill
+    assert time.monotonic() - started == pytest.approx(.1, abs=.06)
+    assert bucket.stats["interactive"]["Granted"] == 4
+
+
+def test_background_leaves_a_reserve_for_interactive():
+    bucket = TokenBucket(requests_per_minute=.06, burst=3)
+
+    bucket.acquire("background")
+    bucket.acquire("background")
+
+    # One token is left, which background requests may not take but an interactive one gets at once
+    assert bucket.tokens < 1 + bucket.reserve
+    assert bucket.acquire("interactive") < .05
+
+
+def test_interactive_is_served_before_waiting_background():
+    bucket = TokenBucket(requests_per_minute=300, burst=1, reserve=0)
+    bucket.acquire()
+    order = []
+
+    background = threading.Thread(target=lambda: (bucket.acquire("background"), order.append("background")))
+    background.start()
+    while bucket.queue_depth("background") == 0:
+        time.sleep(.001)
+    interactive = threading.Thread(target=lambda: (bucket.acquire("interactive"), order.append("interactive")))
+    interactive.start()
+
+    background.join(timeout=5)
+    interactive.join(timeout=5)
+    assert order == ["interactive", "background"]
+
+
+"""Date Chunk Tests"""
+
+class RecordingClient:
+
+    # Stands in for the Messari client: one closing price per day of the requested range, and a log of the ranges asked for
+    def __init__(self):
+        self.requests = []
+
+    def get_metric_timeseries(self, asset_slugs, asset_metric, start, end):
+        self.requests.append((start, end))
+        dates = pd.date_range(start, end, name="timestamp")
+        return pd.DataFrame({(asset_slugs, "close"): (dates - pd.Timestamp("1970-01-01")).days.astype(float)}, index=dates)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(fetch.rate_limiters, "messari", TokenBucket(1e9, 1000000))
+    monkeypatch.setattr(fetch, "chunk_store_path", None)
+    return RecordingClient()
+
+
+def test_date_chunks_share_inner_boundaries_and_clip_to_the_range():
+    chunks = date_chunks("2019-03-05", "2022-02-01", days=365)
+    shifted = date_chunks("2019-03-06", "2022-02-02", days=365)
+
+    assert chunks[0][0] == "2019-03-05" and chunks[-1][1] == "2022-02-01"
+    assert chunks[1:-1] == shifted[1:-1]
+    assert all(pd.Timestamp(first) - pd.Timestamp(last) == pd.Timedelta(days=1) for (_, last), (first, _) in zip(chunks, chunks[1:]))
+    assert date_chunks("2021-03-05", "2021-03-05") == [("2021-03-05", "2021-03-05")]
+
+
+@pytest.mark.parametrize("start, end", [("2023-03-01", "2024-03-01"), ("2021-06-01", "2021-06-30")])
+def test_ranges_up_to_one_chunk_are_one_request(client, start, end):
+    prices = fetch_metric_timeseries(client, "bitcoin", "price", start, end)
+
+    assert client.requests == [(start, end)]
+    assert prices.index[0] == pd.Timestamp(start) and prices.index[-1] == pd.Timestamp(end)
+
+
+def test_long_ranges_send_only_the_requested_days(client):
+    prices = fetch_metric_timeseries(client, "bitcoin", "price", "2019-03-05", "2021-06-30")
+
+    assert len(client.requests) == 3
+    assert min(first for first, _ in client.requests) == "2019-03-05" and max(last for _, last in client.requests) == "2021-06-30"
+    assert sum(len(pd.date_range(first, last)) for first, last in client.requests) == len(prices)
+    assert prices.index.equals(pd.date_range("2019-03-05", "2021-06-30", name="timestamp"))
+
+
+def test_stored_chunks_are_reused_by_shifted_ranges(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch, "chunk_store_path", tmp_path)
+    fetch_metric_timeseries(client, "bitcoin", "price", "2019-03-05", "2021-06-30")
+    client.requests.clear()
+    prices = fetch_metric_timeseries(client, "bitcoin", "price", "2019-03-06", "2021-07-01")
+
+    # Only the two clipped edge chunks differ from the first range
+    assert len(client.requests) == 2
+    assert prices.index.equals(pd.date_range("2019-03-06", "2021-07-01", name="timestamp"))
+    np.testing.assert_array_equal(prices.iloc[:, 0].values, (prices.index - pd.Timestamp("1970-01-01")).days)
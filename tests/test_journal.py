@@ -0,0 +1,87 @@
+"""Tests to Check that the Request Journal Records Responses and Replays them without the Network"""
+
+# Required libraries and dependencies
+import gzip
+import json
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+import formulas.fetch as fetch
+import formulas.journal as journal
+from formulas.journal import install_journal, journal_position, journal_frame, journal_summary, archive_summary, ReplayMissError
+
+price_url = "https://data.messari.io/api/v1/assets/bitcoin/metrics/price/time-series"
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+
+    # Stands in for the network below requests: answers every call with its own URL, or a 500 for /error
+    calls = []
+
+    def send(adapter, request, **kwargs):
+        calls.append(request.url)
+        response = requests.Response()
+        response.status_code, response.reason = (500, "Server Error") if request.url.endswith("/error") else (200, "OK")
+        response._content = json.dumps({"url": request.url}).encode()
+        response.headers["Content-Type"] = "application/json"
+        response.encoding, response.url, response.request = "utf-8", request.url, request
+        return response
+
+    monkeypatch.setattr(HTTPAdapter, "send", HTTPAdapter.send)
+    monkeypatch.setattr(journal, "_original_send", send)
+    monkeypatch.setattr(journal, "journal_settings", dict(journal.journal_settings))
+    monkeypatch.setattr(fetch, "rate_limiters", dict(fetch.rate_limiters))
+    return calls
+
+
+def get(url, **params):
+    return requests.get(url, params=params, headers={"x-messari-api-key": "secret-key"})
+
+
+def test_recorded_responses_replay_offline(upstream, tmp_path):
+    install_journal("record", tmp_path)
+    recorded = get(price_url, start="2022-01-01", end="2022-01-31")
+
+    install_journal("replay", tmp_path)
+    position = journal_position()
+    # Query parameters in another order are the same request
+    replayed = get(price_url, end="2022-01-31", start="2022-01-01")
+
+    assert len(upstream) == 1
+    assert replayed.status_code == 200 and replayed.json() == recorded.json()
+    assert list(journal_frame(since=position)["Cache"]) == ["replay"]
+    assert journal_summary(since=position).loc[("messari", "replay"), "Requests"] == 1
+
+
+def test_replay_miss_is_raised_and_journaled(upstream, tmp_path):
+    install_journal("replay", tmp_path)
+    position = journal_position()
+
+    with pytest.raises(ReplayMissError):
+        get(price_url, start="2021-01-01")
+    assert not upstream
+    assert list(journal_frame(since=position)["Cache"]) == ["error"]
+
+
+def test_only_successful_responses_are_archived_without_credentials(upstream, tmp_path):
+    install_journal("record", tmp_path)
+    get(price_url, start="2022-01-01")
+    get("https://data.messari.io/error")
+
+    archived = list(tmp_path.glob("*/*.json.gz"))
+    assert len(archived) == 1
+    with gzip.open(archived[0], "rt", encoding="utf-8") as archive:
+        assert "secret-key" not in archive.read()
+    assert archive_summary(tmp_path).loc["messari", "Responses"] == 1
+
+
+def test_observe_mode_only_journals(upstream, tmp_path):
+    install_journal("observe", tmp_path)
+    position = journal_position()
+    get(price_url, start="2022-01-01")
+
+    entries = journal_frame(since=position)
+    assert list(entries["Cache"]) == ["network"] and list(entries["Provider"]) == ["messari"]
+    assert entries["Response Bytes"].iloc[0] == len(json.dumps({"url": upstream[0]}))
+    assert not list(tmp_path.glob("*/*.json.gz"))
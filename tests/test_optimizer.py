@@ -0,0 +1,102 @@
+"""Tests to Check the Active-Set Portfolio Solvers against SciPy's SLSQP and the Risk-Parity Conditions"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import minimize
+from formulas.optimizer import (ledoit_wolf, covariance_matrix, minimum_variance_weights, maximum_sharpe_weights,
+                                risk_parity_weights, efficient_frontier)
+from formulas.synthetic import generate_price_paths
+
+
+def random_problem(n_assets=20, seed=0):
+
+    # A well-conditioned covariance with correlated assets and spread-out expected returns
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n_assets, 3))
+    sigma = factors @ factors.T * .02 + np.diag(rng.uniform(.02, .2, n_assets))
+    assets = [f"Asset {number}" for number in range(n_assets)]
+    covariance = pd.DataFrame(sigma, index=assets, columns=assets)
+    expected_returns = pd.Series(rng.uniform(-.1, .6, n_assets), index=assets)
+    return covariance, expected_returns
+
+
+def slsqp(objective, n_assets, max_weight):
+    result = minimize(objective, np.full(n_assets, 1 / n_assets), method="SLSQP", bounds=[(0, max_weight)] * n_assets,
+                      constraints=[{"type": "eq", "fun": lambda weights: weights.sum() - 1}],
+                      options={"ftol": 1e-15, "maxiter": 1000})
+    assert result.success
+    return result.x
+
+
+@pytest.mark.parametrize("max_weight", [1.0, .15])
+def test_minimum_variance_matches_slsqp(max_weight):
+    covariance, _ = random_problem()
+    sigma = covariance.values
+    weights = minimum_variance_weights(covariance, max_weight=max_weight).values
+    reference = slsqp(lambda weights: weights @ sigma @ weights, len(sigma), max_weight)
+
+    assert weights.sum() == pytest.approx(1)
+    assert weights.min() >= 0 and weights.max() <= max_weight + 1e-12
+    assert weights @ sigma @ weights <= reference @ sigma @ reference + 1e-12
+    np.testing.assert_allclose(weights, reference, atol=1e-5)
+
+
+@pytest.mark.parametrize("max_weight", [1.0, .25])
+def test_maximum_sharpe_matches_slsqp(max_weight):
+    covariance, expected_returns = random_problem(seed=1)
+    sigma, mu = covariance.values, expected_returns.values
+    weights = maximum_sharpe_weights(covariance, expected_returns, risk_free=.02, max_weight=max_weight).values
+    reference = slsqp(lambda weights: -(weights @ mu - .02) / np.sqrt(weights @ sigma @ weights), len(sigma), max_weight)
+
+    def sharpe(weights):
+        return (weights @ mu - .02) / np.sqrt(weights @ sigma @ weights)
+
+    assert weights.sum() == pytest.approx(1)
+    assert weights.min() >= 0 and weights.max() <= max_weight + 1e-12
+    assert sharpe(weights) >= sharpe(reference) - 1e-9
+    np.testing.assert_allclose(weights, reference, atol=1e-4)
+
+
+def test_risk_parity_equalizes_risk_contributions():
+    covariance, _ = random_problem(seed=2)
+    weights = risk_parity_weights(covariance).values
+    contributions = weights * (covariance.values @ weights)
+
+    assert weights.sum() == pytest.approx(1)
+    np.testing.assert_allclose(contributions / contributions.sum(), 1 / len(weights), rtol=1e-8)
+
+
+def test_efficient_frontier_is_monotone():
+    covariance, expected_returns = random_problem(seed=3)
+    frontier, points = efficient_frontier(covariance, expected_returns, n_points=15, max_weight=.3)
+
+    assert np.all(np.diff(frontier["Expected Return"].values) > 0)
+    assert np.all(np.diff(frontier["Volatility"].values) >= -1e-12)
+    np.testing.assert_allclose(points.sum(axis=1), 1)
+
+    # The frontier starts at the (capped) minimum-variance portfolio
+    minimum = minimum_variance_weights(covariance, max_weight=.3).values
+    assert frontier["Volatility"].iloc[0] == pytest.approx(np.sqrt(minimum @ covariance.values @ minimum))
+
+
+def test_ledoit_wolf_shrinks_toward_scaled_identity():
+    rng = np.random.default_rng(4)
+    returns = rng.normal(size=(60, 40))
+    returns -= returns.mean(axis=0)
+    covariance, shrinkage = ledoit_wolf(returns)
+
+    assert 0 <= shrinkage <= 1
+    np.testing.assert_allclose(covariance, covariance.T)
+    assert np.linalg.eigvalsh(covariance).min() > 0
+
+
+def test_covariance_matrix_drops_short_histories():
+    prices = generate_price_paths(12, 400, seed=5)
+    prices.iloc[:-30, 0] = np.nan
+    covariance, expected_returns, shrinkage = covariance_matrix(prices, days=365)
+
+    assert prices.columns[0] not in covariance.index
+    assert list(covariance.index) == list(expected_returns.index)
+    np.testing.assert_allclose(covariance.values, covariance.values.T)
@@ -0,0 +1,82 @@
+"""Tests to Check that the Pipeline Orders its Stages and Skips the Ones whose Inputs are Unchanged"""
+
+# Required libraries and dependencies
+import pandas as pd
+import pytest
+import formulas.pipeline as pipeline
+from formulas.fetch import mark_missing
+
+
+@pytest.fixture
+def stages(monkeypatch):
+
+    # Two fetch stages read the run parameters; the derived stage only reads their tables
+    calls = []
+    missing = {}
+
+    def prices(run, inputs):
+        calls.append("prices")
+        table = pd.DataFrame({"Asset": [1.0, 2.0, 3.0]}, index=pd.date_range("2022-01-01", periods=3).rename("Date"))
+        return {"prices": mark_missing(table, missing)}
+
+    def stocks(run, inputs):
+        calls.append("stocks")
+        return {"stocks": pd.DataFrame({"SPY": [4.0, 5.0]}, index=pd.date_range("2022-01-03", periods=2).rename("Date"))}
+
+    def report(run, inputs):
+        calls.append("report")
+        return {"report": inputs["prices"].join(inputs["stocks"])}
+
+    monkeypatch.setattr(pipeline, "stages", {"prices": (prices, [], True), "stocks": (stocks, [], True),
+                                             "report": (report, ["prices", "stocks"], False)})
+    monkeypatch.setattr(pipeline, "stage_versions", {"prices": 1, "stocks": 1, "report": 1})
+    return calls, missing
+
+
+def run(output_path, selected=None, end="2022-01-31", **kwargs):
+    return pipeline.run_pipeline(selected, "2022-01-01", end, output_path=output_path, max_workers=2, **kwargs)
+
+
+def test_stage_order_puts_dependencies_first(stages):
+    assert pipeline.stage_order(["report"]) == ["prices", "stocks", "report"]
+    assert pipeline.stage_order(["stocks"]) == ["stocks"]
+    with pytest.raises(ValueError):
+        pipeline.stage_order(["unknown"])
+
+
+def test_unchanged_stages_are_skipped(stages, tmp_path):
+    calls, _ = stages
+    assert run(tmp_path) == {"prices": "ran", "stocks": "ran", "report": "ran"}
+    assert run(tmp_path) == {"prices": "skipped", "stocks": "skipped", "report": "skipped"}
+    assert sorted(calls) == ["prices", "report", "stocks"]
+    assert pipeline.read_artifact(next(tmp_path.glob("report_*.parquet")))["SPY"].count() == 1
+
+
+def test_new_parameters_rerun_fetches_but_not_unchanged_derived_tables(stages, tmp_path):
+    run(tmp_path)
+    status = run(tmp_path, end="2022-02-28")
+
+    # Same tables from the fetch stages, so the report's inputs hash the same
+    assert status == {"prices": "ran", "stocks": "ran", "report": "skipped"}
+
+
+def test_version_bumps_deleted_artifacts_and_force_rerun(stages, tmp_path, monkeypatch):
+    run(tmp_path)
+
+    monkeypatch.setitem(pipeline.stage_versions, "report", 2)
+    assert run(tmp_path)["report"] == "ran"
+
+    next(tmp_path.glob("stocks_*.parquet")).unlink()
+    assert run(tmp_path) == {"prices": "skipped", "stocks": "ran", "report": "skipped"}
+
+    assert set(run(tmp_path, force=True).values()) == {"ran"}
+
+
+def test_tables_with_missing_assets_are_refetched(stages, tmp_path):
+    _, missing = stages
+    missing["Other"] = "upstream unavailable"
+    assert run(tmp_path, ["prices"]) == {"prices": "ran, missing Other"}
+
+    missing.clear()
+    assert run(tmp_path, ["prices"]) == {"prices": "ran"}
+    assert run(tmp_path, ["prices"]) == {"prices": "skipped"}
@@ -0,0 +1,29 @@
+"""Tests to Check that Every Report Image is Drawn Once and Redrawn Only when its Data Changes"""
+
+# Required libraries and dependencies
+from formulas.regression_report import render_regression_report, regression_chart_name
+from formulas.render_cache import refresh_report, load_report
+from formulas.synthetic import generate_price_paths
+
+
+def test_regression_charts_are_drawn_once_and_linked(tmp_path):
+    prices = generate_price_paths(4, 300, seed=61)
+    static = refresh_report(prices, tmp_path, max_workers=2)
+    regression = render_regression_report(prices, tmp_path, max_workers=2)
+
+    # The static report cache holds only the cross-asset images; the report view links the regression files
+    assert not any(name.endswith("_linear_regression") for name in static)
+    assert len(list((tmp_path / "cache").glob("*.png"))) == len(static)
+    assert sorted(tmp_path.glob("*_linear_regression.png")) == sorted(tmp_path / regression_chart_name(asset) for asset in prices.columns)
+    assert set(load_report(tmp_path)) == set(static) | {regression_chart_name(asset)[:-4] for asset in regression}
+
+
+def test_unchanged_data_is_not_redrawn(tmp_path):
+    prices = generate_price_paths(3, 300, seed=62)
+    render_regression_report(prices, tmp_path, max_workers=2)
+    prices.iloc[-1, 0] *= 1.1
+    manifest = render_regression_report(prices, tmp_path, max_workers=2)
+
+    assert [asset for asset, entry in manifest.items() if "render_seconds" in entry] == [prices.columns[0]]
+    refresh_report(prices, tmp_path, max_workers=2)
+    assert all(entry["cached"] for entry in refresh_report(prices, tmp_path, max_workers=2).values())
@@ -0,0 +1,67 @@
+"""Tests to Check the Annualized Risk/Return Ratios against a Per-Asset Reference Calculation"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+import pytest
+from formulas.risk import risk_metrics, periods_per_year, load_risk_free_rate
+from formulas.synthetic import generate_price_paths
+
+
+def reference_metrics(history, annual_rate, ppy):
+
+    # Textbook formulas on one asset's own history: geometric annualization, sample volatility, downside below the rate
+    returns = history.pct_change().dropna()
+    period_rate = (1 + annual_rate) ** (1 / ppy) - 1
+    annualized_return = (history.iloc[-1] / history.iloc[0]) ** (ppy / len(returns)) - 1
+    volatility = returns.std() * np.sqrt(ppy)
+    downside_deviation = np.sqrt((np.minimum(returns - period_rate, 0) ** 2).mean() * ppy)
+    max_drawdown = (history / history.cummax() - 1).min()
+    excess_return = annualized_return - annual_rate
+
+    return {"Total Return": history.iloc[-1] / history.iloc[0] - 1, "Annualized Return": annualized_return,
+            "Annual Volatility": volatility, "Downside Deviation": downside_deviation, "Max Drawdown": max_drawdown,
+            "Sharpe Ratio": excess_return / volatility, "Sortino Ratio": excess_return / downside_deviation,
+            "Calmar Ratio": excess_return / abs(max_drawdown)}
+
+
+@pytest.mark.parametrize("annual_rate", [0.0, .04])
+def test_matches_reference_per_asset(annual_rate):
+    prices = generate_price_paths(10, 500, seed=31)
+    prices.iloc[:200, 0] = np.nan
+    metrics = risk_metrics(prices, risk_free=annual_rate)
+
+    # Assets listed part-way through are annualized over their own span on the matrix's frequency
+    ppy = periods_per_year(prices.index)
+    for asset in prices.columns:
+        for column, value in reference_metrics(prices[asset].dropna(), annual_rate, ppy).items():
+            assert metrics.loc[asset, column] == pytest.approx(value, rel=1e-9), (asset, column)
+
+
+def test_exchange_days_annualize_at_their_own_frequency():
+    days = pd.bdate_range("2021-01-04", "2022-12-30")
+
+    assert periods_per_year(days) == pytest.approx(261, abs=1)
+    assert periods_per_year(pd.date_range("2021-01-01", "2022-12-31")) == pytest.approx(365.25, rel=1e-3)
+
+
+def test_risk_free_curve_is_carried_forward():
+    prices = generate_price_paths(3, 60, seed=32)
+    curve = pd.Series([.01, .05], index=[prices.index[0], prices.index[30]])
+    stepped = pd.Series(np.where(np.arange(60) < 30, .01, .05), index=prices.index)
+
+    pd.testing.assert_frame_equal(risk_metrics(prices, risk_free=curve), risk_metrics(prices, risk_free=stepped))
+
+
+def test_missing_curve_file_uses_the_default(tmp_path):
+    dates = pd.date_range("2022-01-01", periods=5)
+    rates = load_risk_free_rate(dates, path=tmp_path / "missing.csv", default=.03)
+
+    assert (rates == .03).all() and rates.index.equals(dates)
+
+
+def test_short_histories_are_nan():
+    prices = generate_price_paths(2, 30, seed=33)
+    prices.iloc[:-1, 1] = np.nan
+
+    assert risk_metrics(prices, risk_free=0.0).loc[prices.columns[1]].isna().all()
@@ -0,0 +1,60 @@
+"""Tests to Check the Prefix-Sum Rolling Risk Metrics against pandas Rolling Windows"""
+
+# Required libraries and dependencies
+import numpy as np
+import pytest
+from formulas.risk import periods_per_year
+from formulas.rolling import rolling_risk_metrics
+from formulas.synthetic import generate_price_paths
+
+
+@pytest.fixture(scope="module")
+def prices():
+
+    # A late listing and a gap, so the windows hold different numbers of observations per asset
+    prices = generate_price_paths(8, 600, seed=41)
+    prices.iloc[:250, 1] = np.nan
+    prices.iloc[300:340, 2] = np.nan
+    return prices
+
+
+@pytest.fixture(scope="module")
+def returns(prices):
+
+    # Returns across a gap span it; days without a price stay NaN
+    return prices.ffill().pct_change().where(prices.notna()).iloc[1:]
+
+
+@pytest.mark.parametrize("window", [30, 90])
+def test_volatility_and_ratios_match_pandas(prices, returns, window):
+    metrics = rolling_risk_metrics(prices, windows=(window,), risk_free=0.0)[window]
+    ppy = periods_per_year(prices.index)
+
+    rolling = returns.rolling(window, min_periods=window // 2)
+    volatility = rolling.std() * np.sqrt(ppy)
+    sharpe = np.expm1(np.log1p(returns).rolling(window, min_periods=window // 2).sum() * ppy / rolling.count()) / volatility
+    downside = np.sqrt((np.minimum(returns, 0) ** 2).rolling(window, min_periods=window // 2).sum() / rolling.count() * ppy)
+
+    np.testing.assert_allclose(metrics["Annual Volatility"].values, volatility.values, rtol=1e-7, atol=1e-10, equal_nan=True)
+    np.testing.assert_allclose(metrics["Sharpe Ratio"].values, sharpe.values, rtol=1e-7, atol=1e-10, equal_nan=True)
+    np.testing.assert_allclose(metrics["Sortino Ratio"].values, (sharpe * volatility / downside).values, rtol=1e-7, atol=1e-10, equal_nan=True)
+
+
+def test_beta_matches_pandas(prices, returns):
+    benchmark = prices.count().idxmax()
+    beta = rolling_risk_metrics(prices, windows=(60,), benchmark=benchmark, risk_free=0.0)[60]["Beta"]
+
+    for asset in prices.columns:
+        # Only the days on which both the asset and the benchmark traded
+        market = returns[benchmark].where(returns[asset].notna())
+        expected = returns[asset].rolling(60, min_periods=2).cov(market) / market.rolling(60, min_periods=2).var()
+        expected = expected.where(returns[asset].rolling(60, min_periods=1).count() >= 30)
+        np.testing.assert_allclose(beta[asset].values, expected.values, rtol=1e-6, atol=1e-9, equal_nan=True)
+
+
+def test_min_periods_masks_short_windows(prices, returns):
+    metrics = rolling_risk_metrics(prices, windows=(30,), risk_free=0.0, min_periods=25)[30]["Annual Volatility"]
+    enough = returns.rolling(30, min_periods=1).count() >= 25
+
+    assert metrics.notna().equals(enough)
+    assert metrics[prices.columns[1]].first_valid_index() == returns.index[250 + 24]
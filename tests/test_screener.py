@@ -0,0 +1,82 @@
+"""Tests to Check the Screener's Sorted-Index Queries against a pandas Brute Force"""
+
+# Required libraries and dependencies
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from formulas.artifacts import write_artifact, pipeline_manifest
+from formulas.screener import Screener, screener_metrics, load_screener
+from formulas.synthetic import generate_price_paths
+
+
+@pytest.fixture(scope="module")
+def metrics():
+
+    # Ties and missing values in every column
+    rng = np.random.default_rng(12)
+    table = pd.DataFrame(rng.normal(size=(300, 3)).round(1), columns=["A", "B", "C"],
+                         index=[f"Asset {number}" for number in range(300)])
+    table = table.mask(rng.random(table.shape) < .1)
+    return table.rename_axis("Asset")
+
+
+def brute_force(metrics, filters, sort_by, ascending, top_n):
+    selected = metrics
+    for column, (low, high) in filters.items():
+        keep = selected[column].notna()
+        if low is not None:
+            keep &= selected[column] >= low
+        if high is not None:
+            keep &= selected[column] <= high
+        selected = selected[keep]
+    if sort_by is not None:
+        selected = selected.sort_values(sort_by, ascending=ascending, kind="mergesort", na_position="last")
+    return selected if top_n is None else selected.iloc[:top_n]
+
+
+@pytest.mark.parametrize("filters", [{}, {"A": (-.5, .5)}, {"A": (None, 0), "B": (.2, None)}, {"A": (5, 6)}])
+@pytest.mark.parametrize("sort_by, ascending", [(None, False), ("C", False), ("C", True)])
+@pytest.mark.parametrize("top_n", [None, 0, 7])
+def test_query_matches_brute_force(metrics, filters, sort_by, ascending, top_n):
+    result = Screener(metrics).query(filters, sort_by=sort_by, ascending=ascending, top_n=top_n)
+    expected = brute_force(metrics, filters, sort_by, ascending, top_n)
+
+    if sort_by is None:
+        assert list(result.index) == list(expected.index)
+    else:
+        # Ties may come back in either order, so compare the sort column and the set of assets
+        np.testing.assert_array_equal(result[sort_by].values, expected[sort_by].values)
+        if top_n is None:
+            assert set(result.index) == set(expected.index)
+    pd.testing.assert_frame_equal(result, metrics.loc[result.index])
+
+
+def test_value_range_ignores_missing(metrics):
+    screener = Screener(metrics)
+
+    assert screener.value_range("B") == (metrics["B"].min(), metrics["B"].max())
+    assert len(screener) == len(metrics)
+
+
+def test_screener_metrics_cover_the_universe():
+    prices = generate_price_paths(8, 400, seed=13)
+    reference = prices.columns[0]
+    metrics = screener_metrics(prices, reference=reference)
+
+    assert list(metrics.index) == list(prices.columns)
+    assert metrics.loc[reference, "Correlation to BTC"] == pytest.approx(1)
+    expected = prices.iloc[-1] / prices[prices.index >= prices.index[-1] - pd.Timedelta(days=29)].iloc[0] - 1
+    np.testing.assert_allclose(metrics["Return 30D"].values, expected.values, rtol=1e-12)
+
+
+def test_load_screener_reads_the_pipeline_artifact(metrics, tmp_path):
+    assert load_screener(tmp_path) is None
+
+    entry = write_artifact(metrics, tmp_path / "screener_metrics_01.01.22.parquet")
+    with open(tmp_path / pipeline_manifest, "w") as manifest_file:
+        json.dump({"screener": {"artifacts": {"screener_metrics": entry}}}, manifest_file)
+    screener = load_screener(tmp_path)
+
+    assert len(screener) == len(metrics) and load_screener(tmp_path) is screener
+    pd.testing.assert_frame_equal(screener.query(), metrics)
@@ -0,0 +1,27 @@
+"""Tests to Check the Compact Plotly Figures against the Figures they are Built From"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from formulas.serialization import compact_figure, plotly_payload, epoch_milliseconds
+
+
+def test_dates_become_epoch_milliseconds_on_date_axes():
+    dates = pd.date_range("2022-01-01", periods=4, tz="UTC")
+    figure = go.Figure([go.Scatter(x=dates, y=[1.5, 2.5, np.nan, 4.0]), go.Bar(x=["a", "b"], y=[1, 2], xaxis="x2")])
+    compact = compact_figure(figure)
+
+    np.testing.assert_array_equal(compact["data"][0]["x"], (dates - pd.Timestamp("1970-01-01", tz="UTC")) // pd.Timedelta(milliseconds=1))
+    np.testing.assert_array_equal(compact["data"][0]["y"], [1.5, 2.5, np.nan, 4.0])
+    assert compact["layout"]["xaxis"]["type"] == "date"
+    assert "xaxis2" not in compact["layout"] or compact["layout"]["xaxis2"].get("type") != "date"
+    assert list(compact["data"][1]["x"]) == ["a", "b"]
+
+
+def test_payload_is_smaller_than_plotly_json():
+    dates = pd.date_range("2015-01-01", periods=2000)
+    figure = go.Figure(go.Scatter(x=dates, y=np.linspace(0, 1, 2000)))
+
+    assert len(plotly_payload(figure)) < len(figure.to_json())
+    assert epoch_milliseconds(dates[:1])[0] == 1420070400000
@@ -0,0 +1,54 @@
+"""Tests to Check that Crypto Days are Compounded onto the Exchange Sessions they Roll Into"""
+
+# Required libraries and dependencies
+import numpy as np
+import pandas as pd
+import pytest
+from formulas.sessions import session_returns, calendar_join, benchmark_correlations
+from formulas.synthetic import generate_price_paths
+
+
+@pytest.fixture(scope="module")
+def crypto_prices():
+
+    # Every calendar day observed for every asset
+    return generate_price_paths(4, 200, seed=81).ffill().bfill()
+
+
+@pytest.fixture(scope="module")
+def sessions(crypto_prices):
+
+    # Weekdays without one holiday, stamped at the close in New York time like Alpaca bars
+    days = pd.bdate_range(crypto_prices.index[0], crypto_prices.index[-1]).delete(15)
+    return (days + pd.Timedelta(hours=16)).tz_localize("America/New_York")
+
+
+def test_session_returns_compound_weekends_and_holidays(crypto_prices, sessions):
+    returns = session_returns(crypto_prices, sessions)
+    closes = crypto_prices.reindex(sessions.tz_localize(None).normalize())
+
+    # With every crypto day observed, a session's return is the price ratio between consecutive sessions
+    expected = closes.values[1:] / closes.values[:-1] - 1
+    np.testing.assert_allclose(returns.values, expected, rtol=1e-10)
+    assert returns.index.equals(pd.DatetimeIndex(sessions.tz_localize(None).normalize()[1:], name="Date"))
+
+
+def test_sessions_with_a_missing_crypto_day_are_nan(crypto_prices, sessions):
+    prices = crypto_prices.copy()
+    gap = sessions.tz_localize(None).normalize()[10] - pd.Timedelta(days=1)
+    prices.loc[gap, prices.columns[0]] = np.nan
+    returns = session_returns(prices, sessions)
+
+    assert returns[prices.columns[0]].isna().sum() == 1
+    assert returns.iloc[:, 0].isna().idxmax() in returns.index[9:11]
+    assert returns.iloc[:, 1:].notna().all().all()
+
+
+def test_calendar_join_and_correlations_match_pandas(crypto_prices, sessions):
+    rng = np.random.default_rng(82)
+    stocks = pd.DataFrame({"SPY": 400 * np.cumprod(1 + rng.normal(0, .01, len(sessions)))}, index=sessions)
+    joined = calendar_join(crypto_prices, stocks)
+
+    np.testing.assert_allclose(joined["SPY"].values, stocks["SPY"].pct_change().values[1:], rtol=1e-12)
+    correlations = benchmark_correlations(crypto_prices, stocks)
+    np.testing.assert_allclose(correlations["SPY"].values, joined.corr()["SPY"].values[:-1], atol=1e-12)